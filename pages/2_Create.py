@@ -324,7 +324,8 @@ with tab_gen:
             if supabase is None or not supabase.is_available or supabase_id is None:
                 return
             try:
-                supabase.update_curriculum_status(supabase_id, "generating", curriculum)
+                # Fire and forget: generation continues while the save runs
+                supabase.update_curriculum_status_async(supabase_id, "generating", curriculum)
             except Exception as e:
                 print(f"Checkpoint save error (non-fatal): {e}")
 
@@ -456,7 +457,8 @@ with tab_gen:
             try:
                 is_cancelled = result.get("meta", {}).get("cancelled", False)
                 final_status = "partial" if is_cancelled else "complete"
-                supabase.update_curriculum_status(supabase_id, final_status, result)
+                # Queued behind any in-flight checkpoints so it lands last
+                supabase.update_curriculum_status_async(supabase_id, final_status, result).result()
                 result["meta"]["supabase_id"] = supabase_id
             except Exception as e:
                 print(f"Final Supabase save error (non-fatal): {e}")
@@ -4,11 +4,14 @@ Intelligent caching to reduce API costs by avoiding regeneration of identical co
 """
 
 import os
+import re
 import json
 import hashlib
 import time
+import sqlite3
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List
+from typing import Dict, Any, Optional, List, Set, Tuple
 from datetime import datetime, timedelta
 
 # Import POSIX file locking utilities (best-effort)
@@ -45,6 +48,7 @@ class ContentCache:
         
         # Create subdirectories for different content types
         (self.cache_dir / "content").mkdir(exist_ok=True)
+        (self.cache_dir / "illustrated_content").mkdir(exist_ok=True)
         (self.cache_dir / "images").mkdir(exist_ok=True)
         (self.cache_dir / "charts").mkdir(exist_ok=True)
         (self.cache_dir / "quizzes").mkdir(exist_ok=True)
@@ -349,8 +353,33 @@ class ContentCache:
         return stats
 
 
+# "4", "grade 4", "4th grade" and "Grade 4th" all describe the same level
+_GRADE_RE = re.compile(r"^(?:grade\s*)?(\d{1,2})(?:st|nd|rd|th)?(?:\s*grade)?$")
+
+
+def _normalize_text(value: Any) -> str:
+    """Lower-case and collapse whitespace so trivial wording differences match"""
+    return " ".join(str(value).lower().split())
+
+
+def _normalize_grade(value: Any) -> str:
+    text = _normalize_text(value)
+    match = _GRADE_RE.match(text)
+    return match.group(1) if match else text
+
+
 class SmartCache:
     """Smart caching with content similarity detection"""
+
+    # Similarity key -> cache key, persisted in SQLite next to the cache files
+    # so it survives restarts and is shared by every process using the same
+    # cache dir. Each agent owns a SmartCache, so connections are shared at
+    # class level and serialized by a lock. Files cached before the index
+    # existed are picked up by a one-time scan per content type.
+    INDEX_DB_NAME = "similarity_index.db"
+    _connections: Dict[str, sqlite3.Connection] = {}
+    _backfilled: Set[Tuple[str, str]] = set()
+    _index_lock = threading.Lock()
     
     def __init__(self, cache_dir: str = "cache"):
         """Initialize smart cache
@@ -359,6 +388,7 @@ class SmartCache:
             cache_dir: Directory for cache storage
         """
         self.content_cache = ContentCache(cache_dir)
+        self.index_path = str((self.content_cache.cache_dir / self.INDEX_DB_NAME).resolve())
         
     def get_content_similarity_key(self, params: Dict[str, Any]) -> str:
         """Generate a similarity key that ignores minor parameter differences
@@ -371,11 +401,11 @@ class SmartCache:
         """
         # Extract core parameters that affect content similarity
         core_params = {
-            'topic': str(params.get('topic', '')).lower().strip(),
-            'subject': str(params.get('subject', '')).lower().strip(), 
-            'grade': str(params.get('grade', '')).lower().strip(),
-            'style': str(params.get('style', '')).lower().strip(),
-            'language': str(params.get('language', 'english')).lower().strip()
+            'topic': _normalize_text(params.get('topic', '')),
+            'subject': _normalize_text(params.get('subject', '')),
+            'grade': _normalize_grade(params.get('grade', '')),
+            'style': _normalize_text(params.get('style', '')),
+            'language': _normalize_text(params.get('language', 'english'))
         }
         
         # Remove empty values and normalize
@@ -386,6 +416,113 @@ class SmartCache:
         except (TypeError, ValueError):
             # Fallback for non-serializable objects
             return str(sorted(core_params.items()))
+
+    def _index_conn(self) -> sqlite3.Connection:
+        """Get the shared index connection, creating the schema on first use
+        
+        Must be called with _index_lock held.
+        
+        Returns:
+            SQLite connection for this cache directory's index
+        """
+        conn = self._connections.get(self.index_path)
+        if conn is None:
+            conn = sqlite3.connect(
+                self.index_path,
+                check_same_thread=False,
+                timeout=30.0,
+                isolation_level=None,  # Autocommit mode
+            )
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS similarity_index (
+                    content_type TEXT NOT NULL,
+                    similarity_key TEXT NOT NULL,
+                    cache_key TEXT NOT NULL,
+                    created_at REAL NOT NULL,
+                    PRIMARY KEY (content_type, similarity_key)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS similarity_backfill (
+                    content_type TEXT PRIMARY KEY
+                )
+            """)
+            self._connections[self.index_path] = conn
+        return conn
+
+    def _backfill_index(self, conn: sqlite3.Connection, content_type: str) -> None:
+        """Index cache files written before the similarity index existed
+        
+        Runs one directory scan per content type for the lifetime of the
+        index database. Must be called with _index_lock held.
+        
+        Args:
+            conn: Index connection
+            content_type: Type of content to index
+        """
+        marker = (self.index_path, content_type)
+        if marker in self._backfilled:
+            return
+        done = conn.execute(
+            "SELECT 1 FROM similarity_backfill WHERE content_type = ?", (content_type,)
+        ).fetchone()
+        if done is None:
+            rows = []
+            cache_dir = self.content_cache.cache_dir / content_type
+            if cache_dir.exists():
+                for cache_file in cache_dir.glob("*.json"):
+                    if not self.content_cache._is_cache_valid(cache_file):
+                        continue
+                    try:
+                        with open(cache_file, 'r', encoding='utf-8') as f:
+                            cached_params = json.load(f).get('params', {})
+                        rows.append((
+                            content_type,
+                            self.get_content_similarity_key(cached_params),
+                            cache_file.stem,
+                            cache_file.stat().st_mtime,
+                        ))
+                    except Exception as e:
+                        print(f"Error checking similarity for {cache_file}: {e}")
+            # Oldest first so the newest file wins each similarity key
+            rows.sort(key=lambda row: row[3])
+            with conn:
+                conn.execute("BEGIN")
+                conn.executemany(
+                    "INSERT OR REPLACE INTO similarity_index VALUES (?, ?, ?, ?)", rows
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO similarity_backfill VALUES (?)", (content_type,)
+                )
+        self._backfilled.add(marker)
+
+    def cache_content(self, content_type: str, params: Dict[str, Any], content: Any) -> bool:
+        """Cache generated content and make it visible to similarity lookups
+        
+        Args:
+            content_type: Type of content being cached
+            params: Parameters used for generation
+            content: The generated content to cache
+            
+        Returns:
+            True if successfully cached, False otherwise
+        """
+        if not self.content_cache.cache_content(content_type, params, content):
+            return False
+
+        try:
+            cache_key = self.content_cache._generate_cache_key(content_type, params)
+            with self._index_lock:
+                self._index_conn().execute(
+                    "INSERT OR REPLACE INTO similarity_index VALUES (?, ?, ?, ?)",
+                    (content_type, self.get_content_similarity_key(params), cache_key, time.time()),
+                )
+        except Exception as e:
+            # Content is cached; it just won't be found by similarity yet
+            print(f"Error indexing cached {content_type}: {e}")
+        return True
         
     def get_similar_content(self, content_type: str, params: Dict[str, Any]) -> Optional[Any]:
         """Get content with similar parameters if exact match not found
@@ -406,31 +543,35 @@ class SmartCache:
         similarity_key = self.get_content_similarity_key(params)
         
         try:
-            cache_dir = self.content_cache.cache_dir / content_type
-            if not cache_dir.exists():
+            with self._index_lock:
+                conn = self._index_conn()
+                self._backfill_index(conn, content_type)
+                row = conn.execute(
+                    "SELECT cache_key FROM similarity_index "
+                    "WHERE content_type = ? AND similarity_key = ?",
+                    (content_type, similarity_key),
+                ).fetchone()
+            if row is None:
                 return None
-                
-            # Check all cached files for similar parameters
-            for cache_file in cache_dir.glob("*.json"):
-                if not self.content_cache._is_cache_valid(cache_file):
-                    continue
-                    
-                try:
-                    with open(cache_file, 'r', encoding='utf-8') as f:
-                        cached_data = json.load(f)
-                        
-                        cached_params = cached_data.get('params', {})
-                        cached_similarity_key = self.get_content_similarity_key(cached_params)
-                        
-                        if cached_similarity_key == similarity_key:
-                            print(f"Found similar cached content for {content_type}")
-                            # Update access time
-                            cache_file.touch()
-                            return cached_data.get('content')
-                        
-                except Exception as e:
-                    print(f"Error checking similarity for {cache_file}: {e}")
-                    continue
+
+            cache_file = self.content_cache._get_cache_file_path(content_type, row[0])
+            if not self.content_cache._is_cache_valid(cache_file):
+                # Expired or removed (e.g. clear_cache); drop the stale entry
+                with self._index_lock:
+                    self._index_conn().execute(
+                        "DELETE FROM similarity_index "
+                        "WHERE content_type = ? AND similarity_key = ? AND cache_key = ?",
+                        (content_type, similarity_key, row[0]),
+                    )
+                return None
+
+            with open(cache_file, 'r', encoding='utf-8') as f:
+                cached_data = json.load(f)
+
+            print(f"Found similar cached content for {content_type}")
+            # Update access time
+            self.content_cache._safe_touch_file(cache_file)
+            return cached_data.get('content')
                     
         except Exception as e:
             print(f"Error searching for similar content: {e}")
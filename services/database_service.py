@@ -10,7 +10,7 @@ import sqlite3
 import hashlib
 import threading
 from pathlib import Path
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Callable, Dict, Any, Iterator, Optional, List, Tuple
 from datetime import datetime
 from contextlib import contextmanager
 
@@ -21,6 +21,11 @@ try:
 except ImportError:
     HAS_STREAMLIT = False
 
+# Database files already given PRAGMA optimize in this process. Pages build a
+# DatabaseService on every rerun, so the pass runs once per file, not per render.
+_OPTIMIZED_DB_PATHS = set()
+_OPTIMIZED_DB_PATHS_LOCK = threading.Lock()
+
 
 class DatabaseService:
     """Manages SQLite database operations for InstaSchool"""
@@ -51,9 +56,12 @@ class DatabaseService:
                         created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                         last_login TIMESTAMP,
                         total_xp INTEGER DEFAULT 0,
-                        preferences TEXT
+                        preferences TEXT,
+                        badges TEXT DEFAULT '[]',
+                        has_pin INTEGER DEFAULT 0
                     )
                 """)
+                self._migrate_user_columns(cursor)
 
                 # Curricula metadata table
                 cursor.execute("""
@@ -124,18 +132,80 @@ class DatabaseService:
                     ON review_items(user_id, next_review)
                 """)
 
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_review_user_curriculum 
+                    ON review_items(user_id, curriculum_id, created_at DESC)
+                """)
+
                 cursor.execute("""
                     CREATE INDEX IF NOT EXISTS idx_curricula_creator 
                     ON curricula(created_by)
                 """)
 
+                # Case-insensitive username order for profile pickers
+                cursor.execute("""
+                    CREATE INDEX IF NOT EXISTS idx_users_username_nocase
+                    ON users(username COLLATE NOCASE)
+                """)
+
                 conn.commit()
+
+                # Refresh planner statistics so new indexes get picked up;
+                # only re-analyzes tables whose stats are missing or stale
+                with _OPTIMIZED_DB_PATHS_LOCK:
+                    first_init = self.db_path not in _OPTIMIZED_DB_PATHS
+                    _OPTIMIZED_DB_PATHS.add(self.db_path)
+                if first_init:
+                    cursor.execute("PRAGMA optimize")
                 print(f"Database initialized: {self.db_path}")
 
         except sqlite3.Error as e:
             print(f"Error initializing database: {e}")
             raise
 
+    @staticmethod
+    def _migrate_user_columns(cursor: sqlite3.Cursor) -> None:
+        """Add the badges/has_pin user columns to older databases
+
+        These fields used to live in the preferences JSON blob. When the
+        columns are added, existing rows are backfilled from it once, and a
+        preferences created_at (kept from the JSON-file era) replaces the
+        row's own timestamp.
+        """
+        cursor.execute("PRAGMA table_info(users)")
+        columns = {row[1] for row in cursor.fetchall()}
+        if {"badges", "has_pin"} <= columns:
+            return
+
+        if "badges" not in columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN badges TEXT DEFAULT '[]'")
+        if "has_pin" not in columns:
+            cursor.execute("ALTER TABLE users ADD COLUMN has_pin INTEGER DEFAULT 0")
+
+        cursor.execute(
+            "SELECT id, pin_hash, preferences FROM users WHERE preferences IS NOT NULL"
+        )
+        updates = []
+        for user_id, pin_hash, raw in cursor.fetchall():
+            try:
+                prefs = json.loads(raw)
+            except (json.JSONDecodeError, TypeError):
+                continue
+            if not isinstance(prefs, dict):
+                continue
+            updates.append((
+                json.dumps(prefs.get("badges") or []),
+                int(bool(pin_hash) or bool(prefs.get("has_pin"))),
+                prefs.get("created_at"),
+                user_id,
+            ))
+        if updates:
+            cursor.executemany(
+                "UPDATE users SET badges = ?, has_pin = ?, "
+                "created_at = COALESCE(?, created_at) WHERE id = ?",
+                updates,
+            )
+
     @contextmanager
     def get_connection(self):
         """Get thread-local database connection with connection reuse.
@@ -165,12 +235,18 @@ class DatabaseService:
                     check_same_thread=False,
                     timeout=30.0,
                     isolation_level=None,  # Autocommit mode
+                    cached_statements=256,
                 )
                 conn.row_factory = sqlite3.Row
-                # Enable WAL and busy timeout for better concurrency
+                # Enable WAL and busy timeout for better concurrency.
+                # synchronous=NORMAL is durable under WAL and drops the fsync
+                # from each commit (e.g. last_login updates on every login).
                 try:
                     conn.execute("PRAGMA journal_mode=WAL")
                     conn.execute("PRAGMA busy_timeout=30000")
+                    conn.execute("PRAGMA synchronous=NORMAL")
+                    conn.execute("PRAGMA temp_store=MEMORY")
+                    conn.execute("PRAGMA mmap_size=268435456")
                 except sqlite3.Error:
                     # Pragmas may fail on some SQLite builds; ignore
                     pass
@@ -265,6 +341,126 @@ class DatabaseService:
             print(f"Error fetching data: {e}")
             return []
 
+    def iter_all(
+        self, sql: str, params: tuple = (), arraysize: int = 256
+    ) -> Iterator[Dict[str, Any]]:
+        """Yield rows from database lazily, fetching ``arraysize`` at a time
+
+        Args:
+            sql: SQL query
+            params: Query parameters
+            arraysize: Rows fetched per batch
+
+        Yields:
+            Dictionaries containing row data
+        """
+        # A private connection: the generator stays suspended between
+        # yields, and the shared thread-local one may be closed meanwhile
+        # by a DatabaseService for another file on the same thread
+        conn = None
+        try:
+            conn = sqlite3.connect(self.db_path, timeout=30.0, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+            cursor.arraysize = arraysize
+            cursor.execute(sql, params)
+            while rows := cursor.fetchmany():
+                for row in rows:
+                    yield dict(row)
+        except sqlite3.Error as e:
+            print(f"Error fetching data: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def executemany(self, sql: str, params_seq: List[tuple]) -> bool:
+        """Execute SQL statement for each parameter tuple in one transaction
+
+        Args:
+            sql: SQL statement to execute
+            params_seq: Sequence of parameter tuples
+
+        Returns:
+            True if successful, False otherwise
+        """
+        return self.executemany_rowcount(sql, params_seq) >= 0
+
+    def executemany_rowcount(self, sql: str, params_seq: List[tuple]) -> int:
+        """Like executemany, but report how many rows were changed
+
+        Args:
+            sql: SQL statement to execute
+            params_seq: Sequence of parameter tuples
+
+        Returns:
+            Number of rows inserted/updated/deleted, or -1 on error
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                # Explicit transaction: the connection runs in autocommit mode
+                cursor.execute("BEGIN")
+                try:
+                    cursor.executemany(sql, params_seq)
+                    conn.commit()
+                    return cursor.rowcount
+                except BaseException:
+                    # Never leave the thread-local connection mid-transaction,
+                    # whatever a parameter row raised
+                    conn.rollback()
+                    raise
+        except sqlite3.Error as e:
+            print(f"Error executing SQL: {e}")
+            print(f"SQL: {sql}")
+            return -1
+
+    def fetch_one_and_update(
+        self,
+        select_sql: str,
+        select_params: tuple,
+        update_sql: str,
+        build_update_params: Callable[[Dict[str, Any]], tuple],
+    ) -> Optional[Dict[str, Any]]:
+        """Read a row and write its update inside one IMMEDIATE transaction
+
+        The write lock is taken before the SELECT, so no other connection can
+        change the row between the read and the UPDATE.
+
+        Args:
+            select_sql: Query returning the row to update
+            select_params: Parameters for the query
+            update_sql: UPDATE statement to apply
+            build_update_params: Callable mapping the fetched row to the
+                UPDATE parameters
+
+        Returns:
+            Dictionary of the row as read before the update, or None if the
+            row was not found or the transaction failed
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("BEGIN IMMEDIATE")
+                try:
+                    cursor.execute(select_sql, select_params)
+                    row = cursor.fetchone()
+                    if row is None:
+                        conn.rollback()
+                        return None
+                    row = dict(row)
+                    cursor.execute(update_sql, build_update_params(row))
+                    conn.commit()
+                    return row
+                except BaseException:
+                    # Never leave the write lock held on the thread-local
+                    # connection, whatever build_update_params raised
+                    conn.rollback()
+                    raise
+        except sqlite3.Error as e:
+            print(f"Error executing SQL: {e}")
+            print(f"SQL: {update_sql}")
+            return None
+
     # ========== User Management ==========
 
     def create_user(
@@ -288,10 +484,10 @@ class DatabaseService:
                 cursor = conn.cursor()
                 cursor.execute(
                     """
-                    INSERT INTO users (id, username, pin_hash, preferences)
-                    VALUES (?, ?, ?, ?)
+                    INSERT INTO users (id, username, pin_hash, preferences, has_pin)
+                    VALUES (?, ?, ?, ?, ?)
                 """,
-                    (user_id, username, pin_hash, json.dumps({})),
+                    (user_id, username, pin_hash, json.dumps({}), int(pin_hash is not None)),
                 )
                 conn.commit()
 
@@ -343,8 +539,38 @@ class DatabaseService:
 
         return user
 
+    def user_exists(self, username: str) -> bool:
+        """Check whether a username exists without loading the row
+
+        Args:
+            username: Username to look for
+
+        Returns:
+            True if a user with that username exists
+        """
+        return self.fetch_one(
+            "SELECT 1 AS found FROM users WHERE username = ? LIMIT 1", (username,)
+        ) is not None
+
+    def user_has_pin(self, username: str) -> bool:
+        """Check whether a user has a PIN hash without loading the row
+
+        Args:
+            username: Username to look for
+
+        Returns:
+            True if the user exists and has a non-empty PIN hash
+        """
+        row = self.fetch_one(
+            "SELECT COALESCE(pin_hash, '') != '' AS has_pin FROM users WHERE username = ?",
+            (username,),
+        )
+        return bool(row and row["has_pin"])
+
     # Allowed columns for dynamic updates (security: prevent SQL injection via column names)
-    _ALLOWED_USER_COLUMNS = {"username", "pin_hash", "last_login", "total_xp", "preferences"}
+    _ALLOWED_USER_COLUMNS = {
+        "username", "pin_hash", "last_login", "total_xp", "preferences", "badges", "has_pin"
+    }
 
     def update_user(self, user_id: str, **kwargs) -> bool:
         """Update user fields
@@ -369,6 +595,8 @@ class DatabaseService:
         # Handle JSON serialization for preferences
         if "preferences" in kwargs and isinstance(kwargs["preferences"], dict):
             kwargs["preferences"] = json.dumps(kwargs["preferences"])
+        if "badges" in kwargs and isinstance(kwargs["badges"], list):
+            kwargs["badges"] = json.dumps(kwargs["badges"])
 
         # Build UPDATE query dynamically (column names validated above)
         set_clause = ", ".join([f"{key} = ?" for key in kwargs.keys()])
@@ -406,6 +634,37 @@ class DatabaseService:
 
         return users
 
+    def list_users_by_name(self) -> List[Dict[str, Any]]:
+        """Get the columns profile lists need, ordered by username
+
+        Sorted case-insensitively in SQL (served by idx_users_username_nocase)
+        and without the preferences blob.
+
+        Returns:
+            List of dictionaries with username, pin_hash, total_xp, has_pin
+        """
+        return self.fetch_all(
+            """
+            SELECT username, pin_hash, total_xp, has_pin FROM users
+            ORDER BY username COLLATE NOCASE
+            """
+        )
+
+    def list_usernames(self) -> List[str]:
+        """Get all usernames, ordered case-insensitively
+
+        Returns:
+            List of username strings
+        """
+        rows = self.fetch_all(
+            """
+            SELECT username FROM users
+            WHERE username IS NOT NULL AND username != ''
+            ORDER BY username COLLATE NOCASE
+            """
+        )
+        return [row["username"] for row in rows]
+
     def delete_user(self, user_id: str) -> bool:
         """Delete user and all associated data
 
@@ -870,6 +1129,31 @@ class DatabaseService:
             print(f"Error creating review item: {e}")
             return None
 
+    def create_review_items_bulk(
+        self, items: List[Tuple[str, str, str, str, str]]
+    ) -> List[str]:
+        """Create many review items in a single transaction
+
+        Args:
+            items: List of (item_id, user_id, curriculum_id, card_front, card_back)
+
+        Returns:
+            List of created item IDs (empty if the insert failed)
+        """
+        if not items:
+            return []
+
+        now = datetime.now().isoformat()
+        ok = self.executemany(
+            """
+            INSERT INTO review_items 
+            (id, user_id, curriculum_id, card_front, card_back, next_review)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """,
+            [(*item, now) for item in items],
+        )
+        return [item[0] for item in items] if ok else []
+
     def get_due_reviews(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
         """Get review items due for this user
 
@@ -890,6 +1174,30 @@ class DatabaseService:
             (user_id, datetime.now().isoformat(), limit),
         )
 
+    def count_due(self, user_id: str, now: Optional[str] = None) -> int:
+        """Count review items due for this user
+
+        Answered from the (user_id, next_review) index without touching rows.
+
+        Args:
+            user_id: User ID
+            now: ISO timestamp to compare against (defaults to current time)
+
+        Returns:
+            Number of due review items
+        """
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT COUNT(*) FROM review_items WHERE user_id = ? AND next_review <= ?",
+                    (user_id, now or datetime.now().isoformat()),
+                )
+                return cursor.fetchone()[0]
+        except sqlite3.Error as e:
+            print(f"Error counting due reviews: {e}")
+            return 0
+
     def update_review_item(self, item_id: str, quality: int) -> bool:
         """Update review item after review (SM-2 algorithm)
 
@@ -959,34 +1267,22 @@ class DatabaseService:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
 
-                # Total cards
-                cursor.execute(
-                    "SELECT COUNT(*) as count FROM review_items WHERE user_id = ?", (user_id,)
-                )
-                row = cursor.fetchone()
-                stats["total_cards"] = row["count"] if row else 0
-
-                # Due today
-                cursor.execute(
-                    """
-                    SELECT COUNT(*) as count FROM review_items 
-                    WHERE user_id = ? AND next_review <= ?
-                """,
-                    (user_id, datetime.now().isoformat()),
-                )
-                row = cursor.fetchone()
-                stats["due_today"] = row["count"] if row else 0
-
-                # Mastered (EF > 2.5 and interval > 21 days)
+                # Total, due today and mastered (EF > 2.5 and interval > 21 days)
+                # in a single pass over the user's rows
                 cursor.execute(
                     """
-                    SELECT COUNT(*) as count FROM review_items 
-                    WHERE user_id = ? AND easiness_factor > 2.5 AND interval > 21
+                    SELECT
+                        COUNT(*) AS total_cards,
+                        COALESCE(SUM(next_review <= ?), 0) AS due_today,
+                        COALESCE(SUM(easiness_factor > 2.5 AND interval > 21), 0) AS mastered
+                    FROM review_items
+                    WHERE user_id = ?
                 """,
-                    (user_id,),
+                    (datetime.now().isoformat(), user_id),
                 )
                 row = cursor.fetchone()
-                stats["mastered"] = row["count"] if row else 0
+                if row:
+                    stats.update(dict(row))
 
         except sqlite3.Error as e:
             print(f"Error getting review stats: {e}")
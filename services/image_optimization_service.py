@@ -198,9 +198,9 @@ def optimize_curriculum_images(
             continue
 
         # Optimize selected_image_b64
-        if unit.get("selected_image_b64"):
-            original_size = len(unit["selected_image_b64"])
-            optimized = optimize_image(unit["selected_image_b64"], preset=preset)
+        if selected := unit.get("selected_image_b64"):
+            original_size = len(selected)
+            optimized = optimize_image(selected, preset=preset)
             if optimized:
                 unit["selected_image_b64"] = optimized
                 new_size = len(optimized)
@@ -208,11 +208,12 @@ def optimize_curriculum_images(
                 images_optimized += 1
 
         # Optimize images list
-        if unit.get("images") and isinstance(unit["images"], list):
-            for img_dict in unit["images"]:
-                if isinstance(img_dict, dict) and img_dict.get("b64"):
-                    original_size = len(img_dict["b64"])
-                    optimized = optimize_image(img_dict["b64"], preset=preset)
+        images = unit.get("images")
+        if images and isinstance(images, list):
+            for img_dict in images:
+                if isinstance(img_dict, dict) and (b64 := img_dict.get("b64")):
+                    original_size = len(b64)
+                    optimized = optimize_image(b64, preset=preset)
                     if optimized:
                         img_dict["b64"] = optimized
                         new_size = len(optimized)
@@ -220,10 +221,11 @@ def optimize_curriculum_images(
                         images_optimized += 1
 
         # Handle legacy field names
-        for field in ["image_base64", "image"]:
-            if unit.get(field) and isinstance(unit[field], str) and len(unit[field]) > 1000:
-                original_size = len(unit[field])
-                optimized = optimize_image(unit[field], preset=preset)
+        for field in ("image_base64", "image"):
+            value = unit.get(field)
+            if isinstance(value, str) and len(value) > 1000:
+                original_size = len(value)
+                optimized = optimize_image(value, preset=preset)
                 if optimized:
                     unit[field] = optimized
                     new_size = len(optimized)
@@ -5,6 +5,7 @@ Implements exponential backoff and intelligent retry mechanisms for API calls
 
 import time
 import random
+import threading
 import traceback
 from typing import Callable, Any, Optional, Dict, List
 from functools import wraps
@@ -13,21 +14,53 @@ from enum import Enum
 from openai import APIError, RateLimitError, APIConnectionError, AuthenticationError, BadRequestError
 
 
+# Process-wide retry schedule shared by every RetryHandler so that concurrent
+# sessions backing off from the same upstream error do not fire together.
+_GLOBAL_BUCKET = threading.Lock()
+_NEXT_ALLOWED: float = 0.0
+_GLOBAL_SPACING_JITTER = 0.25
+
+
+def _reserve_retry_slot(delay: float) -> float:
+    """Reserve the next process-wide retry slot
+
+    Args:
+        delay: Delay requested by the caller's backoff policy
+
+    Returns:
+        Seconds to sleep; at least ``delay`` and never earlier than the
+        slot handed out to the previous retry plus a small random spacing
+    """
+    global _NEXT_ALLOWED
+    with _GLOBAL_BUCKET:
+        now = time.monotonic()
+        actual = max(delay, _NEXT_ALLOWED - now)
+        _NEXT_ALLOWED = now + actual + random.uniform(0, _GLOBAL_SPACING_JITTER)
+    return actual
+
+
 class RetryError(Exception):
     """Custom exception for retry-related errors"""
 
     def __init__(self, message: str, errors: Optional[List[Exception]] = None):
         super().__init__(message)
         self.errors = errors or []
+        self._formatted: Optional[str] = None
 
     def __str__(self) -> str:
+        # The retry loop is finished by the time this is raised, so the error
+        # list is fixed and the formatted text can be cached for log handlers.
+        if self._formatted is not None:
+            return self._formatted
         base = super().__str__()
         if not self.errors:
+            self._formatted = base
             return base
         error_details = "\n".join(
             f"  Attempt {i + 1}: {e}" for i, e in enumerate(self.errors)
         )
-        return f"{base}\nPrevious errors:\n{error_details}"
+        self._formatted = f"{base}\nPrevious errors:\n{error_details}"
+        return self._formatted
 
 
 class ErrorType(Enum):
@@ -114,6 +147,10 @@ class ErrorClassifier:
         # Fallback to string matching for non-OpenAI exceptions or older code
         error_msg = str(error).lower()
 
+        # Shorter than every fallback keyword ('429', 'dns', ...): nothing can match
+        if len(error_msg) < 3:
+            return ErrorType.UNKNOWN
+
         # Rate limiting errors (fallback)
         if any(term in error_msg for term in ['rate limit', 'too many requests', '429']):
             return ErrorType.RATE_LIMIT
@@ -283,8 +320,8 @@ class RetryHandler:
                 if error_type in [ErrorType.RATE_LIMIT, ErrorType.NETWORK]:
                     config = error_config
                 
-                # Calculate delay and sleep
-                delay = self.calculate_delay(attempt, config)
+                # Calculate delay, then coordinate with other in-flight retries
+                delay = _reserve_retry_slot(self.calculate_delay(attempt, config))
                 
                 if self.logger:
                     self.logger.log_debug(f"Waiting {delay:.2f}s before retry {attempt + 1} for {context}")
@@ -296,10 +333,11 @@ class RetryHandler:
         if last_error:
             error_msg += f". Last error: {last_error}"
         
+        retry_error = RetryError(error_msg, errors=errors)
         if self.logger:
-            self.logger.log_error(error=RetryError(error_msg, errors=errors), context=context)
+            self.logger.log_error(error=retry_error, context=context)
         
-        raise RetryError(error_msg, errors=errors) from last_error
+        raise retry_error from last_error
 
 
 def with_retry(config: Optional[RetryConfig] = None, context: str = "operation"):
@@ -7,6 +7,7 @@ import os
 import json
 import uuid
 import base64
+import itertools
 import tempfile
 from pathlib import Path
 import threading
@@ -102,6 +103,12 @@ class SessionManager:
         """Initialize session manager"""
         self.temp_files: Set[str] = set()
 
+        # Filename parts for generated saves are fixed per session; each save
+        # only draws the next sequence number.
+        self._session_id = uuid.uuid4().hex[:12]
+        self._session_started = datetime.now().strftime("%Y%m%d_%H%M%S")
+        self._save_counter = itertools.count(1)
+
         # Best-effort cleanup of orphaned temp files from prior runs.
         cleanup_stale_temp_files(max_age_hours=24)
         
@@ -144,13 +151,17 @@ class SessionManager:
 
             img_bytes = base64.b64decode(b64_data)
             
-            # Use tempfile for secure temporary file creation
-            with tempfile.NamedTemporaryFile(
-                delete=False, prefix=_TEMP_FILE_PREFIX, suffix=suffix, mode='wb'
-            ) as tf:
-                tf.write(img_bytes)
-                temp_path = tf.name
-                
+            # Use tempfile for secure temporary file creation. Write through the raw
+            # fd so large images skip the BufferedWriter copy loop.
+            fd, temp_path = tempfile.mkstemp(prefix=_TEMP_FILE_PREFIX, suffix=suffix)
+            try:
+                view = memoryview(img_bytes)
+                while view:
+                    written = os.write(fd, view)
+                    view = view[written:]
+            finally:
+                os.close(fd)
+
             self.add_temp_file(temp_path)
             return temp_path
             
@@ -185,9 +196,9 @@ class SessionManager:
         try:
             # Generate filename if not provided
             if not filename:
-                curr_id = curriculum.get("meta", {}).get("id", uuid.uuid4().hex)
-                timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-                filename = f"curriculum_{curr_id}_{timestamp}.json"
+                curr_id = curriculum.get("meta", {}).get("id") or self._session_id
+                seq = next(self._save_counter)
+                filename = f"curriculum_{curr_id}_{self._session_started}_{seq:04d}.json"
                 
             save_path = Path("curricula") / Path(filename).name
             
@@ -379,6 +390,10 @@ class InputValidator:
         if len(sanitized) > 2000:
             sanitized = sanitized[:2000] + "..."
             
+        # Plain-text prompts (the common case) have nothing for the regexes to strip
+        if '<' not in sanitized:
+            return sanitized
+
         # Remove script tags and other HTML
         import re
         sanitized = re.sub(r'<script.*?</script>', '', sanitized, flags=re.IGNORECASE | re.DOTALL)
@@ -3,41 +3,146 @@ Spaced Repetition System (SRS) Service
 Implements the SM-2 algorithm for intelligent flashcard review scheduling.
 """
 
-import uuid
-from datetime import datetime, timedelta
-from typing import Dict, Any, List, Optional
+import re
+import json
+import time
+import logging
+import threading
+from os import urandom
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Tuple
 
 # Conditional logger import
 try:
     from src.verbose_logger import get_logger
     _logger = get_logger()
+    _base_logger = getattr(_logger, "logger", _logger)
+    # Level check on the underlying logging.Logger, so disabled INFO
+    # messages are dropped before any %-formatting happens
+    _info_enabled = getattr(_base_logger, "isEnabledFor", lambda level: True)
 
-    def log_info(msg: str) -> None:
-        if _logger is None:
-            print(msg)
-        elif hasattr(_logger, "log_info"):
-            _logger.log_info(msg)
-        else:
-            # Fallback to underlying logger if exposed
-            getattr(_logger, "logger", _logger).info(msg)
+    # Resolve the logging callables once instead of probing on every call
+    if _logger is None:
+        _emit_info = print
 
-    def log_error(msg: str) -> None:
-        if _logger is None:
+        def log_error(msg: str) -> None:
             print(f"ERROR: {msg}")
-        elif hasattr(_logger, "log_error"):
-            _logger.log_error(msg)
-        else:
-            getattr(_logger, "logger", _logger).error(msg)
+    else:
+        # Fallback to underlying logger if the wrapper methods are missing
+        _emit_info = getattr(_logger, "log_info", None) or _base_logger.info
+        log_error = getattr(_logger, "log_error", None) or _base_logger.error
+
+    def log_info(msg: str, *args) -> None:
+        if _info_enabled(logging.INFO):
+            _emit_info(msg % args if args else msg)
 
 except ImportError:
 
-    def log_info(msg: str) -> None:
-        print(msg)
+    def log_info(msg: str, *args) -> None:
+        print(msg % args if args else msg)
 
     def log_error(msg: str) -> None:
         print(f"ERROR: {msg}")
 
 
+# SQLite's default SQLITE_MAX_VARIABLE_NUMBER on older builds
+_SQLITE_MAX_VARIABLES = 999
+
+# Quality is an integer 0-5, so the SM-2 easiness delta only has six values:
+# EF' = EF + (0.1 - (5-q) * (0.08 + (5-q) * 0.02))
+_EF_DELTA = tuple(0.1 - (5 - q) * (0.08 + (5 - q) * 0.02) for q in range(6))
+
+# Fixed intervals (days) for the first and second successful repetitions
+_INTERVAL_FIRST_TWO = (1, 6)
+
+
+# Seconds a user's review stats stay cached between dashboard renders
+STATS_CACHE_TTL = 30
+
+
+class _TTLCache:
+    """Minimal in-process cache exposing the Redis get/setex/delete subset."""
+
+    def __init__(self):
+        self._data: Dict[str, Tuple[float, str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def setex(self, key: str, ttl: int, value: str) -> None:
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+
+# Process-wide default; SRSService is constructed per page render
+_stats_cache = _TTLCache()
+
+
+_SECONDS_PER_DAY = 86400
+
+# Card ids are always 32 lowercase hex chars (urandom(16).hex() / uuid4().hex)
+_HEX32 = re.compile(r"[0-9a-f]{32}")
+
+
+def _next_review_iso(now_ts: float, interval: int) -> str:
+    """Format the next review time ``interval`` days after ``now_ts``.
+
+    Keeps the ISO-8601 text format stored in ``review_items.next_review``.
+    """
+    return datetime.fromtimestamp(now_ts + interval * _SECONDS_PER_DAY).isoformat()
+
+
+def _valid_quality(quality: Any) -> bool:
+    """True for a numeric quality rating within 0-5."""
+    return isinstance(quality, (int, float)) and 0 <= quality <= 5
+
+
+def _sm2_step(ef: float, interval: int, reps: int, quality: int) -> Tuple[float, int, int]:
+    """Apply one SM-2 review to a card's scheduling parameters.
+
+    Args:
+        ef: Current easiness factor
+        interval: Current interval in days
+        reps: Current successful repetition count
+        quality: Quality rating (0-5)
+
+    Returns:
+        Tuple of (new_ef, new_interval, new_reps)
+    """
+    # Step 1: Calculate new repetition count and interval
+    if quality < 3:
+        # Failed recall - reset progress
+        reps = 0
+        interval = 1
+    else:
+        # Successful recall - advance progress
+        reps += 1
+        interval = _INTERVAL_FIRST_TWO[reps - 1] if reps <= 2 else round(interval * ef)
+
+    # Step 2: Update easiness factor (table lookup for the usual integer
+    # ratings; other numeric ratings use the formula directly)
+    if type(quality) is int:
+        delta = _EF_DELTA[quality]
+    else:
+        delta = 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
+    new_ef = max(1.3, ef + delta)
+
+    return new_ef, interval, reps
+
+
 class SRSService:
     """Manages spaced repetition flashcards using the SM-2 algorithm.
     
@@ -53,15 +158,40 @@ class SRSService:
         5 - Perfect response, immediate recall
     """
     
-    def __init__(self, db):
+    __slots__ = ('db', '_cache')
+    
+    def __init__(self, db, cache=None):
         """Initialize SRS service with database connection.
         
         Args:
             db: DatabaseService instance for data persistence
+            cache: Optional Redis-compatible client (get/setex/delete) for
+                   review stats; defaults to a process-wide in-memory cache
         """
         self.db = db
+        self._cache = cache if cache is not None else _stats_cache
         log_info("SRSService initialized with SM-2 algorithm")
         
+    def _stats_key(self, user_id: str) -> str:
+        """Cache key for a user's review stats, scoped to the database file"""
+        return f"srs:stats:{getattr(self.db, 'db_path', '')}:{user_id}"
+        
+    def _get_review_stats(self, user_id: str) -> Dict[str, Any]:
+        """Get database review stats, served from cache when fresh"""
+        key = self._stats_key(user_id)
+        cached = self._cache.get(key)
+        if cached is not None:
+            return json.loads(cached)
+            
+        db_stats = self.db.get_review_stats(user_id=user_id)
+        self._cache.setex(key, STATS_CACHE_TTL, json.dumps(db_stats))
+        return db_stats
+        
+    def _invalidate_stats(self, user_id: Optional[str]) -> None:
+        """Drop cached review stats after a user's cards change"""
+        if user_id:
+            self._cache.delete(self._stats_key(user_id))
+        
     def create_card(
         self,
         user_id: str,
@@ -81,7 +211,8 @@ class SRSService:
             Card ID if successful, None otherwise
         """
         try:
-            card_id = uuid.uuid4().hex
+            # Opaque 32-char hex key; same shape as uuid4().hex without the UUID object
+            card_id = urandom(16).hex()
             
             # Create review item with default SM-2 parameters
             item_id = self.db.create_review_item(
@@ -93,7 +224,8 @@ class SRSService:
             )
             
             if item_id:
-                log_info(f"Created flashcard {item_id} for user {user_id}")
+                self._invalidate_stats(user_id)
+                log_info("Created flashcard %s for user %s", item_id, user_id)
                 return item_id
             else:
                 log_error(f"Failed to create flashcard for user {user_id}")
@@ -103,6 +235,35 @@ class SRSService:
             log_error(f"Error creating flashcard: {e}")
             return None
             
+    def create_cards_bulk(self, rows: List[Tuple[str, str, str, str]]) -> List[str]:
+        """Create many flashcards with one batched insert.
+        
+        Args:
+            rows: List of (user_id, curriculum_id, front, back) tuples
+            
+        Returns:
+            List of created card IDs in input order (empty on failure)
+        """
+        if not rows:
+            return []
+            
+        try:
+            items = [(urandom(16).hex(), *row) for row in rows]
+            card_ids = self.db.create_review_items_bulk(items)
+            
+            if not card_ids:
+                log_error(f"Failed to create {len(rows)} flashcards")
+                return []
+                
+            for user_id in {row[0] for row in rows}:
+                self._invalidate_stats(user_id)
+            log_info("Created %d flashcards", len(card_ids))
+            return card_ids
+            
+        except Exception as e:
+            log_error(f"Error creating flashcards: {e}")
+            return []
+            
     def create_cards_from_content(
         self,
         user_id: str,
@@ -121,11 +282,12 @@ class SRSService:
         Returns:
             List of created flashcard dictionaries (empty in Phase 1.1)
         """
-        log_info(f"create_cards_from_content stub called for user {user_id}")
+        log_info("create_cards_from_content stub called for user %s", user_id)
         log_info("AI flashcard generation will be implemented in Phase 1.2")
         
         # Placeholder for Phase 1.2
-        # Will use AI to extract key concepts and generate Q&A pairs
+        # Will use AI to extract key concepts and generate Q&A pairs,
+        # then persist them in one batch via create_cards_bulk
         return []
         
     def get_due_cards(self, user_id: str, limit: int = 20) -> List[Dict[str, Any]]:
@@ -141,14 +303,10 @@ class SRSService:
         Returns:
             List of flashcard dictionaries due for review
         """
-        try:
-            due_cards = self.db.get_due_reviews(user_id=user_id, limit=limit)
-            log_info(f"Retrieved {len(due_cards)} due cards for user {user_id}")
-            return due_cards
-            
-        except Exception as e:
-            log_error(f"Error getting due cards for user {user_id}: {e}")
-            return []
+        # DatabaseService.fetch_all already reports sqlite errors and returns []
+        due_cards = self.db.get_due_reviews(user_id=user_id, limit=limit)
+        log_info("Retrieved %d due cards for user %s", len(due_cards), user_id)
+        return due_cards
             
     def get_due_count(self, user_id: str) -> int:
         """Get the count of cards due for review.
@@ -160,11 +318,14 @@ class SRSService:
             Number of cards currently due for review
         """
         try:
-            # Get stats which includes due_today count
-            stats = self.db.get_review_stats(user_id=user_id)
-            due_count = stats.get('due_today', 0)
+            # Reuse fresh cached stats; otherwise a single indexed COUNT(*)
+            cached = self._cache.get(self._stats_key(user_id))
+            if cached is not None:
+                due_count = json.loads(cached).get('due_today', 0)
+            else:
+                due_count = self.db.count_due(user_id)
             
-            log_info(f"User {user_id} has {due_count} cards due")
+            log_info("User %s has %d cards due", user_id, due_count)
             return due_count
             
         except Exception as e:
@@ -208,62 +369,138 @@ class SRSService:
             True if review processed successfully, False otherwise
         """
         # Validate quality rating
-        if not 0 <= quality <= 5:
+        if not _valid_quality(quality):
             log_error(f"Invalid quality rating {quality} for card {card_id}. Must be 0-5.")
             return False
             
+        # Reject malformed ids before any SQL round-trip
+        if not isinstance(card_id, str) or not _HEX32.fullmatch(card_id):
+            log_error(f"Invalid card id {card_id!r}")
+            return False
+            
         try:
-            # Get current card data
-            card = self.db.fetch_one(
-                "SELECT * FROM review_items WHERE id = ?",
-                (card_id,)
+            updated: Dict[str, Any] = {}
+
+            def _apply_sm2(card: Dict[str, Any]) -> tuple:
+                # SM-2 Algorithm Implementation
+                new_ef, interval, reps = _sm2_step(
+                    card['easiness_factor'], card['interval'], card['repetitions'], quality
+                )
+                next_review = _next_review_iso(time.time(), interval)
+                updated.update(ef=new_ef, interval=interval, reps=reps, next_review=next_review)
+                return (new_ef, interval, reps, next_review, card_id)
+
+            # Read current SM-2 parameters and write the new ones in one transaction
+            card = self.db.fetch_one_and_update(
+                """
+                SELECT user_id, easiness_factor, interval, repetitions
+                FROM review_items WHERE id = ?
+                """,
+                (card_id,),
+                """
+                UPDATE review_items
+                SET easiness_factor = ?, 
+                    interval = ?, 
+                    repetitions = ?, 
+                    next_review = ?
+                WHERE id = ?
+                """,
+                _apply_sm2
             )
             
-            if not card:
-                log_error(f"Card {card_id} not found")
+            if not card or not updated:
+                log_error(f"Card {card_id} not found or could not be updated")
                 return False
                 
-            # Extract current SM-2 parameters
-            ef = card['easiness_factor']  # Default: 2.5
-            interval = card['interval']    # Default: 1
-            reps = card['repetitions']     # Default: 0
-            
-            log_info(f"Reviewing card {card_id}: quality={quality}, "
-                    f"EF={ef:.2f}, interval={interval}, reps={reps}")
-            
-            # SM-2 Algorithm Implementation
+            self._invalidate_stats(card['user_id'])
+            ef = card['easiness_factor']
+            log_info("Reviewing card %s: quality=%d, EF=%.2f, interval=%d, reps=%d",
+                     card_id, quality, ef, card['interval'], card['repetitions'])
             
-            # Step 1: Calculate new repetition count and interval
             if quality < 3:
-                # Failed recall - reset progress
-                reps = 0
-                interval = 1
-                log_info(f"Card {card_id} failed (quality < 3). Reset to day 1.")
+                log_info("Card %s failed (quality < 3). Reset to day 1.", card_id)
             else:
-                # Successful recall - advance progress
-                reps += 1
-                
-                if reps == 1:
-                    interval = 1
-                elif reps == 2:
-                    interval = 6
-                else:
-                    interval = round(interval * ef)
-                    
-                log_info(f"Card {card_id} passed. New interval: {interval} days")
+                log_info("Card %s passed. New interval: %d days", card_id, updated['interval'])
+
+            log_info("Card %s EF updated: %.2f -> %.2f", card_id, ef, updated['ef'])
+            log_info("Card %s review processed successfully. Next review: %s",
+                     card_id, updated['next_review'][:10])
+            return True
             
-            # Step 2: Update easiness factor
-            # Formula: EF' = EF + (0.1 - (5-q) * (0.08 + (5-q) * 0.02))
-            ef_delta = 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02)
-            new_ef = max(1.3, ef + ef_delta)
+        except Exception as e:
+            log_error(f"Error processing review for card {card_id}: {e}")
+            return False
             
-            log_info(f"Card {card_id} EF updated: {ef:.2f} -> {new_ef:.2f}")
+    def review_cards_bulk(self, reviews: List[Tuple[str, int]]) -> int:
+        """Process many card reviews with one fetch and one batched update.
+        
+        Applies the same SM-2 step as review_card, but loads all cards with
+        chunked ``WHERE id IN (...)`` queries and writes every update in a
+        single executemany transaction.
+        
+        Args:
+            reviews: List of (card_id, quality) tuples; reviews with an
+                     invalid quality or unknown card are skipped
             
-            # Step 3: Calculate next review date
-            next_review = datetime.now() + timedelta(days=interval)
+        Returns:
+            Number of cards updated (0 if the batch write failed)
+        """
+        valid = []
+        for card_id, quality in reviews:
+            if not _valid_quality(quality):
+                log_error(f"Invalid quality rating {quality} for card {card_id}. Must be 0-5.")
+                continue
+            if not isinstance(card_id, str) or not _HEX32.fullmatch(card_id):
+                log_error(f"Invalid card id {card_id!r}")
+                continue
+            valid.append((card_id, quality))
+            
+        if not valid:
+            return 0
             
-            # Step 4: Update card in database
-            success = self.db.execute(
+        try:
+            # Fetch current SM-2 parameters for all cards
+            card_ids = list(dict.fromkeys(card_id for card_id, _ in valid))
+            cards: Dict[str, Dict[str, Any]] = {}
+            for start in range(0, len(card_ids), _SQLITE_MAX_VARIABLES):
+                chunk = card_ids[start:start + _SQLITE_MAX_VARIABLES]
+                placeholders = ",".join("?" * len(chunk))
+                rows = self.db.fetch_all(
+                    f"SELECT id, user_id, easiness_factor, interval, repetitions "
+                    f"FROM review_items WHERE id IN ({placeholders})",
+                    tuple(chunk)
+                )
+                for row in rows:
+                    cards[row['id']] = row
+                    
+            # Run SM-2 in order so repeated reviews of one card chain correctly
+            # Intervals repeat heavily (1, 6, ...), so format each distinct one once
+            now_ts = time.time()
+            next_review_by_interval: Dict[int, str] = {}
+            updates: Dict[str, tuple] = {}
+            for card_id, quality in valid:
+                card = cards.get(card_id)
+                if card is None:
+                    log_error(f"Card {card_id} not found")
+                    continue
+                    
+                new_ef, interval, reps = _sm2_step(
+                    card['easiness_factor'], card['interval'], card['repetitions'], quality
+                )
+                card['easiness_factor'] = new_ef
+                card['interval'] = interval
+                card['repetitions'] = reps
+                
+                next_review = next_review_by_interval.get(interval)
+                if next_review is None:
+                    next_review = _next_review_iso(now_ts, interval)
+                    next_review_by_interval[interval] = next_review
+                updates[card_id] = (new_ef, interval, reps, next_review, card_id)
+                
+            if not updates:
+                return 0
+                
+            success = self.db.executemany(
                 """
                 UPDATE review_items
                 SET easiness_factor = ?, 
@@ -272,20 +509,22 @@ class SRSService:
                     next_review = ?
                 WHERE id = ?
                 """,
-                (new_ef, interval, reps, next_review.isoformat(), card_id)
+                list(updates.values())
             )
             
-            if success:
-                log_info(f"Card {card_id} review processed successfully. "
-                        f"Next review: {next_review.strftime('%Y-%m-%d')}")
-            else:
-                log_error(f"Failed to update card {card_id} in database")
+            if not success:
+                log_error(f"Failed to update {len(updates)} cards in database")
+                return 0
                 
-            return success
+            for user_id in {cards[card_id]['user_id'] for card_id in updates}:
+                self._invalidate_stats(user_id)
+                
+            log_info("Processed %d reviews across %d cards", len(valid), len(updates))
+            return len(updates)
             
         except Exception as e:
-            log_error(f"Error processing review for card {card_id}: {e}")
-            return False
+            log_error(f"Error processing bulk review: {e}")
+            return 0
             
     def get_user_stats(self, user_id: str) -> Dict[str, Any]:
         """Get comprehensive SRS statistics for a user.
@@ -301,8 +540,8 @@ class SRSService:
                 - retention_rate: Percentage of successful reviews (stub - Phase 1.2)
         """
         try:
-            # Get base stats from database
-            db_stats = self.db.get_review_stats(user_id=user_id)
+            # Get base stats from database (cached briefly per user)
+            db_stats = self._get_review_stats(user_id)
             
             # Compile comprehensive stats
             stats = {
@@ -315,8 +554,8 @@ class SRSService:
                 'retention_rate': 0.0    # Will calculate from review history
             }
             
-            log_info(f"Retrieved stats for user {user_id}: "
-                    f"{stats['total_cards']} cards, {stats['due_today']} due")
+            log_info("Retrieved stats for user %s: %d cards, %d due",
+                     user_id, stats['total_cards'], stats['due_today'])
             
             return stats
             
@@ -339,22 +578,18 @@ class SRSService:
         Returns:
             Card dictionary or None if not found
         """
-        try:
-            card = self.db.fetch_one(
-                "SELECT * FROM review_items WHERE id = ?",
-                (card_id,)
-            )
+        # DatabaseService.fetch_one already reports sqlite errors and returns None
+        card = self.db.fetch_one(
+            "SELECT * FROM review_items WHERE id = ?",
+            (card_id,)
+        )
+        
+        if card:
+            log_info("Retrieved card %s", card_id)
+        else:
+            log_info("Card %s not found", card_id)
             
-            if card:
-                log_info(f"Retrieved card {card_id}")
-            else:
-                log_info(f"Card {card_id} not found")
-                
-            return card
-            
-        except Exception as e:
-            log_error(f"Error getting card {card_id}: {e}")
-            return None
+        return card
             
     def delete_card(self, card_id: str) -> bool:
         """Delete a flashcard.
@@ -366,13 +601,18 @@ class SRSService:
             True if successful, False otherwise
         """
         try:
+            owner = self.db.fetch_one(
+                "SELECT user_id FROM review_items WHERE id = ?",
+                (card_id,)
+            )
             success = self.db.execute(
                 "DELETE FROM review_items WHERE id = ?",
                 (card_id,)
             )
             
             if success:
-                log_info(f"Deleted card {card_id}")
+                self._invalidate_stats(owner['user_id'] if owner else None)
+                log_info("Deleted card %s", card_id)
             else:
                 log_error(f"Failed to delete card {card_id}")
                 
@@ -382,6 +622,33 @@ class SRSService:
             log_error(f"Error deleting card {card_id}: {e}")
             return False
             
+    @staticmethod
+    def _user_cards_query(
+        user_id: str,
+        curriculum_id: Optional[str],
+        limit: Optional[int]
+    ) -> Tuple[str, tuple]:
+        """Build the card listing query and its parameters"""
+        # Constant SQL text with a bound LIMIT keeps sqlite3's statement
+        # cache hot; LIMIT -1 means no limit in SQLite
+        row_limit = limit if limit else -1
+        if curriculum_id:
+            sql = """
+                SELECT * FROM review_items 
+                WHERE user_id = ? AND curriculum_id = ?
+                ORDER BY created_at DESC
+                LIMIT ?
+            """
+            return sql, (user_id, curriculum_id, row_limit)
+            
+        sql = """
+            SELECT * FROM review_items 
+            WHERE user_id = ?
+            ORDER BY created_at DESC
+            LIMIT ?
+        """
+        return sql, (user_id, row_limit)
+        
     def get_user_cards(
         self,
         user_id: str,
@@ -399,31 +666,36 @@ class SRSService:
             List of card dictionaries
         """
         try:
-            if curriculum_id:
-                sql = """
-                    SELECT * FROM review_items 
-                    WHERE user_id = ? AND curriculum_id = ?
-                    ORDER BY created_at DESC
-                """
-                params = (user_id, curriculum_id)
-            else:
-                sql = """
-                    SELECT * FROM review_items 
-                    WHERE user_id = ?
-                    ORDER BY created_at DESC
-                """
-                params = (user_id,)
-                
-            if limit:
-                sql += f" LIMIT {limit}"
-                
+            sql, params = self._user_cards_query(user_id, curriculum_id, limit)
             cards = self.db.fetch_all(sql, params)
             
-            log_info(f"Retrieved {len(cards)} cards for user {user_id}" +
-                    (f" (curriculum: {curriculum_id})" if curriculum_id else ""))
+            log_info("Retrieved %d cards for user %s%s", len(cards), user_id,
+                     f" (curriculum: {curriculum_id})" if curriculum_id else "")
             
             return cards
             
         except Exception as e:
             log_error(f"Error getting cards for user {user_id}: {e}")
             return []
+            
+    def iter_user_cards(
+        self,
+        user_id: str,
+        curriculum_id: Optional[str] = None,
+        limit: Optional[int] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """Lazily yield a user's cards, optionally filtered by curriculum.
+        
+        Same ordering and filters as get_user_cards, but rows are fetched in
+        batches so large decks never have to be held in memory at once.
+        
+        Args:
+            user_id: ID of the user
+            curriculum_id: Optional curriculum ID to filter by
+            limit: Optional maximum number of cards to yield
+            
+        Yields:
+            Card dictionaries
+        """
+        sql, params = self._user_cards_query(user_id, curriculum_id, limit)
+        yield from self.db.iter_all(sql, params)
@@ -4,11 +4,19 @@ Provides persistent storage for curricula and generation logs.
 """
 
 import os
+import gzip
 import json
+import base64
+import hashlib
+import time
 import uuid
+import threading
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
-from typing import Dict, Any, Optional, List, Union
+from typing import Dict, Any, Deque, Optional, List, Tuple, Union
 from functools import lru_cache
+from itertools import islice
 
 # Import supabase client
 try:
@@ -18,9 +26,35 @@ except ImportError:
     SUPABASE_AVAILABLE = False
     Client = None
 
+# Optional fast JSON encoder for payload size estimation
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+# Clients are pooled per (url, key) so every service instance, and the
+# GenerationLogger holding one, shares a single HTTP session
+_client_lock = threading.Lock()
+
+
+@lru_cache(maxsize=4)
+def _pooled_client(url: str, key: str) -> Client:
+    """Create the client for a URL/key pair; raises rather than caching failures."""
+    return create_client(url, key)
+
+
+def get_supabase_client(url: Optional[str] = None, key: Optional[str] = None) -> Optional[Client]:
+    """Get the shared Supabase client for a URL/key pair.
+
+    Clients are created once per process per URL/key pair and shared.
+    Credentials default to SUPABASE_URL / SUPABASE_KEY; failures are not
+    cached so configuration added later is picked up.
 
-def get_supabase_client() -> Optional[Client]:
-    """Get or create a Supabase client singleton.
+    Args:
+        url: Supabase project URL (defaults to SUPABASE_URL).
+        key: Supabase API key (defaults to SUPABASE_KEY).
 
     Returns:
         Supabase client or None if not configured.
@@ -29,18 +63,112 @@ def get_supabase_client() -> Optional[Client]:
         print("Warning: supabase package not installed. Run: pip install supabase")
         return None
 
-    url = os.getenv("SUPABASE_URL")
-    key = os.getenv("SUPABASE_KEY")
+    url = url or os.getenv("SUPABASE_URL")
+    key = key or os.getenv("SUPABASE_KEY")
 
     if not url or not key:
         print("Warning: SUPABASE_URL and SUPABASE_KEY environment variables not set")
         return None
 
-    try:
-        return create_client(url, key)
-    except Exception as e:
-        print(f"Error creating Supabase client: {e}")
-        return None
+    with _client_lock:
+        try:
+            return _pooled_client(url, key)
+        except Exception as e:
+            print(f"Error creating Supabase client: {e}")
+            return None
+
+
+# Server-side aggregate used by get_stats. Create it once in the Supabase SQL
+# editor; until it exists get_stats falls back to per-status count queries.
+CURRICULA_STATS_SQL = """
+create or replace function curricula_stats()
+returns json language sql stable as $$
+    select json_build_object(
+        'total', count(*),
+        'complete', count(*) filter (where status = 'complete'),
+        'generating', count(*) filter (where status = 'generating')
+    )
+    from curricula;
+$$;
+"""
+
+# Image field names to check (different curriculum versions use different names)
+_IMAGE_FIELDS = frozenset({
+    "image_base64",
+    "selected_image_b64",
+    "image",
+    "image_data",
+    "thumbnail_b64",
+})
+
+
+# Compressed storage for large curricula. Add the column once in the Supabase
+# SQL editor; until it exists saves fall back to optimizing/stripping images.
+CURRICULA_CONTENT_GZ_SQL = """
+alter table curricula add column if not exists content_gz text;
+"""
+
+# Child table for curricula too large for one row even when compressed.
+# Create it once in the Supabase SQL editor; until it exists such curricula
+# have their images optimized or stripped instead.
+CURRICULUM_UNITS_SQL = """
+create table if not exists curriculum_units (
+    curriculum_id uuid not null references curricula(id) on delete cascade,
+    idx int not null,
+    unit jsonb not null,
+    primary key (curriculum_id, idx)
+);
+"""
+
+# Payload thresholds for curriculum content
+_COMPRESS_THRESHOLD = 1_000_000  # Larger content is compressed or optimized
+_MAX_STORED_SIZE = 5_000_000  # Largest compressed payload stored as-is
+
+
+def _dumps_bytes(obj: Any, sort_keys: bool = False) -> bytes:
+    """Serialize to compact JSON bytes, with orjson when available."""
+    if ORJSON_AVAILABLE:
+        option = orjson.OPT_NON_STR_KEYS | (orjson.OPT_SORT_KEYS if sort_keys else 0)
+        try:
+            return orjson.dumps(obj, option=option)
+        except TypeError:
+            pass
+    return json.dumps(obj, separators=(",", ":"), sort_keys=sort_keys).encode("utf-8")
+
+
+def _gzip_content(content: Dict[str, Any]) -> str:
+    """Compress curriculum content to a base64 string for the content_gz column."""
+    return base64.b64encode(gzip.compress(_dumps_bytes(content), compresslevel=3)).decode("ascii")
+
+
+def _gunzip_content(packed: str) -> Dict[str, Any]:
+    """Inverse of _gzip_content."""
+    return json.loads(gzip.decompress(base64.b64decode(packed)))
+
+
+def _unit_chars(units: List[Any]) -> int:
+    """Total length of the top-level strings in each unit.
+
+    Cheap size estimate for batching unit rows: content and images are
+    top-level unit strings and dominate a unit's payload.
+    """
+    return sum(
+        len(val)
+        for unit in units if isinstance(unit, dict)
+        for val in unit.values() if isinstance(val, str)
+    )
+
+
+class _SizeCounter:
+    """Write-only sink that counts characters instead of storing them."""
+
+    __slots__ = ("n",)
+
+    def __init__(self):
+        self.n = 0
+
+    def write(self, chunk: str) -> None:
+        self.n += len(chunk)
 
 
 class SupabaseService:
@@ -48,15 +176,24 @@ class SupabaseService:
 
     def __init__(self):
         """Initialize the Supabase service."""
-        self._client = None
         self._initialized = False
+        # Flipped off after the first failed call so a missing RPC or column
+        # isn't retried on every request
+        self._stats_rpc_available = True
+        self._content_gz_available = True
+        # Probed on first use, see _units_table_ready
+        self._units_table_available: Optional[bool] = None
+        # Curriculum id -> hash of the content and status last written
+        self._last_save_hash: Dict[str, str] = {}
+        # Background writer for curriculum saves. One worker keeps writes to
+        # the same curriculum in submission order, so a stale checkpoint can
+        # never land after a newer save.
+        self._io_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="supabase-io")
 
     @property
     def client(self) -> Optional[Client]:
-        """Lazy-load the Supabase client."""
-        if self._client is None:
-            self._client = get_supabase_client()
-        return self._client
+        """Get the shared process-wide Supabase client."""
+        return get_supabase_client()
 
     @property
     def is_available(self) -> bool:
@@ -107,39 +244,43 @@ class SupabaseService:
         Returns:
             Copy of curriculum with images replaced by placeholders.
         """
-        import copy
-        stripped = copy.deepcopy(curriculum)
+        # Copy only the spine (top-level dict, units list, unit dicts) that gets
+        # mutated below; everything else, including the large image strings,
+        # is shared with the original rather than duplicated
+        stripped = {**curriculum}
+        if "units" in curriculum:
+            stripped["units"] = [
+                dict(unit) if isinstance(unit, dict) else unit
+                for unit in curriculum.get("units") or []
+            ]
 
         units = stripped.get("units", [])
         images_stripped = 0
 
-        # Image field names to check (different curriculum versions use different names)
-        image_fields = [
-            "image_base64",
-            "selected_image_b64",
-            "image",
-            "image_data",
-            "thumbnail_b64",
-        ]
-
         for unit in units:
             if not isinstance(unit, dict):
                 continue
 
-            # Check all known image field names
-            for field in image_fields:
-                if unit.get(field) and isinstance(unit.get(field), str) and len(unit.get(field)) > 1000:
-                    unit[field] = None
-                    unit["_image_stripped"] = True
-                    images_stripped += 1
-
-            # Also check for any field containing 'b64' or 'base64' with large content
-            for key, val in list(unit.items()):
-                if isinstance(val, str) and len(val) > 10000:
-                    if "b64" in key.lower() or "base64" in key.lower() or "image" in key.lower():
-                        unit[key] = None
-                        unit["_image_stripped"] = True
-                        images_stripped += 1
+            # Single pass: known image fields over 1KB, or any other field whose
+            # name mentions b64/base64/image holding over 10KB
+            to_strip = []
+            for key, val in unit.items():
+                if not isinstance(val, str):
+                    continue
+                size = len(val)
+                if key in _IMAGE_FIELDS:
+                    if size > 1000:
+                        to_strip.append(key)
+                elif size > 10000:
+                    lowered = key.lower()
+                    if "b64" in lowered or "base64" in lowered or "image" in lowered:
+                        to_strip.append(key)
+
+            if to_strip:
+                for key in to_strip:
+                    unit[key] = None
+                unit["_image_stripped"] = True
+                images_stripped += len(to_strip)
 
         if images_stripped > 0:
             stripped["_images_stripped"] = images_stripped
@@ -148,12 +289,161 @@ class SupabaseService:
         return stripped
 
     def _estimate_json_size(self, obj: Any) -> int:
-        """Estimate JSON size in bytes without full serialization."""
+        """Estimate JSON size in bytes.
+
+        Uses orjson when installed (several times faster on multi-MB
+        curricula; counts UTF-8 bytes rather than ASCII escapes). Otherwise
+        streams the stdlib encoder output into a counter, so the JSON string
+        is never materialized; with ASCII-escaped output every character is
+        one byte.
+        """
+        if ORJSON_AVAILABLE:
+            try:
+                return len(orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS))
+            except TypeError:
+                # e.g. integers beyond 64 bits; let the stdlib encoder decide
+                pass
+
         try:
-            return len(json.dumps(obj))
+            counter = _SizeCounter()
+            json.dump(obj, counter, separators=(",", ":"))
+            return counter.n
         except Exception:
             return 0
 
+    def _content_columns(
+        self,
+        content: Dict[str, Any],
+        estimated_size: int,
+        strip_images: bool,
+        compress: bool
+    ) -> Dict[str, Any]:
+        """Build the content column values for a curriculum write.
+
+        Large content is gzip-compressed into content_gz with only a meta stub
+        left in the JSON column, so images survive. If even that is too big,
+        units are moved to the curriculum_units table (returned under the
+        private "_units" key for _write_content to store). Images are
+        optimized or stripped only when neither is possible.
+
+        Args:
+            content: Curriculum to store.
+            estimated_size: Its estimated JSON size in bytes.
+            strip_images: Whether images may be optimized or stripped.
+            compress: Whether the content_gz column can be used.
+
+        Returns:
+            Column values to merge into the insert/update record.
+        """
+        columns = {"content": content}
+        if compress:
+            # Clear any earlier compressed copy when storing plain JSON
+            columns["content_gz"] = None
+        if estimated_size <= _COMPRESS_THRESHOLD:
+            return columns
+
+        if compress:
+            packed = _gzip_content(content)
+            if len(packed) < _MAX_STORED_SIZE:
+                print(f"Compressed curriculum {estimated_size / 1_000_000:.1f}MB -> {len(packed) / 1_000_000:.1f}MB")
+                columns["content"] = {"meta": content.get("meta", {}), "units": [], "_content_gz": True}
+                columns["content_gz"] = packed
+                return columns
+
+        if self._units_table_ready():
+            print(f"Storing {len(content.get('units') or [])} units separately ({estimated_size / 1_000_000:.1f}MB)")
+            columns["content"] = {"meta": content.get("meta", {}), "units": [], "_units_table": True}
+            columns["_units"] = content.get("units") or []
+            return columns
+
+        if strip_images:
+            print(f"Optimizing curriculum for storage ({estimated_size / 1_000_000:.1f}MB)")
+            columns["content"] = self._optimize_curriculum_for_storage(content)
+            new_size = self._estimate_json_size(columns["content"])
+            print(f"Reduced to {new_size / 1_000_000:.1f}MB")
+        return columns
+
+    def _write_content(self, write, content: Dict[str, Any], strip_images: bool):
+        """Run a curriculum write, falling back if content_gz doesn't exist.
+
+        Args:
+            write: Callable taking the content columns and executing the query.
+            content: Curriculum to store.
+            strip_images: Whether images may be optimized or stripped.
+
+        Returns:
+            The query result.
+        """
+        estimated_size = self._estimate_json_size(content)
+        if self._content_gz_available:
+            try:
+                return self._write_columns(
+                    write, self._content_columns(content, estimated_size, strip_images, compress=True)
+                )
+            except Exception as e:
+                if "content_gz" not in str(e):
+                    raise
+                print(f"content_gz column unavailable, storing plain JSON: {e}")
+                self._content_gz_available = False
+        return self._write_columns(
+            write, self._content_columns(content, estimated_size, strip_images, compress=False)
+        )
+
+    def _write_columns(self, write, columns: Dict[str, Any]):
+        """Write the curricula row, then any units split out into curriculum_units."""
+        units = columns.pop("_units", None)
+        result = write(columns)
+        if units is not None and result.data:
+            self._save_units(result.data[0]["id"], units)
+        return result
+
+    def _units_table_ready(self) -> bool:
+        """Check once whether the curriculum_units table exists."""
+        if self._units_table_available is None:
+            try:
+                self.client.table("curriculum_units").select("idx", count="exact", head=True).limit(1).execute()
+                self._units_table_available = True
+            except Exception as e:
+                print(f"curriculum_units table unavailable, large curricula will be stripped: {e}")
+                self._units_table_available = False
+        return self._units_table_available
+
+    def _save_units(self, curriculum_id: str, units: List[Any]) -> None:
+        """Replace a curriculum's rows in curriculum_units.
+
+        Units are upserted over the existing rows first and only then are
+        rows past the new last index deleted, so a failure partway through
+        leaves the previously saved units in place rather than none at all.
+        Units go in as few batched upserts as possible, each kept under the
+        per-request payload limit.
+
+        Args:
+            curriculum_id: The UUID of the parent curriculum.
+            units: Units in order.
+        """
+        table = self.client.table
+
+        batch: List[Dict[str, Any]] = []
+        batch_size = 0
+        for idx, unit in enumerate(units):
+            unit_size = _unit_chars([unit])
+            if batch and batch_size + unit_size > _MAX_STORED_SIZE:
+                table("curriculum_units").upsert(batch, on_conflict="curriculum_id,idx").execute()
+                batch, batch_size = [], 0
+            batch.append({"curriculum_id": curriculum_id, "idx": idx, "unit": unit})
+            batch_size += unit_size
+        if batch:
+            table("curriculum_units").upsert(batch, on_conflict="curriculum_id,idx").execute()
+
+        # Drop units left over from a longer earlier save
+        table("curriculum_units").delete().eq("curriculum_id", curriculum_id).gte("idx", len(units)).execute()
+
+    def _content_hash(self, content: Dict[str, Any], status: str) -> str:
+        """Hash curriculum content and status to detect unchanged saves."""
+        digest = hashlib.blake2b(status.encode("utf-8"), digest_size=16)
+        digest.update(_dumps_bytes(content, sort_keys=True))
+        return digest.hexdigest()
+
     def save_curriculum(
         self,
         curriculum: Dict[str, Any],
@@ -180,23 +470,12 @@ class SupabaseService:
             # Generate title from subject/grade if not provided
             title = meta.get("title") or f"{meta.get('subject', 'Curriculum')} - Grade {meta.get('grade', 'N/A')}"
 
-            # Optimize images if content is large (> 1MB)
-            content_to_save = curriculum
-            estimated_size = self._estimate_json_size(curriculum)
-
-            if strip_images and estimated_size > 1_000_000:  # 1MB threshold
-                print(f"Optimizing curriculum for storage ({estimated_size / 1_000_000:.1f}MB)")
-                content_to_save = self._optimize_curriculum_for_storage(curriculum)
-                new_size = self._estimate_json_size(content_to_save)
-                print(f"Reduced to {new_size / 1_000_000:.1f}MB")
-
             record = {
                 "title": title,
                 "subject": meta.get("subject", "Unknown"),
                 "grade": str(meta.get("grade", "N/A")),
                 "style": meta.get("style", "Standard"),
                 "language": meta.get("language", "English"),
-                "content": content_to_save,
                 "unit_count": len(units),
                 "status": status,
             }
@@ -204,14 +483,26 @@ class SupabaseService:
             # Check if this curriculum already has a Supabase ID
             existing_id = meta.get("supabase_id")
 
+            # Repeated saves of unchanged content skip the network entirely
+            content_hash = None
             if existing_id:
-                # Update existing record
-                result = self.client.table("curricula").update(record).eq("id", existing_id).execute()
-            else:
+                content_hash = self._content_hash(curriculum, status)
+                if self._last_save_hash.get(existing_id) == content_hash:
+                    return existing_id
+
+            def write(columns):
+                if existing_id:
+                    # Update existing record
+                    return self.client.table("curricula").update({**record, **columns}).eq("id", existing_id).execute()
                 # Insert new record
-                result = self.client.table("curricula").insert(record).execute()
+                return self.client.table("curricula").insert({**record, **columns}).execute()
+
+            # Large content (> 1MB) is compressed, or failing that optimized
+            result = self._write_content(write, curriculum, strip_images)
 
             if result.data:
+                if content_hash:
+                    self._last_save_hash[existing_id] = content_hash
                 return result.data[0].get("id")
             return None
 
@@ -245,24 +536,59 @@ class SupabaseService:
                 "status": status,
                 "updated_at": datetime.utcnow().isoformat()
             }
-            if content:
-                # Optimize images if content is large
-                content_to_save = content
-                estimated_size = self._estimate_json_size(content)
 
-                if strip_images and estimated_size > 1_000_000:  # 1MB threshold
-                    content_to_save = self._optimize_curriculum_for_storage(content)
+            def write(columns):
+                return self.client.table("curricula").update({**update_data, **columns}).eq("id", curriculum_id).execute()
 
-                update_data["content"] = content_to_save
+            if content:
+                content_hash = self._content_hash(content, status)
+                if self._last_save_hash.get(curriculum_id) == content_hash:
+                    return True
                 update_data["unit_count"] = len(content.get("units", []))
-
-            result = self.client.table("curricula").update(update_data).eq("id", curriculum_id).execute()
+                result = self._write_content(write, content, strip_images)
+                if result.data:
+                    self._last_save_hash[curriculum_id] = content_hash
+            else:
+                # Status changed without content; the stored hash is stale
+                self._last_save_hash.pop(curriculum_id, None)
+                result = write({})
             return bool(result.data)
 
         except Exception as e:
             print(f"Error updating curriculum status: {e}")
             return False
 
+    def update_curriculum_status_async(
+        self,
+        curriculum_id: str,
+        status: str,
+        content: Optional[Dict[str, Any]] = None,
+        strip_images: bool = True
+    ) -> "Future[bool]":
+        """Queue update_curriculum_status on the background writer.
+
+        Image optimization, size estimation and the network call all run off
+        the caller's thread. The content is deep-copied first, so the caller
+        can keep appending units or editing meta and units while the save is
+        in flight. Strings are shared by the copy, so images aren't duplicated.
+
+        Args:
+            curriculum_id: The UUID of the curriculum.
+            status: New status ('generating', 'partial', 'complete').
+            content: Optional updated content.
+            strip_images: If True (default), remove base64 images to reduce size.
+
+        Returns:
+            Future resolving to the update_curriculum_status result.
+        """
+        import copy
+
+        if content:
+            content = copy.deepcopy(content)
+        return self._io_pool.submit(
+            self.update_curriculum_status, curriculum_id, status, content, strip_images
+        )
+
     def get_curriculum(self, curriculum_id: str) -> Optional[Dict[str, Any]]:
         """Retrieve a curriculum by ID.
 
@@ -276,15 +602,43 @@ class SupabaseService:
             return None
 
         try:
-            result = self.client.table("curricula").select("*").eq("id", curriculum_id).single().execute()
-            if result.data:
-                return result.data.get("content")
+            result = self._select_content(curriculum_id)
+            # maybe_single() yields no result rather than raising when missing
+            if result is not None and result.data:
+                if result.data.get("content_gz"):
+                    return _gunzip_content(result.data["content_gz"])
+                content = result.data.get("content")
+                if isinstance(content, dict) and content.get("_units_table"):
+                    rows = (
+                        self.client.table("curriculum_units")
+                        .select("idx, unit")
+                        .eq("curriculum_id", curriculum_id)
+                        .order("idx")
+                        .execute()
+                    )
+                    content = {k: v for k, v in content.items() if k != "_units_table"}
+                    content["units"] = [row["unit"] for row in rows.data or []]
+                return content
             return None
 
         except Exception as e:
             print(f"Error retrieving curriculum: {e}")
             return None
 
+    def _select_content(self, curriculum_id: str):
+        """Fetch only the content column(s) of one curriculum row."""
+        if self._content_gz_available:
+            try:
+                return (
+                    self.client.table("curricula").select("content, content_gz")
+                    .eq("id", curriculum_id).maybe_single().execute()
+                )
+            except Exception as e:
+                if "content_gz" not in str(e):
+                    raise
+                self._content_gz_available = False
+        return self.client.table("curricula").select("content").eq("id", curriculum_id).maybe_single().execute()
+
     def list_curricula(
         self,
         subject: Optional[str] = None,
@@ -345,6 +699,7 @@ class SupabaseService:
         try:
             # Logs are deleted via CASCADE, so just delete the curriculum
             result = self.client.table("curricula").delete().eq("id", curriculum_id).execute()
+            self._last_save_hash.pop(curriculum_id, None)
             return bool(result.data)
 
         except Exception as e:
@@ -460,6 +815,29 @@ class SupabaseService:
             print(f"Error updating generation log: {e}")
             return False
 
+    def upsert_generation_logs(self, rows: List[Dict[str, Any]]) -> bool:
+        """Write a batch of generation log rows in a single request.
+
+        Rows carry client-generated ids, so a row whose start was already
+        written is updated in place by its completion.
+
+        Args:
+            rows: Full generation log rows including their ``id``.
+
+        Returns:
+            True if successful, False otherwise.
+        """
+        if not rows or not self.is_available:
+            return False
+
+        try:
+            result = self.client.table("generation_logs").upsert(rows).execute()
+            return bool(result.data)
+
+        except Exception as e:
+            print(f"Error writing generation logs: {e}")
+            return False
+
     def get_generation_logs(
         self,
         curriculum_id: str,
@@ -501,13 +879,29 @@ class SupabaseService:
         if not self.is_available:
             return {"available": False}
 
+        if self._stats_rpc_available:
+            try:
+                # One round-trip and one table scan for all counts
+                result = self.client.rpc("curricula_stats").execute()
+                counts = result.data or {}
+                return {
+                    "available": True,
+                    "total_curricula": counts.get("total") or 0,
+                    "complete": counts.get("complete") or 0,
+                    "generating": counts.get("generating") or 0,
+                }
+            except Exception as e:
+                print(f"curricula_stats RPC unavailable, using count queries: {e}")
+                self._stats_rpc_available = False
+
         try:
-            # Count total curricula
-            total = self.client.table("curricula").select("id", count="exact").execute()
+            # head=True sends HEAD requests: only the count header comes back,
+            # no id rows to transfer and discard
+            total = self.client.table("curricula").select("id", count="exact", head=True).execute()
 
             # Count by status
-            complete = self.client.table("curricula").select("id", count="exact").eq("status", "complete").execute()
-            generating = self.client.table("curricula").select("id", count="exact").eq("status", "generating").execute()
+            complete = self.client.table("curricula").select("id", count="exact", head=True).eq("status", "complete").execute()
+            generating = self.client.table("curricula").select("id", count="exact", head=True).eq("status", "generating").execute()
 
             return {
                 "available": True,
@@ -533,6 +927,36 @@ def get_supabase_service() -> SupabaseService:
     return _supabase_service
 
 
+# Seconds GenerationLogger buffers rows before a batched Supabase write
+LOG_FLUSH_INTERVAL = 0.5
+
+# Recent events GenerationLogger keeps in memory for the UI
+MAX_LOGGED_EVENTS = 10_000
+
+# Agent framework progress events -> (event_type, agent, status)
+_EVENT_MAPPING = {
+    "planning_start": ("planning", "orchestrator", "started"),
+    "planning_done": ("planning", "orchestrator", "completed"),
+    "outline_start": ("outline", "outline_agent", "started"),
+    "outline_done": ("outline", "outline_agent", "completed"),
+    "topic_start": ("topic", "content_agent", "started"),
+    "topic_done": ("topic", "content_agent", "completed"),
+    "refine_start": ("refinement", "orchestrator", "started"),
+    "done": ("refinement", "orchestrator", "completed"),
+    "cancelled": ("generation", "orchestrator", "cancelled"),
+}
+
+# Progress payload keys copied into event details, as (source, detail name)
+_DETAIL_KEYS = (
+    ("topic_title", "topic"),
+    ("topic_index", "index"),
+    ("total_topics", "total"),
+    ("topics_completed", "completed"),
+)
+
+_FINAL_EVENTS = frozenset({"done", "cancelled"})
+
+
 class GenerationLogger:
     """Tracks generation events for visibility and logging to Supabase.
 
@@ -545,7 +969,9 @@ class GenerationLogger:
         self,
         curriculum_id: Optional[str] = None,
         model: str = "gpt-4.1-nano",
-        supabase_service: Optional[SupabaseService] = None
+        supabase_service: Optional[SupabaseService] = None,
+        flush_interval: float = LOG_FLUSH_INTERVAL,
+        max_events: int = MAX_LOGGED_EVENTS
     ):
         """Initialize the generation logger.
 
@@ -553,18 +979,61 @@ class GenerationLogger:
             curriculum_id: Optional Supabase curriculum UUID for logging.
             model: The primary model being used.
             supabase_service: Optional SupabaseService instance.
+            flush_interval: Seconds to buffer log rows before writing them.
+            max_events: Number of recent events kept in memory.
         """
         self.curriculum_id = curriculum_id
         self.model = model
         self._supabase = supabase_service
-        self._events: List[Dict[str, Any]] = []
+        # Only the most recent events are kept; get_summary works from
+        # running totals so it stays O(1) and covers evicted events too
+        self._events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
+        self._events_snapshot: Tuple[Dict[str, Any], ...] = ()
+        self._snapshot_total = 0
+        self._event_total = 0
+        self._total_duration_ms = 0
+        self._event_counts = {"started": 0, "completed": 0, "failed": 0, "cancelled": 0}
+        self._agents_used: set = set()
         self._log_ids: Dict[str, str] = {}  # Maps event keys to Supabase log IDs
-        self._start_times: Dict[str, datetime] = {}
+        self._start_times: Dict[str, int] = {}  # Event key -> time.monotonic_ns()
+
+        # Supabase writes are batched: rows wait in _pending (keyed by log id,
+        # so a start and its completion collapse into one row) until a
+        # background timer or an explicit flush() sends them in one request.
+        # _rows holds only rows still awaiting their completion, at most one
+        # per event key, so it stays as small as _log_ids.
+        self._rows: Dict[str, Dict[str, Any]] = {}
+        self._pending: Dict[str, Dict[str, Any]] = {}
+        self._pending_lock = threading.Lock()
+        self._flush_timer: Optional[threading.Timer] = None
+        self._flush_interval = flush_interval
 
     @property
-    def events(self) -> List[Dict[str, Any]]:
-        """Get all logged events."""
-        return self._events.copy()
+    def events(self) -> Tuple[Dict[str, Any], ...]:
+        """Get all logged events as an immutable snapshot.
+
+        The snapshot is rebuilt only after new events arrive; repeated polls
+        between events return the same tuple.
+        """
+        if self._snapshot_total != self._event_total:
+            self._events_snapshot = tuple(self._events)
+            self._snapshot_total = self._event_total
+        return self._events_snapshot
+
+    def events_since(self, index: int) -> List[Dict[str, Any]]:
+        """Get events logged after the first ``index`` events.
+
+        Lets a UI poll incrementally by passing the count it has already seen.
+        Events already evicted from the in-memory window are skipped.
+
+        Args:
+            index: Number of events the caller has already consumed.
+
+        Returns:
+            The events logged since then.
+        """
+        evicted = self._event_total - len(self._events)
+        return list(islice(self._events, max(index - evicted, 0), None))
 
     def _log_to_supabase(
         self,
@@ -572,9 +1041,10 @@ class GenerationLogger:
         model: str,
         status: str,
         prompt_preview: Optional[str] = None,
-        event_key: Optional[str] = None
+        event_key: Optional[str] = None,
+        duration_ms: Optional[int] = None
     ) -> Optional[str]:
-        """Log an event to Supabase.
+        """Queue an event's log row for the next batched Supabase write.
 
         Args:
             agent: Name of the agent.
@@ -582,6 +1052,7 @@ class GenerationLogger:
             status: Event status.
             prompt_preview: Optional prompt preview.
             event_key: Key for tracking start/complete pairs.
+            duration_ms: Duration of a completed or failed event.
 
         Returns:
             Log ID if successful.
@@ -590,26 +1061,68 @@ class GenerationLogger:
             return None
 
         if status == "started":
-            log_id = self._supabase.log_generation_start(
-                self.curriculum_id, agent, model, prompt_preview
-            )
-            if log_id and event_key:
-                self._log_ids[event_key] = log_id
+            log_id = str(uuid.uuid4())
+            row = {
+                "id": log_id,
+                "curriculum_id": self.curriculum_id,
+                "agent": agent,
+                "model": model,
+                "prompt_preview": (prompt_preview[:500] if prompt_preview else None),
+                "status": "started",
+                "duration_ms": None,
+            }
+            with self._pending_lock:
+                if event_key:
+                    # A restarted event abandons the earlier row
+                    previous = self._log_ids.get(event_key)
+                    if previous:
+                        self._rows.pop(previous, None)
+                    self._log_ids[event_key] = log_id
+                    self._rows[log_id] = row
+                self._pending[log_id] = row
+            self._schedule_flush()
             return log_id
         elif status in ("completed", "failed") and event_key:
-            log_id = self._log_ids.get(event_key)
-            if log_id:
-                # Calculate duration
-                duration_ms = None
-                if event_key in self._start_times:
-                    duration = datetime.now() - self._start_times[event_key]
-                    duration_ms = int(duration.total_seconds() * 1000)
-                self._supabase.log_generation_complete(
-                    log_id, status=status, duration_ms=duration_ms
-                )
+            with self._pending_lock:
+                log_id = self._log_ids.pop(event_key, None)
+                row = self._rows.pop(log_id, None) if log_id else None
+                if row is not None:
+                    row["status"] = status
+                    row["duration_ms"] = duration_ms
+                    self._pending[log_id] = row
+            if row is not None:
+                self._schedule_flush()
                 return log_id
         return None
 
+    def _schedule_flush(self) -> None:
+        """Arrange for pending rows to be flushed after the batch interval."""
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                return
+            timer = threading.Timer(self._flush_interval, self.flush)
+            timer.daemon = True
+            self._flush_timer = timer
+        timer.start()
+
+    def flush(self) -> bool:
+        """Write all pending log rows to Supabase in one request.
+
+        Returns:
+            True if rows were written, False if there was nothing to write
+            or the write failed.
+        """
+        with self._pending_lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            rows = [dict(row) for row in self._pending.values()]
+            self._pending.clear()
+
+        if not rows or not self._supabase:
+            return False
+        return self._supabase.upsert_generation_logs(rows)
+
     def log_event(
         self,
         event_type: str,
@@ -631,15 +1144,17 @@ class GenerationLogger:
         """
         event_key = f"{event_type}_{agent}"
         timestamp = datetime.now()
+        now_ns = time.monotonic_ns()
         model = model or self.model
 
+        # Durations come from the monotonic clock so wall-clock adjustments
+        # mid-generation can't produce negative or inflated timings
         if status == "started":
-            self._start_times[event_key] = timestamp
+            self._start_times[event_key] = now_ns
 
         duration_ms = None
         if status in ("completed", "failed") and event_key in self._start_times:
-            duration = timestamp - self._start_times[event_key]
-            duration_ms = int(duration.total_seconds() * 1000)
+            duration_ms = (now_ns - self._start_times[event_key]) // 1_000_000
 
         event = {
             "timestamp": timestamp.isoformat(),
@@ -652,9 +1167,15 @@ class GenerationLogger:
         }
 
         self._events.append(event)
+        self._event_total += 1
+        if status in self._event_counts:
+            self._event_counts[status] += 1
+        if duration_ms:
+            self._total_duration_ms += duration_ms
+        self._agents_used.add(agent)
 
         # Log to Supabase if available
-        self._log_to_supabase(agent, model, status, prompt_preview, event_key)
+        self._log_to_supabase(agent, model, status, prompt_preview, event_key, duration_ms)
 
     def create_progress_callback(self) -> callable:
         """Create a progress callback function for the agent framework.
@@ -664,34 +1185,17 @@ class GenerationLogger:
         """
         def progress_callback(event: str, data: Dict[str, Any]) -> None:
             """Progress callback for agent framework."""
-            # Map event names to agent names and types
-            event_mapping = {
-                "planning_start": ("planning", "orchestrator", "started"),
-                "planning_done": ("planning", "orchestrator", "completed"),
-                "outline_start": ("outline", "outline_agent", "started"),
-                "outline_done": ("outline", "outline_agent", "completed"),
-                "topic_start": ("topic", "content_agent", "started"),
-                "topic_done": ("topic", "content_agent", "completed"),
-                "refine_start": ("refinement", "orchestrator", "started"),
-                "done": ("refinement", "orchestrator", "completed"),
-                "cancelled": ("generation", "orchestrator", "cancelled"),
-            }
+            mapping = _EVENT_MAPPING.get(event)
+            if mapping is None:
+                return
 
-            if event in event_mapping:
-                event_type, agent, status = event_mapping[event]
+            # Add topic details if available
+            details = {dst: data[src] for src, dst in _DETAIL_KEYS if src in data}
+            self.log_event(*mapping, details)
 
-                # Add topic details if available
-                details = {}
-                if "topic_title" in data:
-                    details["topic"] = data["topic_title"]
-                if "topic_index" in data:
-                    details["index"] = data["topic_index"]
-                if "total_topics" in data:
-                    details["total"] = data["total_topics"]
-                if "topics_completed" in data:
-                    details["completed"] = data["topics_completed"]
-
-                self.log_event(event_type, agent, status, details)
+            # Don't leave the final rows waiting on the timer
+            if event in _FINAL_EVENTS:
+                self.flush()
 
         return progress_callback
 
@@ -701,22 +1205,10 @@ class GenerationLogger:
         Returns:
             Summary dictionary with counts and timings.
         """
-        total_duration_ms = 0
-        event_counts = {"started": 0, "completed": 0, "failed": 0, "cancelled": 0}
-        agents_used = set()
-
-        for event in self._events:
-            status = event.get("status", "")
-            if status in event_counts:
-                event_counts[status] = event_counts.get(status, 0) + 1
-            if event.get("duration_ms"):
-                total_duration_ms += event["duration_ms"]
-            agents_used.add(event.get("agent", "unknown"))
-
         return {
-            "total_events": len(self._events),
-            "total_duration_ms": total_duration_ms,
-            "event_counts": event_counts,
-            "agents_used": list(agents_used),
+            "total_events": self._event_total,
+            "total_duration_ms": self._total_duration_ms,
+            "event_counts": dict(self._event_counts),
+            "agents_used": list(self._agents_used),
             "model": self.model
         }
@@ -5,14 +5,38 @@ Handles creation, storage, and application of curriculum templates
 
 import os
 import json
+import heapq
 import uuid
+from collections import OrderedDict
 from pathlib import Path
 from datetime import datetime
-from typing import Dict, Any, List, Optional, Tuple
-from dataclasses import dataclass, asdict
+from typing import Dict, Any, FrozenSet, List, Optional, Tuple
+from dataclasses import dataclass, field
 
+# Optional fast JSON library; list_templates parses every template file
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-@dataclass
+
+def _dumps_template(data: Dict[str, Any]) -> bytes:
+    """Serialize template data to indented JSON bytes"""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2)
+    return json.dumps(data, indent=2).encode("utf-8")
+
+
+def _loads_template(raw: bytes) -> Any:
+    """Parse template JSON bytes"""
+    if ORJSON_AVAILABLE:
+        # orjson.JSONDecodeError subclasses json.JSONDecodeError
+        return orjson.loads(raw)
+    return json.loads(raw)
+
+
+@dataclass(slots=True)
 class TemplateMetadata:
     """Metadata for curriculum templates"""
     id: str
@@ -28,13 +52,38 @@ class TemplateMetadata:
     usage_count: int = 0
     tags: List[str] = None
     is_public: bool = True
+    # Derived lookup helpers for list/search filters; not persisted
+    _subjects_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _grades_set: FrozenSet[str] = field(init=False, repr=False, compare=False)
+    _search_blob: str = field(init=False, repr=False, compare=False)
     
     def __post_init__(self):
         if self.tags is None:
             self.tags = []
+        self._subjects_set = frozenset(self.subjects)
+        self._grades_set = frozenset(self.grades)
+        self._search_blob = f"{self.name} {self.description} {' '.join(self.tags)}".lower()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary (cheaper than dataclasses.asdict)"""
+        return {
+            "id": self.id,
+            "name": self.name,
+            "description": self.description,
+            "subjects": list(self.subjects),
+            "grades": list(self.grades),
+            "style": self.style,
+            "language": self.language,
+            "author": self.author,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+            "usage_count": self.usage_count,
+            "tags": list(self.tags),
+            "is_public": self.is_public,
+        }
 
 
-@dataclass
+@dataclass(slots=True)
 class TemplateStructure:
     """Structure definition for curriculum templates"""
     topic_count: int
@@ -52,6 +101,142 @@ class TemplateStructure:
         if self.custom_prompts is None:
             self.custom_prompts = {}
 
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to a plain dictionary (cheaper than dataclasses.asdict)"""
+        return {
+            "topic_count": self.topic_count,
+            "media_richness": self.media_richness,
+            "include_quizzes": self.include_quizzes,
+            "include_summary": self.include_summary,
+            "include_resources": self.include_resources,
+            "include_keypoints": self.include_keypoints,
+            "topic_templates": [dict(t) for t in self.topic_templates],
+            "custom_prompts": dict(self.custom_prompts),
+        }
+
+
+# Built-in templates, written to templates/system on first run. Timestamps
+# are stamped at write time.
+_BUILTIN_TEMPLATES = (
+    {
+        "metadata": {
+            "id": "elementary_science",
+            "name": "Elementary Science Explorer",
+            "description": "Interactive science curriculum for elementary students with hands-on activities",
+            "subjects": ["Science"],
+            "grades": ["K", "1", "2", "3", "4", "5"],
+            "style": "Hands-on",
+            "language": "English",
+            "author": "InstaSchool",
+            "tags": ["science", "elementary", "interactive", "hands-on"]
+        },
+        "structure": {
+            "topic_count": 4,
+            "media_richness": 4,
+            "include_quizzes": True,
+            "include_summary": True,
+            "include_resources": True,
+            "include_keypoints": True,
+            "topic_templates": [
+                {"title_pattern": "Introduction to {concept}", "focus": "foundational understanding"},
+                {"title_pattern": "Exploring {concept}", "focus": "hands-on discovery"},
+                {"title_pattern": "{concept} in Action", "focus": "real-world applications"},
+                {"title_pattern": "Mastering {concept}", "focus": "synthesis and review"}
+            ],
+            "custom_prompts": {
+                "content": "Create engaging, age-appropriate content with simple experiments and observations that students can do safely. Include plenty of 'What would happen if...' questions."
+            }
+        }
+    },
+    {
+        "metadata": {
+            "id": "high_school_inquiry",
+            "name": "High School Inquiry-Based Learning",
+            "description": "Research-focused curriculum for high school students emphasizing critical thinking",
+            "subjects": ["Science", "Social Studies", "History"],
+            "grades": ["9", "10", "11", "12"],
+            "style": "Inquiry-based",
+            "language": "English",
+            "author": "InstaSchool",
+            "tags": ["high-school", "inquiry", "research", "critical-thinking"]
+        },
+        "structure": {
+            "topic_count": 5,
+            "media_richness": 3,
+            "include_quizzes": True,
+            "include_summary": True,
+            "include_resources": True,
+            "include_keypoints": True,
+            "topic_templates": [
+                {"title_pattern": "Essential Questions about {concept}", "focus": "driving questions"},
+                {"title_pattern": "Investigating {concept}", "focus": "research methods"},
+                {"title_pattern": "Evidence and Analysis: {concept}", "focus": "data interpretation"},
+                {"title_pattern": "Perspectives on {concept}", "focus": "multiple viewpoints"},
+                {"title_pattern": "Synthesis: Understanding {concept}", "focus": "drawing conclusions"}
+            ],
+            "custom_prompts": {
+                "content": "Frame content as investigative questions. Encourage students to think like researchers and consider multiple perspectives. Include primary sources when possible."
+            }
+        }
+    },
+    {
+        "metadata": {
+            "id": "math_problem_solving",
+            "name": "Mathematical Problem Solving",
+            "description": "Step-by-step mathematics curriculum emphasizing problem-solving strategies",
+            "subjects": ["Mathematics"],
+            "grades": ["3", "4", "5", "6", "7", "8"],
+            "style": "Project-based",
+            "language": "English",
+            "author": "InstaSchool",
+            "tags": ["mathematics", "problem-solving", "step-by-step"]
+        },
+        "structure": {
+            "topic_count": 4,
+            "media_richness": 3,
+            "include_quizzes": True,
+            "include_summary": True,
+            "include_resources": True,
+            "include_keypoints": True,
+            "topic_templates": [
+                {"title_pattern": "Understanding {concept}", "focus": "conceptual foundation"},
+                {"title_pattern": "Strategies for {concept}", "focus": "problem-solving methods"},
+                {"title_pattern": "Practice with {concept}", "focus": "guided practice"},
+                {"title_pattern": "Real-World {concept}", "focus": "applications"}
+            ],
+            "custom_prompts": {
+                "content": "Present multiple solution strategies. Include visual representations and real-world problems. Emphasize the thinking process, not just the answer."
+            }
+        }
+    }
+)
+
+
+# Parsed template files kept in memory by TemplateManager
+_TEMPLATE_CACHE_SIZE = 256
+
+# Queries remembered by TemplateManager.search_templates
+_SEARCH_CACHE_SIZE = 64
+
+# Template subdirectories, in lookup order
+_SUBDIRS = ("user", "system", "shared")
+
+# Bump whenever the embedded built-in templates change so existing installs
+# re-check them; the marker file records which version was written
+BUILTIN_VERSION = 1
+
+# Metadata-only index of every template, stored at the templates root
+_INDEX_FILE = "_index.json"
+_INDEX_VERSION = 1
+
+
+def _copy_template(template: Dict[str, Any]) -> Dict[str, Any]:
+    """Fresh dataclass copies so callers can't mutate a cached template"""
+    return {
+        "metadata": TemplateMetadata(**template["metadata"].to_dict()),
+        "structure": TemplateStructure(**template["structure"].to_dict()),
+    }
+
 
 class TemplateManager:
     """Manages curriculum templates"""
@@ -64,6 +249,18 @@ class TemplateManager:
         """
         self.templates_dir = Path(templates_dir)
         self.templates_dir.mkdir(exist_ok=True)
+
+        # Parsed templates keyed by path, valid while (mtime_ns, size) match
+        self._cache: Dict[Path, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+        # Metadata index, loaded lazily from _INDEX_FILE (see _get_index)
+        self._index: Optional[Dict[str, Any]] = None
+        # search_templates results by query; entries from an older
+        # generation (bumped on any template change) are ignored
+        self._search_cache: OrderedDict[str, Tuple[int, List[Dict[str, Any]]]] = OrderedDict()
+        self._search_gen = 0
+        # Template id -> file it was last found at, so lookups skip probing
+        # each subdirectory in turn
+        self._location: Dict[str, Path] = {}
         
         # Create subdirectories
         (self.templates_dir / "user").mkdir(exist_ok=True)
@@ -75,111 +272,34 @@ class TemplateManager:
     
     def _initialize_builtin_templates(self):
         """Create built-in templates if they don't exist"""
-        builtin_templates = [
-            {
-                "metadata": TemplateMetadata(
-                    id="elementary_science",
-                    name="Elementary Science Explorer",
-                    description="Interactive science curriculum for elementary students with hands-on activities",
-                    subjects=["Science"],
-                    grades=["K", "1", "2", "3", "4", "5"],
-                    style="Hands-on",
-                    language="English",
-                    author="InstaSchool",
-                    created_at=datetime.now().isoformat(),
-                    updated_at=datetime.now().isoformat(),
-                    tags=["science", "elementary", "interactive", "hands-on"]
-                ),
-                "structure": TemplateStructure(
-                    topic_count=4,
-                    media_richness=4,
-                    include_quizzes=True,
-                    include_summary=True,
-                    include_resources=True,
-                    include_keypoints=True,
-                    topic_templates=[
-                        {"title_pattern": "Introduction to {concept}", "focus": "foundational understanding"},
-                        {"title_pattern": "Exploring {concept}", "focus": "hands-on discovery"},
-                        {"title_pattern": "{concept} in Action", "focus": "real-world applications"},
-                        {"title_pattern": "Mastering {concept}", "focus": "synthesis and review"}
-                    ],
-                    custom_prompts={
-                        "content": "Create engaging, age-appropriate content with simple experiments and observations that students can do safely. Include plenty of 'What would happen if...' questions."
-                    }
-                )
-            },
-            {
-                "metadata": TemplateMetadata(
-                    id="high_school_inquiry",
-                    name="High School Inquiry-Based Learning",
-                    description="Research-focused curriculum for high school students emphasizing critical thinking",
-                    subjects=["Science", "Social Studies", "History"],
-                    grades=["9", "10", "11", "12"],
-                    style="Inquiry-based",
-                    language="English",
-                    author="InstaSchool",
-                    created_at=datetime.now().isoformat(),
-                    updated_at=datetime.now().isoformat(),
-                    tags=["high-school", "inquiry", "research", "critical-thinking"]
-                ),
-                "structure": TemplateStructure(
-                    topic_count=5,
-                    media_richness=3,
-                    include_quizzes=True,
-                    include_summary=True,
-                    include_resources=True,
-                    include_keypoints=True,
-                    topic_templates=[
-                        {"title_pattern": "Essential Questions about {concept}", "focus": "driving questions"},
-                        {"title_pattern": "Investigating {concept}", "focus": "research methods"},
-                        {"title_pattern": "Evidence and Analysis: {concept}", "focus": "data interpretation"},
-                        {"title_pattern": "Perspectives on {concept}", "focus": "multiple viewpoints"},
-                        {"title_pattern": "Synthesis: Understanding {concept}", "focus": "drawing conclusions"}
-                    ],
-                    custom_prompts={
-                        "content": "Frame content as investigative questions. Encourage students to think like researchers and consider multiple perspectives. Include primary sources when possible."
-                    }
-                )
-            },
-            {
-                "metadata": TemplateMetadata(
-                    id="math_problem_solving",
-                    name="Mathematical Problem Solving",
-                    description="Step-by-step mathematics curriculum emphasizing problem-solving strategies",
-                    subjects=["Mathematics"],
-                    grades=["3", "4", "5", "6", "7", "8"],
-                    style="Project-based",
-                    language="English",
-                    author="InstaSchool",
-                    created_at=datetime.now().isoformat(),
-                    updated_at=datetime.now().isoformat(),
-                    tags=["mathematics", "problem-solving", "step-by-step"]
-                ),
-                "structure": TemplateStructure(
-                    topic_count=4,
-                    media_richness=3,
-                    include_quizzes=True,
-                    include_summary=True,
-                    include_resources=True,
-                    include_keypoints=True,
-                    topic_templates=[
-                        {"title_pattern": "Understanding {concept}", "focus": "conceptual foundation"},
-                        {"title_pattern": "Strategies for {concept}", "focus": "problem-solving methods"},
-                        {"title_pattern": "Practice with {concept}", "focus": "guided practice"},
-                        {"title_pattern": "Real-World {concept}", "focus": "applications"}
-                    ],
-                    custom_prompts={
-                        "content": "Present multiple solution strategies. Include visual representations and real-world problems. Emphasize the thinking process, not just the answer."
-                    }
-                )
-            }
+        # A single stat on warm starts instead of listing the system directory.
+        # The marker lives at the root so it doesn't touch the system
+        # directory's mtime, which the index uses for staleness.
+        marker = self.templates_dir / f".builtins_v{BUILTIN_VERSION}"
+        if marker.exists():
+            return
+
+        # Save missing built-in templates, listing the directory once.
+        # Dataclasses are only built for templates that need writing.
+        system_dir = self.templates_dir / "system"
+        existing = {entry.name for entry in system_dir.iterdir()}
+        now_iso = datetime.now().isoformat()
+        missing = [
+            (
+                system_dir / f"{template['metadata']['id']}.json",
+                {
+                    "metadata": TemplateMetadata(
+                        **template["metadata"], created_at=now_iso, updated_at=now_iso
+                    ),
+                    "structure": TemplateStructure(**template["structure"]),
+                },
+            )
+            for template in _BUILTIN_TEMPLATES
+            if f"{template['metadata']['id']}.json" not in existing
         ]
-        
-        # Save built-in templates
-        for template_data in builtin_templates:
-            template_file = self.templates_dir / "system" / f"{template_data['metadata'].id}.json"
-            if not template_file.exists():
-                self._save_template_file(template_file, template_data)
+        if missing:
+            self._batch_save(missing)
+        marker.touch()
     
     def _save_template_file(self, file_path: Path, template_data: Dict[str, Any]):
         """Save template data to file
@@ -188,30 +308,146 @@ class TemplateManager:
             file_path: Path to save template
             template_data: Template data to save
         """
+        self._batch_save([(file_path, template_data)])
+
+    def _batch_save(self, items: List[Tuple[Path, Dict[str, Any]]]):
+        """Save several templates with a single index update
+
+        Everything is serialized before the first write, then each file is
+        written atomically (temp file + rename) and the index is rewritten once.
+
+        Args:
+            items: (file_path, template_data) pairs to save
+        """
         # Convert dataclasses to dictionaries
-        save_data = {
-            "metadata": asdict(template_data["metadata"]),
-            "structure": asdict(template_data["structure"])
-        }
-        
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(save_data, f, indent=2)
+        payloads = []
+        for file_path, template_data in items:
+            save_data = {
+                "metadata": template_data["metadata"].to_dict(),
+                "structure": template_data["structure"].to_dict()
+            }
+            payloads.append((file_path, save_data, _dumps_template(save_data)))
+
+        index = self._get_index()
+        for file_path, _, raw in payloads:
+            self._cache.pop(file_path, None)
+            # A new file may shadow one in a later subdirectory
+            self._location.pop(file_path.stem, None)
+            # Write beside the target and rename over it, so a crash never
+            # leaves a truncated template (.tmp names are not indexed)
+            tmp_path = file_path.with_name(file_path.name + ".tmp")
+            tmp_path.write_bytes(raw)
+            os.replace(tmp_path, file_path)
+
+        # Keep the index in step without rescanning the directories
+        for file_path, save_data, _ in payloads:
+            index["templates"][self._index_key(file_path)] = {
+                "subdir": file_path.parent.name,
+                "metadata": save_data["metadata"],
+            }
+        index["dirs"] = self._dir_mtimes()
+        self._search_gen += 1
+        self._write_index()
+
+    @staticmethod
+    def _index_key(file_path: Path) -> str:
+        """Index key for a template file ("<subdir>/<id>")"""
+        return f"{file_path.parent.name}/{file_path.stem}"
+
+    def _dir_mtimes(self) -> Dict[str, int]:
+        """Modification times of the template subdirectories"""
+        mtimes = {}
+        for subdir in _SUBDIRS:
+            try:
+                mtimes[subdir] = (self.templates_dir / subdir).stat().st_mtime_ns
+            except OSError:
+                continue
+        return mtimes
+
+    def _get_index(self) -> Dict[str, Any]:
+        """Get the metadata index, rebuilding it if a directory changed
+
+        Adding, removing or renaming a template file changes its directory's
+        mtime, so three stats are enough to tell whether the index is stale.
+
+        Returns:
+            Index with "dirs" (subdir mtimes) and "templates" entries
+        """
+        mtimes = self._dir_mtimes()
+        if self._index is None:
+            try:
+                self._index = _loads_template((self.templates_dir / _INDEX_FILE).read_bytes())
+            except (OSError, ValueError):
+                self._index = None
+
+        index = self._index
+        if (not isinstance(index, dict)
+                or index.get("version") != _INDEX_VERSION
+                or index.get("dirs") != mtimes):
+            self._index = self._rebuild_index(mtimes)
+            self._search_gen += 1
+            # Files changed outside this manager; drop remembered locations
+            self._location.clear()
+            self._write_index()
+        return self._index
+
+    def _rebuild_index(self, mtimes: Dict[str, int]) -> Dict[str, Any]:
+        """Build the metadata index with one pass over the template files"""
+        templates = {}
+        for subdir in _SUBDIRS:
+            try:
+                # scandir's d_type answers is_file() without a stat per entry
+                with os.scandir(self.templates_dir / subdir) as entries:
+                    files = [
+                        entry.name for entry in entries
+                        if entry.name.endswith(".json") and entry.is_file(follow_symlinks=False)
+                    ]
+            except FileNotFoundError:
+                continue
+            for name in files:
+                template_data = self._load_template_file(
+                    self.templates_dir / subdir / name, trusted=subdir == "system"
+                )
+                if template_data:
+                    templates[f"{subdir}/{name[:-5]}"] = {
+                        "subdir": subdir,
+                        "metadata": template_data["metadata"].to_dict(),
+                    }
+        return {"version": _INDEX_VERSION, "dirs": mtimes, "templates": templates}
+
+    def _write_index(self):
+        """Atomically write the in-memory index to disk"""
+        index_path = self.templates_dir / _INDEX_FILE
+        tmp_path = index_path.with_name(_INDEX_FILE + ".tmp")
+        try:
+            tmp_path.write_bytes(_dumps_template(self._index))
+            os.replace(tmp_path, index_path)
+        except OSError as e:
+            # The index is only an accelerator; it is rebuilt when missing
+            print(f"Error writing template index: {e}")
     
-    def _load_template_file(self, file_path: Path) -> Optional[Dict[str, Any]]:
+    def _load_template_file(self, file_path: Path, trusted: bool = False) -> Optional[Dict[str, Any]]:
         """Load template data from file with validation
         
         Args:
             file_path: Path to template file
+            trusted: Skip structural validation (system templates we wrote);
+                malformed data still fails dataclass construction
             
         Returns:
             Template data or None if failed
         """
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
+            stat = file_path.stat()
+            freshness = (stat.st_mtime_ns, stat.st_size)
+            cached = self._cache.get(file_path)
+            if cached is not None and cached[0] == freshness:
+                return _copy_template(cached[1])
+
+            data = _loads_template(file_path.read_bytes())
             
             # Validate structure
-            if not self._validate_template_data(data):
+            if not trusted and not self._validate_template_data(data):
                 print(f"Invalid template data in {file_path}")
                 return None
             
@@ -219,8 +455,13 @@ class TemplateManager:
             try:
                 metadata = TemplateMetadata(**data["metadata"])
                 structure = TemplateStructure(**data["structure"])
-                
-                return {"metadata": metadata, "structure": structure}
+                template = {"metadata": metadata, "structure": structure}
+
+                if len(self._cache) >= _TEMPLATE_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    del self._cache[next(iter(self._cache))]
+                self._cache[file_path] = (freshness, template)
+                return _copy_template(template)
                 
             except (TypeError, ValueError) as e:
                 print(f"Template dataclass creation failed for {file_path}: {e}")
@@ -351,12 +592,35 @@ class TemplateManager:
         Returns:
             Template data or None if not found
         """
-        # Search in all directories
-        for subdir in ["user", "system", "shared"]:
+        template_file = self._find_template_file(template_id)
+        if template_file is None:
+            return None
+        return self._load_template_file(
+            template_file, trusted=template_file.parent.name == "system"
+        )
+
+    def _find_template_file(self, template_id: str, search_dirs=_SUBDIRS) -> Optional[Path]:
+        """Locate a template file, trying its remembered location first
+
+        Args:
+            template_id: Template identifier
+            search_dirs: Subdirectories to consider, in lookup order
+
+        Returns:
+            Path to the template file or None if not found
+        """
+        template_file = self._location.get(template_id)
+        if template_file is not None and template_file.parent.name in search_dirs:
+            if template_file.exists():
+                return template_file
+            del self._location[template_id]
+
+        for subdir in search_dirs:
             template_file = self.templates_dir / subdir / f"{template_id}.json"
             if template_file.exists():
-                return self._load_template_file(template_file)
-        
+                self._location[template_id] = template_file
+                return template_file
+
         return None
     
     def list_templates(self, 
@@ -377,8 +641,6 @@ class TemplateManager:
         Returns:
             List of template metadata
         """
-        templates = []
-        
         # Determine which directories to search
         search_dirs = []
         if include_user:
@@ -387,26 +649,44 @@ class TemplateManager:
             search_dirs.append("system")
         if include_shared:
             search_dirs.append("shared")
-        
-        # Load templates from directories
-        for subdir in search_dirs:
-            template_dir = self.templates_dir / subdir
-            if template_dir.exists():
-                for template_file in template_dir.glob("*.json"):
-                    template_data = self._load_template_file(template_file)
-                    if template_data:
-                        metadata = template_data["metadata"]
-                        
-                        # Apply filters
-                        if subject_filter and subject_filter not in metadata.subjects:
-                            continue
-                        if grade_filter and grade_filter not in metadata.grades:
-                            continue
-                        
-                        templates.append(metadata)
+
+        return [
+            metadata for metadata, _ in
+            self._list_entries(search_dirs, subject_filter, grade_filter)
+        ]
+
+    def _list_entries(self,
+                      search_dirs=_SUBDIRS,
+                      subject_filter: Optional[str] = None,
+                      grade_filter: Optional[str] = None) -> List[Tuple[TemplateMetadata, Dict[str, Any]]]:
+        """Filtered, sorted (metadata, index entry metadata dict) pairs
+
+        Args:
+            search_dirs: Subdirectories to include
+            subject_filter: Filter by subject
+            grade_filter: Filter by grade
+
+        Returns:
+            Pairs sorted by usage count and creation date, most used first
+        """
+        templates = []
+
+        # Read metadata from the index instead of opening every template file
+        for entry in self._get_index()["templates"].values():
+            if entry["subdir"] not in search_dirs:
+                continue
+            metadata = TemplateMetadata(**entry["metadata"])
+
+            # Apply filters
+            if subject_filter and subject_filter not in metadata._subjects_set:
+                continue
+            if grade_filter and grade_filter not in metadata._grades_set:
+                continue
+
+            templates.append((metadata, entry["metadata"]))
         
         # Sort by usage count and creation date
-        templates.sort(key=lambda t: (t.usage_count, t.created_at), reverse=True)
+        templates.sort(key=lambda pair: (pair[0].usage_count, pair[0].created_at), reverse=True)
         return templates
     
     def apply_template(self, 
@@ -440,11 +720,9 @@ class TemplateManager:
         metadata.updated_at = datetime.now().isoformat()
         
         # Save updated metadata (find and update the file)
-        for subdir in ["user", "system", "shared"]:
-            template_file = self.templates_dir / subdir / f"{template_id}.json"
-            if template_file.exists():
-                self._save_template_file(template_file, template_data)
-                break
+        template_file = self._find_template_file(template_id)
+        if template_file is not None:
+            self._save_template_file(template_file, template_data)
         
         # Build generation parameters
         params = {
@@ -480,17 +758,23 @@ class TemplateManager:
         # Determine which directories to search
         search_dirs = ["user"] if user_only else ["user", "shared"]
         
-        for subdir in search_dirs:
-            template_file = self.templates_dir / subdir / f"{template_id}.json"
-            if template_file.exists():
-                try:
-                    template_file.unlink()
-                    return True
-                except Exception as e:
-                    print(f"Error deleting template {template_id}: {e}")
-                    return False
-        
-        return False
+        template_file = self._find_template_file(template_id, search_dirs)
+        if template_file is None:
+            return False
+
+        try:
+            index = self._get_index()
+            self._cache.pop(template_file, None)
+            self._location.pop(template_id, None)
+            template_file.unlink()
+            index["templates"].pop(self._index_key(template_file), None)
+            index["dirs"] = self._dir_mtimes()
+            self._search_gen += 1
+            self._write_index()
+            return True
+        except Exception as e:
+            print(f"Error deleting template {template_id}: {e}")
+            return False
     
     def update_template(self, 
                        template_id: str,
@@ -513,13 +797,7 @@ class TemplateManager:
         
         # Find template file
         search_dirs = ["user"] if user_only else ["user", "shared"]
-        template_file = None
-        
-        for subdir in search_dirs:
-            candidate_file = self.templates_dir / subdir / f"{template_id}.json"
-            if candidate_file.exists():
-                template_file = candidate_file
-                break
+        template_file = self._find_template_file(template_id, search_dirs)
         
         if not template_file:
             return False
@@ -550,16 +828,25 @@ class TemplateManager:
             List of matching template metadata
         """
         query_lower = query.lower()
-        all_templates = self.list_templates()
+        # Refresh the index first; a rebuild bumps the generation
+        self._get_index()
+
+        cached = self._search_cache.get(query_lower)
+        if cached is not None and cached[0] == self._search_gen:
+            self._search_cache.move_to_end(query_lower)
+            return [TemplateMetadata(**data) for data in cached[1]]
+
         matching_templates = []
-        
-        for template in all_templates:
+        matching_data = []
+        for template, data in self._list_entries():
             # Search in name, description, and tags
-            searchable_text = f"{template.name} {template.description} {' '.join(template.tags)}".lower()
-            
-            if query_lower in searchable_text:
+            if query_lower in template._search_blob:
                 matching_templates.append(template)
-        
+                matching_data.append(data)
+
+        self._search_cache[query_lower] = (self._search_gen, matching_data)
+        if len(self._search_cache) > _SEARCH_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
         return matching_templates
     
     def get_template_stats(self) -> Dict[str, Any]:
@@ -569,17 +856,33 @@ class TemplateManager:
             Statistics about templates
         """
         all_templates = self.list_templates()
-        
+
+        # Single pass for the counters and subject/grade sets
+        user_count = system_count = shared_count = total_usage = 0
+        subjects = set()
+        grades = set()
+        for t in all_templates:
+            is_user = t.id.startswith("user_")
+            if is_user:
+                user_count += 1
+            if t.is_public:
+                shared_count += 1
+            elif not is_user:
+                system_count += 1
+            total_usage += t.usage_count
+            subjects.update(t.subjects)
+            grades.update(t.grades)
+
         stats = {
             "total_templates": len(all_templates),
-            "user_templates": len([t for t in all_templates if t.id.startswith("user_")]),
-            "system_templates": len([t for t in all_templates if not t.id.startswith("user_") and not t.is_public]),
-            "shared_templates": len([t for t in all_templates if t.is_public]),
-            "total_usage": sum(t.usage_count for t in all_templates),
-            "popular_templates": sorted(all_templates, key=lambda t: t.usage_count, reverse=True)[:5],
-            "recent_templates": sorted(all_templates, key=lambda t: t.created_at, reverse=True)[:5],
-            "subjects": list(set(subject for t in all_templates for subject in t.subjects)),
-            "grades": list(set(grade for t in all_templates for grade in t.grades))
+            "user_templates": user_count,
+            "system_templates": system_count,
+            "shared_templates": shared_count,
+            "total_usage": total_usage,
+            "popular_templates": heapq.nlargest(5, all_templates, key=lambda t: t.usage_count),
+            "recent_templates": heapq.nlargest(5, all_templates, key=lambda t: t.created_at),
+            "subjects": list(subjects),
+            "grades": list(grades)
         }
         
         return stats
\ No newline at end of file
@@ -6,14 +6,26 @@ import threading
 import time
 from typing import Dict, Optional, Callable, Any
 from contextlib import contextmanager
+from functools import lru_cache
 import weakref
 
+
+@lru_cache(maxsize=256)
+def _code_accepts_cancellation(code) -> bool:
+    """Whether a function's parameters include ``cancellation_event``"""
+    params = code.co_varnames[:code.co_argcount + code.co_kwonlyargcount]
+    return 'cancellation_event' in params
+
+
 class ManagedThread(threading.Thread):
     """Thread with cancellation support"""
     
     def __init__(self, target: Callable, args: tuple = (), kwargs: dict = None):
         super().__init__(target=self._wrapped_target, args=args, kwargs=kwargs or {})
-        self._target = target
+        # Kept apart from Thread._target, which must stay the wrapper
+        self._user_target = target
+        code = getattr(target, '__code__', None)
+        self._accepts_cancellation = code is not None and _code_accepts_cancellation(code)
         self._cancelled = threading.Event()
         self._completed = threading.Event()
         self._exception = None
@@ -22,10 +34,10 @@ class ManagedThread(threading.Thread):
         """Wrapper that checks for cancellation"""
         try:
             # Pass cancellation event to target if it accepts it
-            if 'cancellation_event' in self._target.__code__.co_varnames:
+            if self._accepts_cancellation:
                 kwargs['cancellation_event'] = self._cancelled
             
-            self._target(*args, **kwargs)
+            self._user_target(*args, **kwargs)
             self._completed.set()
         except Exception as e:
             self._exception = e
@@ -50,15 +62,20 @@ class ManagedThread(threading.Thread):
     
     def join_with_timeout(self, timeout: float = 5.0) -> bool:
         """Join with timeout and return success status"""
-        self.join(timeout=timeout)
-        return not self.is_alive()
+        # The target finishing is what callers care about; waiting on the
+        # event avoids a join plus a separate liveness check
+        return self._completed.wait(timeout) or not self.is_alive()
 
 
 class ThreadManager:
     """Manages thread lifecycle and cleanup"""
     
     def __init__(self):
-        self._threads: Dict[str, weakref.ref] = {}
+        # Entries drop out on their own once a thread is garbage collected,
+        # so registration never has to scan for dead references
+        self._threads: weakref.WeakValueDictionary[str, ManagedThread] = weakref.WeakValueDictionary()
+        # Guards registration and snapshots only; single-key lookups are
+        # atomic under the GIL and run lock-free
         self._lock = threading.Lock()
     
     def create_thread(self, thread_id: str, target: Callable, *args, **kwargs) -> ManagedThread:
@@ -66,9 +83,7 @@ class ThreadManager:
         thread = ManagedThread(target, args, kwargs)
         
         with self._lock:
-            self._threads[thread_id] = weakref.ref(thread)
-            # Clean up dead references
-            self._cleanup_dead_threads()
+            self._threads[thread_id] = thread
         
         return thread
     
@@ -80,63 +95,49 @@ class ThreadManager:
     
     def cancel_thread(self, thread_id: str) -> bool:
         """Cancel a thread by ID"""
-        with self._lock:
-            thread_ref = self._threads.get(thread_id)
-            if thread_ref:
-                thread = thread_ref()
-                if thread and thread.is_alive():
-                    thread.cancel()
-                    return True
+        thread = self._threads.get(thread_id)
+        if thread and thread.is_alive():
+            thread.cancel()
+            return True
         return False
     
     def wait_for_thread(self, thread_id: str, timeout: float = 5.0) -> bool:
         """Wait for a thread to complete"""
-        with self._lock:
-            thread_ref = self._threads.get(thread_id)
-            if thread_ref:
-                thread = thread_ref()
-                if thread:
-                    return thread.join_with_timeout(timeout)
+        # Joined without the lock so one wait doesn't block every other call
+        thread = self._threads.get(thread_id)
+        if thread:
+            return thread.join_with_timeout(timeout)
         return True
     
     def get_thread_status(self, thread_id: str) -> Optional[Dict[str, Any]]:
         """Get status of a thread"""
-        with self._lock:
-            thread_ref = self._threads.get(thread_id)
-            if thread_ref:
-                thread = thread_ref()
-                if thread:
-                    return {
-                        'alive': thread.is_alive(),
-                        'cancelled': thread.is_cancelled(),
-                        'completed': thread.is_completed(),
-                        'exception': thread.get_exception()
-                    }
+        thread = self._threads.get(thread_id)
+        if thread:
+            return {
+                'alive': thread.is_alive(),
+                'cancelled': thread.is_cancelled(),
+                'completed': thread.is_completed(),
+                'exception': thread.get_exception()
+            }
         return None
     
-    def _cleanup_dead_threads(self):
-        """Remove references to dead threads"""
-        dead_ids = [tid for tid, ref in self._threads.items() if ref() is None]
-        for tid in dead_ids:
-            del self._threads[tid]
-    
     def shutdown(self, timeout: float = 10.0):
         """Cancel all threads and wait for completion"""
         with self._lock:
-            # Cancel all active threads
-            for thread_ref in self._threads.values():
-                thread = thread_ref()
-                if thread and thread.is_alive():
-                    thread.cancel()
-            
-            # Wait for all threads to complete
-            deadline = time.time() + timeout
-            for thread_ref in list(self._threads.values()):
-                thread = thread_ref()
-                if thread and thread.is_alive():
-                    remaining = deadline - time.time()
-                    if remaining > 0:
-                        thread.join(timeout=remaining)
+            threads = list(self._threads.values())
+
+        # Cancel all active threads
+        for thread in threads:
+            if thread.is_alive():
+                thread.cancel()
+        
+        # Wait for all threads to complete
+        deadline = time.time() + timeout
+        for thread in threads:
+            if thread.is_alive():
+                remaining = deadline - time.time()
+                if remaining > 0:
+                    thread.join(timeout=remaining)
     
     @contextmanager
     def managed_thread(self, thread_id: str, target: Callable, *args, **kwargs):
@@ -5,28 +5,98 @@ Migrated from JSON file storage to SQLite database via DatabaseService.
 Maintains backward compatibility with existing username-salted PIN hashes.
 
 Security features:
-- PBKDF2 password hashing with 100,000 iterations
+- Argon2id PIN hashing when argon2-cffi is installed, otherwise PBKDF2
+  with 100,000 iterations; older hashes are upgraded on successful login
 - Rate limiting: 5 attempts per 5 minutes per username
 - Account lockout: 15 minute lockout after 5 failed attempts
 """
 
 import json
 import hashlib
+import os
+import re
 import secrets
+import threading
 import time
+import uuid
 from datetime import datetime
 from pathlib import Path
 from typing import Dict, Optional, Tuple, TYPE_CHECKING
 
+# Optional fast JSON library for badges and legacy user files
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+# Optional Argon2id support; PBKDF2 remains the fallback and legacy format
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import InvalidHashError, VerificationError
+    ARGON2_AVAILABLE = True
+except ImportError:
+    ARGON2_AVAILABLE = False
+
 # Rate limiting configuration
 MAX_ATTEMPTS = 5  # Maximum failed attempts before lockout
 LOCKOUT_DURATION = 900  # 15 minutes in seconds
 ATTEMPT_WINDOW = 300  # 5 minutes in seconds
 
+# PBKDF2-HMAC-SHA256 work factor for 'salt:hash' PIN hashes
+PBKDF2_ITERATIONS = 100_000
+
+# Valid PINs: 4-6 ASCII digits
+_PIN_RE = re.compile(r"\d{4,6}", re.ASCII)
+
+# User row cache: seconds before a cached lookup is re-read, and max entries
+USER_CACHE_TTL = 30
+USER_CACHE_SIZE = 512
+
+# Argon2id parameters (OWASP minimum: 46 MiB memory, 2 passes, 1 lane)
+ARGON2_TIME_COST = 2
+ARGON2_MEMORY_COST = 47104  # KiB
+ARGON2_PARALLELISM = 1
+
 if TYPE_CHECKING:  # For type checkers only; avoids import-time issues
     from services.database_service import DatabaseService
 
 
+def _log_warning(msg: str) -> None:
+    """Report a warning through the app logger, printing if it is unavailable."""
+    try:
+        from src.verbose_logger import get_logger
+        get_logger().log_warning(msg)
+    except Exception:
+        print(f"WARNING: {msg}")
+
+
+def _json_loads(raw):
+    """Parse JSON text or bytes, with orjson when available."""
+    return orjson.loads(raw) if ORJSON_AVAILABLE else json.loads(raw)
+
+
+def _json_dumps(obj) -> str:
+    """Serialize to compact JSON text for a TEXT column."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj).decode()
+    return json.dumps(obj, separators=(",", ":"))
+
+
+def _pin_secret(username: str, pin: str) -> bytes:
+    """The 'username:pin' buffer every PIN hash format is computed over."""
+    return f"{username.lower()}:{pin}".encode()
+
+
+def _derive_pin_key(combined: bytes, salt: bytes) -> bytes:
+    """PBKDF2-HMAC-SHA256 key for a 'username:pin' buffer.
+
+    hashlib hands the whole loop to OpenSSL, which keys the HMAC once and
+    reuses the inner/outer pad states for every iteration.
+    """
+    return hashlib.pbkdf2_hmac("sha256", combined, salt, PBKDF2_ITERATIONS)
+
+
 class UserService:
     """Database-backed user management with simple PIN authentication."""
 
@@ -34,13 +104,58 @@ class UserService:
     _failed_attempts: Dict[str, list] = {}  # username -> list of timestamps
     _lockouts: Dict[str, float] = {}  # username -> lockout expiry timestamp
 
+    # Guards the one-time JSON user import (see _migrate_existing_users)
+    _migration_lock = threading.Lock()
+
+    # Class-level user row cache (shared so every instance sees invalidations)
+    # (db_path, username) -> (expiry monotonic time, user row)
+    _user_cache: Dict[Tuple[str, str], Tuple[float, Dict]] = {}
+    # Guards _user_cache; Streamlit session threads share it
+    _user_cache_lock = threading.Lock()
+
     def __init__(self, users_dir: str = "users", db_path: str = "instaschool.db") -> None:
         from services.database_service import DatabaseService
 
         self.users_dir = Path(users_dir)
         self.users_dir.mkdir(exist_ok=True)  # Keep for backward compatibility
         self.db = DatabaseService(db_path)
-        self._migrate_existing_users()
+        self._ph = PasswordHasher(
+            time_cost=ARGON2_TIME_COST,
+            memory_cost=ARGON2_MEMORY_COST,
+            parallelism=ARGON2_PARALLELISM,
+        ) if ARGON2_AVAILABLE else None
+
+        # The cheap "is there anything to migrate" check runs here so users
+        # created right after startup can't make the import skip itself;
+        # the file parsing and insert run in the background
+        self._migration_thread: Optional[threading.Thread] = None
+        json_files = self._pending_migration_files()
+        if json_files:
+            self._migration_thread = threading.Thread(
+                target=self._migrate_existing_users,
+                args=(json_files,),
+                name="user-migration",
+                daemon=True,
+            )
+            self._migration_thread.start()
+
+    def _wait_for_migration(self, timeout: Optional[float] = None) -> bool:
+        """Wait for a background JSON import, if one is running.
+
+        Every lookup and create goes through this first: until the import
+        lands, legacy users look missing, and a profile re-created under
+        their name would make the import drop their PIN, XP and badges.
+
+        Returns:
+            True once no migration is running
+        """
+        thread = self._migration_thread
+        if thread is not None:
+            thread.join(timeout)
+            if thread.is_alive():
+                return False
+            self._migration_thread = None
+        return True
 
     def _check_rate_limit(self, username: str) -> Tuple[bool, str]:
         """Check if user is rate limited or locked out.
@@ -96,30 +211,119 @@ class UserService:
         self._failed_attempts.pop(username_lower, None)
         self._lockouts.pop(username_lower, None)
 
-    def _hash_pin_legacy(self, username: str, pin: str) -> str:
-        """Legacy PIN hash using simple SHA-256 with username salt."""
-        combined = f"{username.lower()}:{pin}"
-        return hashlib.sha256(combined.encode()).hexdigest()
+    def _get_user_cached(self, username: str) -> Optional[Dict]:
+        """Look up a user row by username, served from a short-lived cache.
+
+        Rows are cached for USER_CACHE_TTL seconds; writes made through this
+        service invalidate them immediately. Misses are not cached.
+        """
+        self._wait_for_migration()
+        key = (self.db.db_path, username)
+        now = time.monotonic()
+        with self._user_cache_lock:
+            entry = self._user_cache.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+
+        # The query runs outside the lock so other sessions aren't blocked on it
+        user = self.db.get_user_by_username(username)
+        with self._user_cache_lock:
+            if user:
+                if key not in self._user_cache and len(self._user_cache) >= USER_CACHE_SIZE:
+                    # Evict the oldest entry (dicts keep insertion order)
+                    self._user_cache.pop(next(iter(self._user_cache)), None)
+                self._user_cache[key] = (now + USER_CACHE_TTL, user)
+            else:
+                self._user_cache.pop(key, None)
+        return user
+
+    def _peek_cached_user(self, username: str) -> Optional[Dict]:
+        """Return a fresh cached user row without querying on a miss."""
+        with self._user_cache_lock:
+            entry = self._user_cache.get((self.db.db_path, username))
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1]
+        return None
+
+    def _invalidate_user(self, username: str) -> None:
+        """Drop a cached user row after it has been written."""
+        with self._user_cache_lock:
+            self._user_cache.pop((self.db.db_path, username), None)
+
+    @staticmethod
+    def _badges(user: Dict) -> list:
+        """Parsed badges column for a user row, memoized on the row."""
+        badges = user.get("_badges_parsed")
+        if badges is not None:
+            return badges
+
+        raw = user.get("badges")
+        if isinstance(raw, (str, bytes)):
+            try:
+                badges = _json_loads(raw)
+            except ValueError:
+                badges = []
+        else:
+            badges = raw
+        if not isinstance(badges, list):
+            badges = []
+        user["_badges_parsed"] = badges
+        return badges
 
     def _hash_pin(self, username: str, pin: str) -> str:
-        """Hash PIN using PBKDF2 with a random salt.
+        """Hash PIN with Argon2id, or PBKDF2 with a random salt.
 
-        Returns a hex-encoded 'salt:hash' string.
+        Returns an Argon2 PHC string ('$argon2id$...') when argon2-cffi is
+        installed, otherwise a hex-encoded 'salt:hash' string.
         """
-        combined = f"{username.lower()}:{pin}".encode()
+        return self._hash_pin_from_combined(_pin_secret(username, pin))
+
+    def _hash_pin_from_combined(self, combined: bytes) -> str:
+        """Hash an already-built 'username:pin' buffer (see _hash_pin)."""
+        if self._ph is not None:
+            return self._ph.hash(combined)
+
         salt = secrets.token_bytes(32)
-        key = hashlib.pbkdf2_hmac("sha256", combined, salt, 100_000)
+        key = _derive_pin_key(combined, salt)
         return f"{salt.hex()}:{key.hex()}"
 
+    def _upgrade_pin_hash(self, user: Dict, combined: bytes) -> None:
+        """Re-hash a verified PIN buffer with the current scheme and store it."""
+        try:
+            new_hash = self._hash_pin_from_combined(combined)
+            self.db.update_user(user["id"], pin_hash=new_hash)
+            self._invalidate_user(user.get("username", ""))
+        except Exception:
+            # Migration failure should not block a successful login
+            pass
+
     def _verify_and_maybe_upgrade_pin(self, user: Dict, pin: str) -> bool:
-        """Verify PIN against stored hash and upgrade legacy hashes to PBKDF2."""
+        """Verify PIN against stored hash and upgrade older hashes.
+
+        Legacy SHA-256 and PBKDF2 hashes (and Argon2 hashes with outdated
+        parameters) are re-hashed with the current scheme on success.
+        """
         stored_hash = user.get("pin_hash")
         if not stored_hash or pin is None:
             return False
 
-        username = user.get("username", "")
+        # Built once and shared by every format check and the upgrade
+        combined = _pin_secret(user.get("username", ""), pin)
+
+        # Argon2 PHC format: '$argon2id$...'
+        if stored_hash.startswith("$argon2"):
+            if self._ph is None:
+                _log_warning("Argon2 PIN hash found but argon2-cffi is not installed")
+                return False
+            try:
+                self._ph.verify(stored_hash, combined)
+            except (VerificationError, InvalidHashError):
+                return False
+            if self._ph.check_needs_rehash(stored_hash):
+                self._upgrade_pin_hash(user, combined)
+            return True
 
-        # New format: 'salt:hash'
+        # PBKDF2 format: 'salt:hash'
         if ":" in stored_hash:
             try:
                 salt_hex, key_hex = stored_hash.split(":", 1)
@@ -129,82 +333,106 @@ class UserService:
                 # Malformed hash: treat as failure
                 return False
 
-            combined = f"{username.lower()}:{pin}".encode()
-            computed_key = hashlib.pbkdf2_hmac("sha256", combined, salt, 100_000)
-            return secrets.compare_digest(computed_key, stored_key)
+            computed_key = _derive_pin_key(combined, salt)
+            if not secrets.compare_digest(computed_key, stored_key):
+                return False
+            if self._ph is not None:
+                self._upgrade_pin_hash(user, combined)
+            return True
 
-        # Legacy SHA-256 format
-        if self._hash_pin_legacy(username, pin) == stored_hash:
-            # Migrate to PBKDF2 format on successful verification
-            try:
-                new_hash = self._hash_pin(username, pin)
-                self.db.update_user(user["id"], pin_hash=new_hash)
-            except Exception:
-                # Migration failure should not block a successful login
-                pass
+        # Legacy SHA-256 format: 64 hex chars; anything else can't match.
+        # Compared as raw digests, so no hex string is built per attempt.
+        if len(stored_hash) != 64:
+            return False
+        try:
+            stored_digest = bytes.fromhex(stored_hash)
+        except ValueError:
+            return False
+        if secrets.compare_digest(hashlib.sha256(combined).digest(), stored_digest):
+            # Migrate to the current format on successful verification
+            self._upgrade_pin_hash(user, combined)
             return True
 
         return False
 
-    def _generate_user_id(self, username: str) -> str:
-        """Generate a unique user ID from username."""
-        return hashlib.md5(username.lower().encode()).hexdigest()[:8]
+    def _pending_migration_files(self) -> list:
+        """Legacy JSON user files still to import, or [] if there are none.
 
-    def _migrate_existing_users(self) -> None:
-        """One-time migration: Move existing JSON user files to SQLite database."""
+        Files are only imported into an empty database.
+        """
         try:
-            # Check if any JSON files exist
-            json_files = list(self.users_dir.glob("*.json"))
+            # Check if any JSON files exist (scandir avoids a stat per entry)
+            with os.scandir(self.users_dir) as entries:
+                json_files = [
+                    entry.path for entry in entries
+                    if entry.name.endswith(".json") and entry.is_file()
+                ]
             if not json_files:
-                return  # No files to migrate
+                return []  # No files to migrate
 
             # Check if migration already done (users exist in DB)
-            existing_users = self.db.list_users()
-            if existing_users:
-                return  # Migration already completed
+            if self.db.fetch_one("SELECT 1 FROM users LIMIT 1"):
+                return []  # Migration already completed
 
+            return json_files
+
+        except Exception as e:
+            print(f"Migration error: {e}")
+            return []
+
+    def _migrate_existing_users(self, json_files: list) -> None:
+        """One-time migration: Move existing JSON user files to SQLite database."""
+        # Serialize imports from instances created at the same time;
+        # duplicate usernames are skipped by the insert either way
+        with self._migration_lock:
+            self._import_user_files(json_files)
+
+    def _import_user_files(self, json_files: list) -> None:
+        """Parse legacy JSON user files and insert them in one transaction."""
+        try:
             print(f"Migrating {len(json_files)} user(s) from JSON to database...")
 
-            migrated = 0
+            rows = []
             for user_file in json_files:
                 try:
-                    with open(user_file, "r", encoding="utf-8") as f:
-                        user_data = json.load(f)
+                    with open(user_file, "rb") as f:
+                        raw = f.read()
+                    user_data = _json_loads(raw)
 
                     # Extract user info
                     username = user_data.get("username")
                     if not username:
                         continue
 
-                    # Create user in database with existing PIN hash
-                    # Note: DatabaseService create_user expects pin_hash parameter
-                    result = self.db.create_user(
-                        username=username,
-                        pin_hash=user_data.get("pin_hash")  # Keep existing hash
-                    )
-
-                    if result:
-                        user_id = result["id"]
-                        
-                        # Update additional fields
-                        self.db.update_user(
-                            user_id,
-                            total_xp=user_data.get("total_xp", 0),
-                            last_login=user_data.get("last_login"),
-                            preferences=json.dumps({
-                                "badges": user_data.get("badges", []),
-                                "has_pin": user_data.get("has_pin", False),
-                                "created_at": user_data.get("created_at")
-                            })
-                        )
-                        
-                        migrated += 1
-                        print(f"  ✓ Migrated user: {username}")
+                    # Keep the existing PIN hash; it is upgraded on next login
+                    rows.append((
+                        uuid.uuid4().hex,
+                        username,
+                        user_data.get("pin_hash"),
+                        user_data.get("total_xp", 0),
+                        user_data.get("last_login"),
+                        _json_dumps(user_data.get("badges", [])),
+                        int(bool(user_data.get("pin_hash")) or bool(user_data.get("has_pin"))),
+                        user_data.get("created_at"),
+                    ))
 
                 except Exception as e:
-                    print(f"  ✗ Error migrating {user_file.name}: {e}")
+                    print(f"  ✗ Error migrating {os.path.basename(user_file)}: {e}")
                     continue
 
+            # One transaction for every user; duplicate usernames are skipped
+            migrated = 0
+            if rows:
+                migrated = max(0, self.db.executemany_rowcount(
+                    """
+                    INSERT OR IGNORE INTO users
+                        (id, username, pin_hash, total_xp, last_login,
+                         badges, has_pin, created_at)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))
+                    """,
+                    rows,
+                ))
+
             print(f"Migration complete: {migrated}/{len(json_files)} users migrated")
 
         except Exception as e:
@@ -232,7 +460,7 @@ class UserService:
             return None, f"rate_limited:{rate_msg}"
 
         # Get user from database
-        user = self.db.get_user_by_username(username)
+        user = self._get_user_cached(username)
 
         if user:
             # Check if user has a PIN set
@@ -249,11 +477,12 @@ class UserService:
             # Successful login - clear any failed attempts
             self._clear_failed_attempts(username)
 
-            # Update last login
-            self.db.update_last_login(user["id"])
-
-            # Reload user to get updated timestamp
-            user = self.db.get_user(user["id"])
+            # Update last login, keeping the new timestamp locally instead of
+            # reloading the row
+            last_login = datetime.now().isoformat()
+            self.db.update_user(user["id"], last_login=last_login)
+            self._invalidate_user(username)
+            user = {**user, "last_login": last_login}
 
             # Format response to match expected structure
             return self._format_user_response(user), "success"
@@ -272,32 +501,23 @@ class UserService:
         Returns:
             Tuple of (user_data, message)
         """
-        # Check if user already exists
-        existing_user = self.db.get_user_by_username(username)
+        # Check if user already exists (legacy users included, see
+        # _wait_for_migration)
+        self._wait_for_migration()
+        existing_user = self._get_user_cached(username)
         if existing_user:
             return {}, "user_exists"
 
         # Create PIN hash if provided (secure PBKDF2 with per-user salt)
         pin_hash = self._hash_pin(username, pin) if pin else None
 
-        # Create user in database
+        # Create user in database; badges default to [] and has_pin follows
+        # the hash, so no follow-up update is needed
         user = self.db.create_user(username=username, pin_hash=pin_hash)
+        self._invalidate_user(username)
         
         if not user:
             return {}, "creation_failed"
-
-        # Initialize preferences with backward-compatible structure
-        self.db.update_user(
-            user["id"],
-            preferences=json.dumps({
-                "badges": [],
-                "has_pin": bool(pin),
-                "created_at": user.get("created_at")
-            })
-        )
-
-        # Reload user with preferences
-        user = self.db.get_user(user["id"])
         
         return self._format_user_response(user), "created"
 
@@ -314,7 +534,7 @@ class UserService:
             Tuple of (success, message)
         """
         # Get user from database
-        user = self.db.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             return False, "user_not_found"
 
@@ -325,32 +545,25 @@ class UserService:
         elif user.get("pin_hash") and not old_pin:
             return False, "old_pin_required"
 
-        # Validate new PIN
-        if not new_pin or len(new_pin) < 4 or len(new_pin) > 6:
-            return False, "invalid_new_pin"
-        if not new_pin.isdigit():
+        # Validate new PIN in one match; the checks below only pick the message
+        if not new_pin or _PIN_RE.fullmatch(new_pin) is None:
+            if not new_pin or len(new_pin) < 4 or len(new_pin) > 6:
+                return False, "invalid_new_pin"
             return False, "pin_must_be_digits"
 
         # Set new PIN (secure hash)
         new_pin_hash = self._hash_pin(username, new_pin)
         
         # Update user in database
-        success = self.db.update_user(user["id"], pin_hash=new_pin_hash)
-        
-        if success:
-            # Update preferences to reflect PIN status
-            prefs = user.get("preferences", {})
-            if isinstance(prefs, str):
-                prefs = json.loads(prefs)
-            prefs["has_pin"] = True
-            self.db.update_user(user["id"], preferences=json.dumps(prefs))
+        success = self.db.update_user(user["id"], pin_hash=new_pin_hash, has_pin=1)
+        self._invalidate_user(username)
             
         return success, "pin_updated" if success else "update_failed"
 
     def remove_pin(self, username: str, current_pin: str) -> Tuple[bool, str]:
         """Remove PIN from user account (revert to profile switching)."""
         # Get user from database
-        user = self.db.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             return False, "user_not_found"
 
@@ -360,33 +573,30 @@ class UserService:
                 return False, "invalid_pin"
 
         # Remove PIN from database
-        success = self.db.update_user(user["id"], pin_hash=None)
-        
-        if success:
-            # Update preferences to reflect PIN removal
-            prefs = user.get("preferences", {})
-            if isinstance(prefs, str):
-                prefs = json.loads(prefs)
-            prefs["has_pin"] = False
-            self.db.update_user(user["id"], preferences=json.dumps(prefs))
+        success = self.db.update_user(user["id"], pin_hash=None, has_pin=0)
+        self._invalidate_user(username)
             
         return success, "pin_removed" if success else "update_failed"
 
     def user_exists(self, username: str) -> bool:
         """Check if a user exists."""
-        user = self.db.get_user_by_username(username)
-        return user is not None
+        self._wait_for_migration()
+        user = self._peek_cached_user(username)
+        if user is not None:
+            return True
+        return self.db.user_exists(username)
 
     def user_has_pin(self, username: str) -> bool:
         """Check if a user has a PIN set."""
-        user = self.db.get_user_by_username(username)
-        if not user:
-            return False
-        return bool(user.get("pin_hash"))
+        self._wait_for_migration()
+        user = self._peek_cached_user(username)
+        if user is not None:
+            return bool(user.get("pin_hash"))
+        return self.db.user_has_pin(username)
 
     def get_user(self, username: str) -> Optional[Dict]:
         """Get user data without authentication (for display purposes only)."""
-        user = self.db.get_user_by_username(username)
+        user = self._get_user_cached(username)
         if not user:
             return None
 
@@ -395,36 +605,22 @@ class UserService:
         response.pop("pin_hash", None)
         return response
 
-    def _save_user(self, user_data: Dict) -> None:
-        """DEPRECATED: Kept for backward compatibility during migration."""
-        # This method is no longer used as we now use DatabaseService
-        pass
-
     def list_users(self) -> list:
         """List all users with metadata (for profile switching UI).
 
         Returns:
             List of dicts with username, has_pin, total_xp keys.
         """
-        db_users = self.db.list_users()
-
-        users = []
-        for user in db_users:
-            # Extract preferences
-            prefs = user.get("preferences", {})
-            if isinstance(prefs, str):
-                try:
-                    prefs = json.loads(prefs)
-                except json.JSONDecodeError:
-                    prefs = {}
-
-            users.append({
+        self._wait_for_migration()
+        # Already ordered case-insensitively by the query
+        return [
+            {
                 "username": user.get("username"),
-                "has_pin": bool(user.get("pin_hash")) or prefs.get("has_pin", False),
+                "has_pin": bool(user.get("pin_hash")) or bool(user.get("has_pin")),
                 "total_xp": user.get("total_xp", 0),
-            })
-
-        return sorted(users, key=lambda x: x.get("username", "").lower())
+            }
+            for user in self.db.list_users_by_name()
+        ]
 
     def list_usernames(self) -> list:
         """List all usernames as simple strings.
@@ -434,28 +630,20 @@ class UserService:
         Returns:
             List of username strings, sorted alphabetically.
         """
-        db_users = self.db.list_users()
-        usernames = [user.get("username") for user in db_users if user.get("username")]
-        return sorted(usernames, key=str.lower)
+        self._wait_for_migration()
+        return self.db.list_usernames()
 
     def _format_user_response(self, user: Dict) -> Dict:
         """Format database user record to match expected response structure."""
-        # Parse preferences if it's a JSON string
-        prefs = user.get("preferences", {})
-        if isinstance(prefs, str):
-            try:
-                prefs = json.loads(prefs)
-            except json.JSONDecodeError:
-                prefs = {}
-        
         # Build response with backward-compatible structure
         return {
             "id": user.get("id"),
             "username": user.get("username"),
-            "created_at": prefs.get("created_at") or user.get("created_at"),
+            "created_at": user.get("created_at"),
             "last_login": user.get("last_login"),
-            "badges": prefs.get("badges", []),
+            # Copied: the parsed list is shared with the cached row
+            "badges": list(self._badges(user)),
             "total_xp": user.get("total_xp", 0),
             "pin_hash": user.get("pin_hash"),
-            "has_pin": bool(user.get("pin_hash")) or prefs.get("has_pin", False),
+            "has_pin": bool(user.get("pin_hash")) or bool(user.get("has_pin")),
         }
@@ -29,6 +29,10 @@ except ImportError:
     print("Warning: matplotlib not installed, chart generation will not work.")
     MATPLOTLIB_AVAILABLE = False
 
+# pyplot keeps global figure state and is not thread-safe; topics render
+# charts from concurrent worker threads.
+_PYPLOT_LOCK = threading.Lock()
+
 
 class OrchestratorAgent(BaseAgent):
     """Main agent that coordinates the curriculum generation process"""
@@ -208,24 +212,28 @@ class OrchestratorAgent(BaseAgent):
             "units": []
         }
         
-        # Process each topic concurrently or sequentially as needed
-        for i, topic in enumerate(topics):
-            # Check for cancellation
+        # Process topics concurrently; every LLM call is network-bound, so a
+        # small pool overlaps the waits. Units are still committed in outline
+        # order, and callbacks run under a lock so checkpoints never observe a
+        # half-updated curriculum.
+        topic_concurrency = max(1, int(config["defaults"].get("topic_concurrency", 3)))
+        total_topics = len(topics)
+        finished: Dict[int, Dict[str, Any]] = {}
+        state_lock = threading.Lock()
+
+        def run_topic(i: int, topic: Dict[str, Any]) -> Optional[Dict[str, Any]]:
             if is_cancelled():
-                print(f"Generation cancelled after processing {i} of {len(topics)} topics")
-                curriculum["meta"]["cancelled"] = True
-                report("cancelled", phase="topics", total_topics=len(topics), topics_completed=i)
-                return curriculum  # Return what we have so far
-
-            # Provide detailed instructions to content agent based on plan
-            report(
-                "topic_start",
-                topic_index=i,
-                total_topics=len(topics),
-                topics_completed=i,
-                topic_title=topic.get("title", "Untitled Topic"),
-            )
-            unit = self._process_topic(
+                return None
+            with state_lock:
+                # Provide detailed instructions to content agent based on plan
+                report(
+                    "topic_start",
+                    topic_index=i,
+                    total_topics=total_topics,
+                    topics_completed=len(finished),
+                    topic_title=topic.get("title", "Untitled Topic"),
+                )
+            return self._process_topic(
                 topic,
                 subject,
                 grade,
@@ -241,22 +249,65 @@ class OrchestratorAgent(BaseAgent):
                 config,
                 cancellation_event=cancellation_event,
             )
-            curriculum["units"].append(unit)
+
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=topic_concurrency, thread_name_prefix="instaschool_topic"
+        ) as executor:
+            # Propagate contextvars (trace hook, etc.) into worker threads.
+            futures = {
+                executor.submit(contextvars.copy_context().run, run_topic, i, topic): i
+                for i, topic in enumerate(topics)
+            }
+            for future in concurrent.futures.as_completed(futures):
+                if future.cancelled():
+                    continue
+                i = futures[future]
+                unit = future.result()
+                if unit is None:
+                    continue
+                with state_lock:
+                    finished[i] = unit
+                    report(
+                        "topic_done",
+                        topic_index=i,
+                        total_topics=total_topics,
+                        topics_completed=len(finished),
+                        topic_title=topics[i].get("title", "Untitled Topic"),
+                    )
+
+                    # Extend the ordered prefix of units and checkpoint it
+                    next_index = len(curriculum["units"])
+                    if next_index in finished:
+                        while next_index in finished:
+                            curriculum["units"].append(finished[next_index])
+                            next_index += 1
+
+                        # Checkpoint: save partial progress for resilience
+                        if checkpoint_callback is not None:
+                            try:
+                                checkpoint_callback(curriculum)
+                            except Exception:
+                                # Never let checkpoint failures break generation
+                                pass
+
+                if is_cancelled():
+                    for pending in futures:
+                        pending.cancel()
+
+        # Check for cancellation
+        if is_cancelled() and len(finished) < total_topics:
+            print(f"Generation cancelled after processing {len(finished)} of {total_topics} topics")
+            # Keep only the contiguous ordered prefix already committed above;
+            # topics that finished after a gap are dropped, as a sequential
+            # run would never have reached them
+            curriculum["meta"]["cancelled"] = True
             report(
-                "topic_done",
-                topic_index=i,
-                total_topics=len(topics),
-                topics_completed=i + 1,
-                topic_title=topic.get("title", "Untitled Topic"),
+                "cancelled",
+                phase="topics",
+                total_topics=total_topics,
+                topics_completed=len(curriculum["units"]),
             )
-
-            # Checkpoint: save partial progress for resilience
-            if checkpoint_callback is not None:
-                try:
-                    checkpoint_callback(curriculum)
-                except Exception:
-                    # Never let checkpoint failures break generation
-                    pass
+            return curriculum  # Return what we have so far
 
         # Check for cancellation before refinement
         if is_cancelled():
@@ -308,11 +359,10 @@ class OrchestratorAgent(BaseAgent):
     ):
         """Process a single topic with parallel execution of auxiliary agents.
 
-        Performance optimization: After generating core content (blocking),
-        auxiliary agents (media, chart, quiz, summary, resources) run in parallel
-        since they depend on content but not on each other.
-
-        Expected speedup: 40-60% reduction in per-topic processing time.
+        Performance optimization: chart, quiz, summary and resources only need
+        the topic title, so they run in parallel with core content generation.
+        Media is the only step that depends on the content (its image prompt
+        is derived from the lesson) and is submitted once content is ready.
         """
         topic_title = topic.get("title", "Untitled Topic")
 
@@ -329,31 +379,22 @@ class OrchestratorAgent(BaseAgent):
             "resources": ""
         }
 
-        # 1. Generate CORE content first (Blocking) - other agents need this
-        unit["content"] = content_agent.generate_content(
-            topic_title, subject, grade, style, extra, language,
-            config["defaults"]["include_keypoints"]
-        )
-
-        # Store references for closures
-        content = unit["content"]
         media_richness = config["defaults"]["media_richness"]
 
-        # 2. Define parallel tasks as closures
-        def run_media():
+        # 1. Define parallel tasks as closures
+        def run_media(content, custom_prompt=None):
             """Generate images with content-aware prompts (slowest operation)."""
             if cancellation_event is not None and cancellation_event.is_set():
                 return []
             if media_richness >= 2 and content:
                 num_images = 3 if media_richness >= 5 else 1
                 try:
-                    # Create an image prompt agent with the same model as the worker
-                    image_prompt_agent = ImagePromptAgent(self.client, self.worker_model, config)
-
-                    # Generate a custom prompt based on the actual content
-                    custom_prompt = image_prompt_agent.create_image_prompt(
-                        content, topic_title, subject, grade, style, language
-                    )
+                    if not custom_prompt:
+                        # Content call did not return a prompt; derive one from the lesson
+                        image_prompt_agent = ImagePromptAgent(self.client, self.worker_model, config)
+                        custom_prompt = image_prompt_agent.create_image_prompt(
+                            content, topic_title, subject, grade, style, language
+                        )
 
                     if not custom_prompt:
                         print("Warning: Could not generate custom image prompt, using default template")
@@ -421,19 +462,35 @@ class OrchestratorAgent(BaseAgent):
                     print(f"Error in resources generation: {e}")
             return ""
 
-        # 3. Execute parallel tasks using ThreadPoolExecutor
-        # Using 5 workers for 5 independent tasks (media, chart, quiz, summary, resources)
+        # 2. Execute parallel tasks using ThreadPoolExecutor
+        # Using 5 workers: 4 title-only tasks plus media once content is ready
         if cancellation_event is not None and cancellation_event.is_set():
             return unit
 
         with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
             # Propagate contextvars (trace hook, etc.) into worker threads.
-            future_media = executor.submit(contextvars.copy_context().run, run_media)
             future_chart = executor.submit(contextvars.copy_context().run, run_chart)
             future_quiz = executor.submit(contextvars.copy_context().run, run_quiz)
             future_summary = executor.submit(contextvars.copy_context().run, run_summary)
             future_resources = executor.submit(contextvars.copy_context().run, run_resources)
 
+            # 3. Generate CORE content on this thread while the others run.
+            # When images are wanted, the image prompt comes back in the same call.
+            image_prompt = None
+            if media_richness >= 2:
+                unit["content"], image_prompt = content_agent.generate_content_with_image_prompt(
+                    topic_title, subject, grade, style, extra, language,
+                    config["defaults"]["include_keypoints"]
+                )
+            else:
+                unit["content"] = content_agent.generate_content(
+                    topic_title, subject, grade, style, extra, language,
+                    config["defaults"]["include_keypoints"]
+                )
+            future_media = executor.submit(
+                contextvars.copy_context().run, run_media, unit["content"], image_prompt
+            )
+
             # Collect results (will block until each completes)
             # Using result() with no timeout - let individual tasks handle their own timeouts
             images = future_media.result()
@@ -526,6 +583,21 @@ class OutlineAgent(BaseAgent):
 class ContentAgent(BaseAgent):
     """Agent responsible for generating the main lesson content"""
 
+    # Appended to the content prompt when an illustration prompt is requested
+    # alongside the lesson (see generate_content_with_image_prompt).
+    IMAGE_PROMPT_INSTRUCTION = """
+
+    Also write an image prompt (150-250 words) for an illustration that supports this exact lesson.
+    - Visualize the most important or most abstract concept you actually explained, not general facts about "{topic}".
+    - Be concrete: name the elements to show, their arrangement, colors and mood.
+    - Match grade {grade} visual complexity, the {style} teaching style and {language} cultural context.
+    - No text inside the image unless essential.
+
+    Output **only** a valid JSON object with two string keys:
+    - "content": the complete Markdown lesson described above
+    - "image_prompt": the image prompt
+    """
+
     def __init__(self, client, model, config):
         super().__init__(client, model)
         self.prompt_template = config["prompts"].get("content", "")
@@ -548,29 +620,9 @@ class ContentAgent(BaseAgent):
             str: Complete content (when stream=False)
             Generator[str, None, str]: Content chunks generator (when stream=True)
         """
-        # Create cache parameters
-        cache_params = {
-            'topic': topic,
-            'subject': subject,
-            'grade': grade,
-            'style': style,
-            'extra': extra,
-            'language': language,
-            'include_keypoints': include_keypoints
-        }
-
-        keypoints_instruction = "Include a concise list of key takeaways or learning points at the end, formatted with Markdown bullet points." if include_keypoints else ""
-
-        sys_prompt = self.prompt_template.format(
-            topic=topic or "[Topic Missing]",
-            subject=subject or "[Subject Missing]",
-            grade=grade or "[Grade Missing]",
-            style=style or "[Style Missing]",
-            extra=extra or "[No Extra Guidelines]",
-            language=language or "English",
-            include_keypoints_instruction=keypoints_instruction
+        cache_params, sys_prompt = self._build_prompt(
+            topic, subject, grade, style, extra, language, include_keypoints
         )
-
         messages = [{"role": "system", "content": sys_prompt}]
 
         # If streaming is requested, use the streaming method
@@ -593,6 +645,94 @@ class ContentAgent(BaseAgent):
             print(f"Content generation error: {e}")
             return f"[Error: Content generation failed - {str(e)}]"
 
+    def generate_content_with_image_prompt(
+        self, topic, subject, grade, style, extra, language, include_keypoints
+    ) -> Tuple[str, Optional[str]]:
+        """Generate lesson content and a matching image prompt in one call.
+
+        Saves the separate ImagePromptAgent round trip that would otherwise
+        sit between content and image generation.
+
+        Args:
+            topic: The topic to generate content for
+            subject: The subject area
+            grade: The grade level
+            style: The teaching style
+            extra: Additional requirements/guidelines
+            language: The language for content
+            include_keypoints: Whether to include key takeaways
+
+        Returns:
+            Tuple of (content, image_prompt). image_prompt is None when the
+            model did not return one, so callers can fall back to
+            ImagePromptAgent.
+        """
+        cache_params, sys_prompt = self._build_prompt(
+            topic, subject, grade, style, extra, language, include_keypoints
+        )
+        messages = [{"role": "system", "content": sys_prompt + self.IMAGE_PROMPT_INSTRUCTION.format(
+            topic=topic or "[Topic Missing]",
+            grade=grade or "[Grade Missing]",
+            style=style or "[Style Missing]",
+            language=language or "English",
+        )}]
+
+        try:
+            response = self._call_model_cached(
+                "illustrated_content",
+                cache_params,
+                messages,
+                response_format={"type": "json_object"},
+                temperature=0.7
+            )
+
+            if not (response and response.choices):
+                return "", None
+            raw = response.choices[0].message.content
+            data = parse_json_relaxed(raw)
+            if not isinstance(data, dict) or not isinstance(data.get("content"), str):
+                # Model ignored the JSON instruction; treat the reply as the lesson
+                print("Content JSON parse error; using raw response without image prompt")
+                return raw or "", None
+
+            image_prompt = data.get("image_prompt")
+            if not isinstance(image_prompt, str) or not image_prompt.strip():
+                image_prompt = None
+            return data["content"], image_prompt
+        except Exception as e:
+            print(f"Content generation error: {e}")
+            return f"[Error: Content generation failed - {str(e)}]", None
+
+    def _build_prompt(self, topic, subject, grade, style, extra, language, include_keypoints):
+        """Build cache parameters and the system prompt for a lesson.
+
+        Returns:
+            Tuple of (cache_params, system_prompt)
+        """
+        # Create cache parameters
+        cache_params = {
+            'topic': topic,
+            'subject': subject,
+            'grade': grade,
+            'style': style,
+            'extra': extra,
+            'language': language,
+            'include_keypoints': include_keypoints
+        }
+
+        keypoints_instruction = "Include a concise list of key takeaways or learning points at the end, formatted with Markdown bullet points." if include_keypoints else ""
+
+        sys_prompt = self.prompt_template.format(
+            topic=topic or "[Topic Missing]",
+            subject=subject or "[Subject Missing]",
+            grade=grade or "[Grade Missing]",
+            style=style or "[Style Missing]",
+            extra=extra or "[No Extra Guidelines]",
+            language=language or "English",
+            include_keypoints_instruction=keypoints_instruction
+        )
+        return cache_params, sys_prompt
+
     def _generate_content_streaming(self, messages, cache_params):
         """Internal method for streaming content generation.
 
@@ -625,7 +765,7 @@ class ContentAgent(BaseAgent):
 
             # Cache the complete response
             if full_response and self.cache:
-                self.cache.content_cache.cache_content("content", cache_params, full_response)
+                self.cache.cache_content("content", cache_params, full_response)
 
             return full_response
 
@@ -948,72 +1088,73 @@ class ChartAgent(BaseAgent):
             print("Cannot create chart: matplotlib is not installed.")
             return {"title": title, "b64": None, "error": "matplotlib not installed", "chart_type": "matplotlib"}
 
-        fig = None
-        try:
-            fig, ax = plt.subplots(figsize=(6, 4))
+        with _PYPLOT_LOCK:
+            fig = None
+            try:
+                fig, ax = plt.subplots(figsize=(6, 4))
 
-            # For pie charts, ensure all values are positive
-            if chart_type == "Pie":
-                values = [max(0.1, abs(v)) for v in values]
+                # For pie charts, ensure all values are positive
+                if chart_type == "Pie":
+                    values = [max(0.1, abs(v)) for v in values]
 
-            if chart_type == "Bar":
-                ax.bar(labels, values, color='skyblue')
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
-                # Add value labels on top of bars
-                for i, v in enumerate(values):
-                    ax.text(i, v, str(v), ha='center', va='bottom')
+                if chart_type == "Bar":
+                    ax.bar(labels, values, color='skyblue')
+                    ax.set_xlabel(x_label)
+                    ax.set_ylabel(y_label)
+                    # Add value labels on top of bars
+                    for i, v in enumerate(values):
+                        ax.text(i, v, str(v), ha='center', va='bottom')
                     
-            elif chart_type == "Line":
-                ax.plot(labels, values, marker='o', linestyle='-', color='green')
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
-                # Add data point labels
-                for i, v in enumerate(values):
-                    ax.text(i, v, str(v), ha='center', va='bottom')
+                elif chart_type == "Line":
+                    ax.plot(labels, values, marker='o', linestyle='-', color='green')
+                    ax.set_xlabel(x_label)
+                    ax.set_ylabel(y_label)
+                    # Add data point labels
+                    for i, v in enumerate(values):
+                        ax.text(i, v, str(v), ha='center', va='bottom')
                     
-            elif chart_type == "Pie":
-                try:
-                    # Handle case where all values are 0
-                    if all(v == 0 for v in values):
-                        values = [1] * len(values)
+                elif chart_type == "Pie":
+                    try:
+                        # Handle case where all values are 0
+                        if all(v == 0 for v in values):
+                            values = [1] * len(values)
                     
-                    ax.pie(values, labels=labels, autopct='%1.1f%%', 
-                           shadow=True, startangle=90)
-                    ax.axis('equal')
-                except Exception as pie_error:
-                    print(f"Error with pie chart, falling back to bar: {pie_error}")
-                    ax.clear()
+                        ax.pie(values, labels=labels, autopct='%1.1f%%', 
+                               shadow=True, startangle=90)
+                        ax.axis('equal')
+                    except Exception as pie_error:
+                        print(f"Error with pie chart, falling back to bar: {pie_error}")
+                        ax.clear()
+                        ax.bar(labels, values, color='skyblue')
+                        ax.set_xlabel(x_label)
+                        ax.set_ylabel(y_label)
+                else:
+                    # Default to bar chart if unrecognized type
                     ax.bar(labels, values, color='skyblue')
                     ax.set_xlabel(x_label)
                     ax.set_ylabel(y_label)
-            else:
-                # Default to bar chart if unrecognized type
-                ax.bar(labels, values, color='skyblue')
-                ax.set_xlabel(x_label)
-                ax.set_ylabel(y_label)
-
-            ax.set_title(title)
-            plt.tight_layout()
-
-            # Save to bytes
-            buffer = BytesIO()
-            plt.savefig(buffer, format='png', dpi=100)
-            buffer.seek(0)
-            plt.close(fig)
-
-            # Convert to base64
-            image_b64 = base64.b64encode(buffer.read()).decode('utf-8')
-            
-            return {"b64": image_b64, "title": title, "chart_type": "matplotlib"}
 
-        except Exception as e:
-            error_msg = f"Error creating matplotlib chart: {e}"
-            print(error_msg)
-            if fig:
+                ax.set_title(title)
+                fig.tight_layout()
+
+                # Save to bytes
+                buffer = BytesIO()
+                fig.savefig(buffer, format='png', dpi=100)
+                buffer.seek(0)
                 plt.close(fig)
+
+                # Convert to base64
+                image_b64 = base64.b64encode(buffer.read()).decode('utf-8')
+            
+                return {"b64": image_b64, "title": title, "chart_type": "matplotlib"}
+
+            except Exception as e:
+                error_msg = f"Error creating matplotlib chart: {e}"
+                print(error_msg)
+                if fig:
+                    plt.close(fig)
                 
-            return None
+                return None
 
 
 class QuizAgent(BaseAgent):
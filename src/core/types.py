@@ -125,7 +125,7 @@ class BaseAgent:
         # Cache the response if successful
         if response and response.choices and self.cache:
             content = response.choices[0].message.content
-            self.cache.content_cache.cache_content(content_type, cache_params, content)
+            self.cache.cache_content(content_type, cache_params, content)
             
         return response
     
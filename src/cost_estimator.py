@@ -135,7 +135,8 @@ ESTIMATED_TOKENS = {
     "quiz_per_unit": {"input": 1000, "output": 500},
     "summary_per_unit": {"input": 500, "output": 300},
     "resources_per_unit": {"input": 500, "output": 400},
-    "image_prompt": {"input": 1000, "output": 200}
+    # Image prompts are requested in the content call, adding instructions and a short reply
+    "image_prompt": {"input": 150, "output": 300}
 }
 
 def _estimate_curriculum_cost_impl(orchestrator_model: str, worker_model: str,
@@ -5,11 +5,32 @@ Provides functionality to log API calls, responses and other debug information
 
 import os
 import sys
+import queue
+import atexit
 import logging
+import logging.handlers
 import json
 from datetime import datetime
 from pathlib import Path
 
+# Background listener that performs the actual handler I/O; callers only
+# enqueue records. Replaced (and the old one drained) on re-initialization.
+_queue_listener = None
+
+
+def _stop_queue_listener():
+    """Flush and stop the background log listener, if running"""
+    global _queue_listener
+    if _queue_listener is not None:
+        _queue_listener.stop()
+        for handler in _queue_listener.handlers:
+            handler.close()
+        _queue_listener = None
+
+
+atexit.register(_stop_queue_listener)
+
+
 class VerboseLogger:
     """Logger class to handle verbose output and file logging"""
     
@@ -35,6 +56,7 @@ class VerboseLogger:
         # Clear any existing handlers
         if self.logger.handlers:
             self.logger.handlers.clear()
+        _stop_queue_listener()
         
         # File handler (always active)
         file_handler = logging.FileHandler(log_file)
@@ -42,7 +64,7 @@ class VerboseLogger:
         file_handler.setFormatter(logging.Formatter(
             '%(asctime)s - %(levelname)s - %(message)s'
         ))
-        self.logger.addHandler(file_handler)
+        handlers = [file_handler]
         
         # Console handler (only in verbose mode)
         self.verbose = verbose
@@ -52,7 +74,17 @@ class VerboseLogger:
             console_handler.setFormatter(logging.Formatter(
                 '\033[92m%(asctime)s\033[0m - \033[94m%(levelname)s\033[0m - %(message)s'
             ))
-            self.logger.addHandler(console_handler)
+            handlers.append(console_handler)
+        
+        # Route records through a queue so file/console writes happen on a
+        # background thread instead of the caller's request path
+        global _queue_listener
+        log_queue = queue.SimpleQueue()
+        self.logger.addHandler(logging.handlers.QueueHandler(log_queue))
+        _queue_listener = logging.handlers.QueueListener(
+            log_queue, *handlers, respect_handler_level=True
+        )
+        _queue_listener.start()
         
         self.log_file = log_file
         self.logger.info(f"Logging initialized. Log file: {log_file}")
@@ -0,0 +1,279 @@
+"""
+Tests for the curriculum orchestration in src/agent_framework.py.
+"""
+
+import threading
+import time
+
+import pytest
+
+
+class _StubAgent:
+    def __init__(self, *args, **kwargs):
+        pass
+
+
+class _StubOutlineAgent(_StubAgent):
+    titles = ["Alpha", "Beta", "Gamma", "Delta"]
+
+    def generate_outline(self, *args, **kwargs):
+        return [{"title": t} for t in self.titles]
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, tmp_path):
+    """Orchestrator with stubbed workers and no network access."""
+    monkeypatch.chdir(tmp_path)
+    import src.agent_framework as af
+
+    monkeypatch.setattr(af, "OutlineAgent", _StubOutlineAgent)
+    for name in ("ContentAgent", "MediaAgent", "ChartAgent", "QuizAgent", "SummaryAgent", "ResourceAgent"):
+        monkeypatch.setattr(af, name, _StubAgent)
+
+    agent = af.OrchestratorAgent(client=None)
+    monkeypatch.setattr(agent, "_create_generation_plan", lambda *a: "plan")
+    monkeypatch.setattr(agent, "_refine_curriculum", lambda c: c)
+    return agent
+
+
+def _config(concurrency):
+    return {
+        "defaults": {
+            "min_topics": 3,
+            "max_topics": 5,
+            "include_quizzes": True,
+            "include_summary": True,
+            "include_resources": True,
+            "include_keypoints": True,
+            "media_richness": 0,
+            "topic_concurrency": concurrency,
+        }
+    }
+
+
+class TestCreateCurriculum:
+    """Tests for concurrent topic processing."""
+
+    def test_topics_run_concurrently_and_keep_outline_order(self, orchestrator, monkeypatch):
+        """Units come back in outline order even when later topics finish first"""
+        active = 0
+        peak = 0
+        lock = threading.Lock()
+        delays = {"Alpha": 0.15, "Beta": 0.05, "Gamma": 0.1, "Delta": 0.0}
+
+        def fake_process(topic, *args, **kwargs):
+            nonlocal active, peak
+            with lock:
+                active += 1
+                peak = max(peak, active)
+            time.sleep(delays[topic["title"]])
+            with lock:
+                active -= 1
+            return {"title": topic["title"]}
+
+        monkeypatch.setattr(orchestrator, "_process_topic", fake_process)
+        checkpoints = []
+
+        curriculum = orchestrator.create_curriculum(
+            "Science", "5", "Standard", "English", "", _config(4),
+            checkpoint_callback=lambda c: checkpoints.append([u["title"] for u in c["units"]]),
+        )
+
+        assert [u["title"] for u in curriculum["units"]] == ["Alpha", "Beta", "Gamma", "Delta"]
+        assert peak > 1
+        # Checkpoints only ever see an ordered prefix of the outline
+        for titles in checkpoints:
+            assert titles == _StubOutlineAgent.titles[:len(titles)]
+        assert checkpoints[-1] == _StubOutlineAgent.titles
+
+    def test_concurrency_of_one_is_sequential(self, orchestrator, monkeypatch):
+        """topic_concurrency=1 processes one topic at a time"""
+        order = []
+        monkeypatch.setattr(
+            orchestrator, "_process_topic",
+            lambda topic, *a, **k: order.append(topic["title"]) or {"title": topic["title"]},
+        )
+
+        events = []
+        curriculum = orchestrator.create_curriculum(
+            "Science", "5", "Standard", "English", "", _config(1),
+            progress_callback=lambda event, data: events.append((event, data.get("topics_completed"))),
+        )
+
+        assert order == _StubOutlineAgent.titles
+        assert len(curriculum["units"]) == 4
+        done = [n for event, n in events if event == "topic_done"]
+        assert done == [1, 2, 3, 4]
+
+    def test_cancellation_stops_remaining_topics(self, orchestrator, monkeypatch):
+        """Cancelling mid-run returns completed units and skips the rest"""
+        cancel = threading.Event()
+
+        def fake_process(topic, *args, **kwargs):
+            cancel.set()
+            return {"title": topic["title"]}
+
+        monkeypatch.setattr(orchestrator, "_process_topic", fake_process)
+
+        curriculum = orchestrator.create_curriculum(
+            "Science", "5", "Standard", "English", "", _config(1),
+            cancellation_event=cancel,
+        )
+
+        assert curriculum["meta"]["cancelled"] is True
+        assert [u["title"] for u in curriculum["units"]] == ["Alpha"]
+
+    def test_cancellation_keeps_contiguous_prefix(self, orchestrator, monkeypatch):
+        """Topics finishing after a gap are not kept when the run is cancelled"""
+        cancel = threading.Event()
+        gamma_done = threading.Event()
+
+        def fake_process(topic, *args, **kwargs):
+            title = topic["title"]
+            if title == "Beta":
+                # Still running when cancellation arrives
+                gamma_done.wait(2)
+                cancel.set()
+                return None
+            if title == "Gamma":
+                gamma_done.set()
+            return {"title": title}
+
+        monkeypatch.setattr(orchestrator, "_process_topic", fake_process)
+        events = []
+
+        curriculum = orchestrator.create_curriculum(
+            "Science", "5", "Standard", "English", "", _config(4),
+            progress_callback=lambda event, data: events.append((event, data)),
+            cancellation_event=cancel,
+        )
+
+        assert curriculum["meta"]["cancelled"] is True
+        assert [u["title"] for u in curriculum["units"]] == ["Alpha"]
+        cancelled = [data for event, data in events if event == "cancelled"]
+        assert cancelled[-1]["topics_completed"] == 1
+
+
+class TestProcessTopic:
+    """Tests for the per-topic fan-out."""
+
+    def test_content_runs_alongside_title_only_agents(self, orchestrator):
+        """Quiz generation does not wait for content generation"""
+        content_started = threading.Event()
+        quiz_seen_during_content = threading.Event()
+
+        class Content:
+            def generate_content(self, *args, **kwargs):
+                content_started.set()
+                quiz_seen_during_content.wait(2)
+                return "lesson"
+
+        class Quiz:
+            def generate_quiz(self, *args, **kwargs):
+                content_started.wait(2)
+                quiz_seen_during_content.set()
+                return {"questions": []}
+
+        class Text:
+            def generate_summary(self, *args, **kwargs):
+                return "summary"
+
+            def generate_resources(self, *args, **kwargs):
+                return "resources"
+
+        unit = orchestrator._process_topic(
+            {"title": "Alpha"}, "Science", "5", "Standard", "English", "",
+            Content(), None, None, Quiz(), Text(), Text(), _config(1),
+        )
+
+        assert quiz_seen_during_content.is_set()
+        assert unit["content"] == "lesson"
+        assert unit["quiz"] == {"questions": []}
+        assert unit["summary"] == "summary"
+        assert unit["resources"] == "resources"
+
+    def test_image_prompt_comes_from_content_call(self, orchestrator, monkeypatch):
+        """With images enabled, no separate image-prompt call is made"""
+        import src.agent_framework as af
+
+        class NoImagePromptAgent:
+            def __init__(self, *args, **kwargs):
+                raise AssertionError("ImagePromptAgent should not be used")
+
+        monkeypatch.setattr(af, "ImagePromptAgent", NoImagePromptAgent)
+
+        class Content:
+            def generate_content_with_image_prompt(self, *args, **kwargs):
+                return "lesson", "a diagram of halves"
+
+        class Media:
+            def create_images(self, *args, custom_prompt=None, **kwargs):
+                return [{"b64": "img", "prompt": custom_prompt}]
+
+        config = _config(1)
+        config["defaults"].update(
+            media_richness=2, include_quizzes=False, include_summary=False, include_resources=False
+        )
+        unit = orchestrator._process_topic(
+            {"title": "Alpha"}, "Science", "5", "Standard", "English", "",
+            Content(), Media(), None, None, None, None, config,
+        )
+
+        assert unit["content"] == "lesson"
+        assert unit["images"] == [{"b64": "img", "prompt": "a diagram of halves"}]
+        assert unit["selected_image_b64"] == "img"
+
+
+class _Reply:
+    def __init__(self, content):
+        message = type("Message", (), {"content": content})()
+        self.choices = [type("Choice", (), {"message": message})()]
+
+
+class TestContentAgent:
+    """Tests for the fused content + image prompt call."""
+
+    @pytest.fixture
+    def agent(self, monkeypatch, tmp_path):
+        monkeypatch.chdir(tmp_path)
+        from src.agent_framework import ContentAgent
+
+        agent = ContentAgent(None, "gpt-4.1-nano", {"prompts": {"content": "Teach {topic}."}})
+        agent.cache = None
+        return agent
+
+    def _generate(self, agent):
+        return agent.generate_content_with_image_prompt(
+            "Fractions", "Math", "4", "Standard", "", "English", True
+        )
+
+    def test_parses_content_and_image_prompt(self, agent, monkeypatch):
+        """Both fields are returned from one JSON reply"""
+        calls = []
+
+        def fake_call(messages, response_format=None, temperature=0.7):
+            calls.append((messages, response_format))
+            return _Reply('{"content": "## Fractions", "image_prompt": "pizza slices"}')
+
+        monkeypatch.setattr(agent, "_call_model", fake_call)
+
+        assert self._generate(agent) == ("## Fractions", "pizza slices")
+        assert len(calls) == 1
+        messages, response_format = calls[0]
+        assert response_format == {"type": "json_object"}
+        assert messages[0]["content"].startswith("Teach Fractions.")
+        assert '"image_prompt"' in messages[0]["content"]
+
+    def test_non_json_reply_is_used_as_content(self, agent, monkeypatch):
+        """A plain Markdown reply still yields the lesson, without a prompt"""
+        monkeypatch.setattr(agent, "_call_model", lambda *a, **k: _Reply("## Fractions"))
+
+        assert self._generate(agent) == ("## Fractions", None)
+
+    def test_missing_image_prompt_is_none(self, agent, monkeypatch):
+        """An empty image prompt lets callers fall back to ImagePromptAgent"""
+        monkeypatch.setattr(
+            agent, "_call_model", lambda *a, **k: _Reply('{"content": "## Fractions", "image_prompt": " "}')
+        )
+
+        assert self._generate(agent) == ("## Fractions", None)
@@ -0,0 +1,116 @@
+"""
+Tests for services/cache_service.py
+"""
+
+import pytest
+
+
+@pytest.fixture
+def cache(tmp_path):
+    """SmartCache on a fresh directory with a clean shared index."""
+    yield _fresh_cache(tmp_path)
+    _reset_index_state()
+
+
+def _reset_index_state():
+    """Forget per-process index state, as a newly started process would."""
+    from services.cache_service import SmartCache
+
+    for conn in SmartCache._connections.values():
+        conn.close()
+    SmartCache._connections.clear()
+    SmartCache._backfilled.clear()
+
+
+def _fresh_cache(tmp_path):
+    from services.cache_service import SmartCache
+
+    _reset_index_state()
+    return SmartCache(str(tmp_path / "cache"))
+
+
+def _params(**overrides):
+    params = {
+        "topic": "Fractions",
+        "subject": "Math",
+        "grade": "4",
+        "style": "Standard",
+        "extra": "",
+        "language": "English",
+    }
+    params.update(overrides)
+    return params
+
+
+class TestSimilarityKey:
+    """Tests for similarity key canonicalization."""
+
+    def test_grade_wording_is_normalized(self, cache):
+        """'4', 'Grade 4' and '4th grade' share a key"""
+        keys = {
+            cache.get_content_similarity_key(_params(grade=g))
+            for g in ("4", "Grade 4", "4th grade", " grade  4th ")
+        }
+        assert len(keys) == 1
+
+    def test_whitespace_and_case_are_ignored(self, cache):
+        """Topic casing and spacing do not change the key"""
+        assert cache.get_content_similarity_key(_params(topic="  adding   FRACTIONS ")) == \
+            cache.get_content_similarity_key(_params(topic="Adding fractions"))
+
+    def test_different_topics_do_not_match(self, cache):
+        """Distinct topics produce distinct keys"""
+        assert cache.get_content_similarity_key(_params(topic="Fractions")) != \
+            cache.get_content_similarity_key(_params(topic="Decimals"))
+
+
+class TestSimilarContent:
+    """Tests for similarity lookups."""
+
+    def test_exact_match(self, cache):
+        """Content cached with identical params is returned"""
+        assert cache.cache_content("content", _params(), "lesson")
+        assert cache.get_similar_content("content", _params()) == "lesson"
+
+    def test_similar_match_after_index_built(self, cache):
+        """Content cached after the index exists is found by similarity"""
+        assert cache.get_similar_content("content", _params()) is None
+        cache.cache_content("content", _params(extra="be brief"), "lesson")
+
+        assert cache.get_similar_content("content", _params(grade="4th grade")) == "lesson"
+
+    def test_index_backfilled_from_existing_files(self, cache, tmp_path):
+        """Files cached before the index existed are found by similarity"""
+        cache.content_cache.cache_content("content", _params(extra="be brief"), "lesson")
+
+        other = _fresh_cache(tmp_path)
+        assert other.get_similar_content("content", _params(grade="Grade 4")) == "lesson"
+
+    def test_index_persists_across_processes(self, cache, tmp_path, monkeypatch):
+        """A restarted process answers from the stored index without a scan"""
+        from pathlib import Path
+
+        cache.get_similar_content("content", _params(topic="Decimals"))
+        cache.cache_content("content", _params(extra="be brief"), "lesson")
+        other = _fresh_cache(tmp_path)
+
+        def fail_glob(self, pattern):
+            raise AssertionError("cache directory scanned again")
+
+        monkeypatch.setattr(Path, "glob", fail_glob)
+        assert other.get_similar_content("content", _params(grade="4th grade")) == "lesson"
+        assert other.get_similar_content("content", _params(topic="Percent")) is None
+
+    def test_cleared_entries_are_dropped(self, cache):
+        """Removed cache files stop matching"""
+        cache.cache_content("content", _params(), "lesson")
+        assert cache.get_similar_content("content", _params(extra="x")) == "lesson"
+
+        cache.content_cache.clear_cache("content")
+        assert cache.get_similar_content("content", _params(extra="x")) is None
+
+    def test_newest_entry_wins(self, cache):
+        """Re-caching a similar request replaces the indexed entry"""
+        cache.cache_content("content", _params(extra="a"), "first")
+        cache.cache_content("content", _params(extra="b"), "second")
+        assert cache.get_similar_content("content", _params(extra="c")) == "second"
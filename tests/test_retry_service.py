@@ -0,0 +1,56 @@
+"""
+Tests for retry_service backoff coordination and error formatting.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def retry_module(monkeypatch):
+    from services import retry_service
+
+    monkeypatch.setattr(retry_service, "_NEXT_ALLOWED", 0.0)
+    return retry_service
+
+
+def test_retry_error_str_is_cached(retry_module):
+    err = retry_module.RetryError("failed", errors=[ValueError("a"), ValueError("b")])
+
+    first = str(err)
+    assert "Attempt 1: a" in first
+    assert "Attempt 2: b" in first
+    assert str(err) is first
+
+
+def test_reserve_retry_slot_spaces_concurrent_retries(retry_module, monkeypatch):
+    clock = {"now": 100.0}
+    monkeypatch.setattr(retry_module.time, "monotonic", lambda: clock["now"])
+    monkeypatch.setattr(retry_module.random, "uniform", lambda a, b: b)
+
+    # First caller gets its own delay; the second, arriving at the same
+    # instant, is pushed past the first slot plus the spacing jitter.
+    assert retry_module._reserve_retry_slot(1.0) == 1.0
+    assert retry_module._reserve_retry_slot(0.5) == pytest.approx(1.25)
+
+    # Once the schedule has drained, the requested delay is used as-is.
+    clock["now"] = 200.0
+    assert retry_module._reserve_retry_slot(0.5) == 0.5
+
+
+def test_retry_with_backoff_sleeps_reserved_delay(retry_module, monkeypatch):
+    slept = []
+    monkeypatch.setattr(retry_module.time, "sleep", slept.append)
+    monkeypatch.setattr(retry_module, "_reserve_retry_slot", lambda delay: 0.01)
+
+    calls = {"count": 0}
+
+    def flaky():
+        calls["count"] += 1
+        if calls["count"] < 3:
+            raise RuntimeError("server error 503")
+        return "ok"
+
+    handler = retry_module.RetryHandler()
+    config = retry_module.RetryConfig(max_retries=3, base_delay=0.0, jitter=False)
+    assert handler.retry_with_backoff(flaky, config=config) == "ok"
+    assert slept == [0.01, 0.01]
@@ -0,0 +1,67 @@
+"""
+Tests for SessionManager temp file handling and InputValidator.
+"""
+
+import base64
+from pathlib import Path
+
+
+def _make_manager(monkeypatch, tmp_path):
+    from services.session_service import SessionManager
+
+    monkeypatch.chdir(tmp_path)
+    return SessionManager()
+
+
+def test_save_base64_to_temp_file_round_trips_bytes(monkeypatch, tmp_path):
+    manager = _make_manager(monkeypatch, tmp_path)
+    payload = bytes(range(256)) * 64
+    b64 = "data:image/png;base64," + base64.b64encode(payload).decode("ascii")
+
+    path = manager.save_base64_to_temp_file(b64)
+    try:
+        assert path is not None
+        assert Path(path).name.startswith("instaschool_tmp_")
+        assert Path(path).suffix == ".png"
+        assert Path(path).read_bytes() == payload
+        assert path in manager.temp_files
+    finally:
+        manager.cleanup_temp_files()
+
+    assert not Path(path).exists()
+
+
+def test_save_base64_to_temp_file_rejects_empty_input(monkeypatch, tmp_path):
+    manager = _make_manager(monkeypatch, tmp_path)
+
+    assert manager.save_base64_to_temp_file("") is None
+    assert manager.save_base64_to_temp_file(None) is None
+
+
+def test_sanitize_prompt_passes_plain_text_through():
+    from services.session_service import InputValidator
+
+    assert InputValidator.sanitize_prompt("  Photosynthesis for grade 5  ") == (
+        "Photosynthesis for grade 5"
+    )
+
+
+def test_sanitize_prompt_strips_html():
+    from services.session_service import InputValidator
+
+    prompt = "Fractions <script>alert(1)</script><b>basics</b>"
+    assert InputValidator.sanitize_prompt(prompt) == "Fractions basics"
+
+
+def test_save_curriculum_generates_sequenced_filenames(monkeypatch, tmp_path, sample_curriculum):
+    manager = _make_manager(monkeypatch, tmp_path)
+
+    ok_first, _ = manager.save_curriculum(sample_curriculum)
+    ok_second, _ = manager.save_curriculum(sample_curriculum)
+
+    assert ok_first and ok_second
+    names = sorted(p.name for p in (tmp_path / "curricula").glob("curriculum_*.json"))
+    assert len(names) == 2
+    assert names[0].startswith(f"curriculum_{manager._session_id}_")
+    assert names[0].endswith("_0001.json")
+    assert names[1].endswith("_0002.json")
@@ -0,0 +1,281 @@
+"""
+Tests for SRSService SM-2 scheduling against a temporary SQLite database.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def db(tmp_path):
+    from services.database_service import DatabaseService
+
+    service = DatabaseService(db_path=str(tmp_path / "srs.db"))
+    yield service
+    service.close_connection()
+
+
+@pytest.fixture
+def srs(db):
+    from services.srs_service import SRSService
+
+    return SRSService(db)
+
+
+def _card(db, card_id):
+    return db.fetch_one("SELECT * FROM review_items WHERE id = ?", (card_id,))
+
+
+class TestSM2Step:
+    """Pure SM-2 parameter updates."""
+
+    def test_failed_recall_resets_progress(self):
+        from services.srs_service import _sm2_step
+
+        ef, interval, reps = _sm2_step(2.5, 15, 4, 1)
+        assert (interval, reps) == (1, 0)
+        assert ef == pytest.approx(2.5 - 0.54)
+
+    def test_successful_recall_schedule(self):
+        from services.srs_service import _sm2_step
+
+        assert _sm2_step(2.5, 1, 0, 4)[1:] == (1, 1)
+        assert _sm2_step(2.5, 1, 1, 4)[1:] == (6, 2)
+        assert _sm2_step(2.5, 6, 2, 4)[1:] == (15, 3)
+
+    def test_ef_delta_table_matches_formula(self):
+        from services.srs_service import _EF_DELTA
+
+        for q in range(6):
+            assert _EF_DELTA[q] == pytest.approx(0.1 - (5 - q) * (0.08 + (5 - q) * 0.02))
+        assert _EF_DELTA[5] == pytest.approx(0.1)
+
+    def test_easiness_factor_floor(self):
+        from services.srs_service import _sm2_step
+
+        assert _sm2_step(1.3, 1, 0, 0)[0] == 1.3
+
+
+class TestReviewCards:
+    """Single and bulk review persistence."""
+
+    def test_create_cards_bulk(self, srs, db):
+        rows = [("u1", "c1", f"q{i}", f"a{i}") for i in range(5)]
+
+        card_ids = srs.create_cards_bulk(rows)
+
+        assert len(card_ids) == 5
+        assert all(len(card_id) == 32 for card_id in card_ids)
+        assert [_card(db, cid)["card_front"] for cid in card_ids] == [f"q{i}" for i in range(5)]
+        assert srs.create_cards_bulk([]) == []
+
+    def test_review_card_updates_row(self, srs, db):
+        card_id = srs.create_card("u1", "c1", "front", "back")
+
+        assert srs.review_card(card_id, 5)
+        card = _card(db, card_id)
+        assert card["repetitions"] == 1
+        assert card["interval"] == 1
+        assert card["easiness_factor"] == pytest.approx(2.6)
+
+    def test_review_card_schedules_next_review(self, srs, db):
+        from datetime import datetime, timedelta
+
+        card_id = srs.create_card("u1", "c1", "front", "back")
+        srs.review_card(card_id, 4)
+        srs.review_card(card_id, 4)
+
+        next_review = datetime.fromisoformat(_card(db, card_id)["next_review"])
+        expected = datetime.now() + timedelta(days=6)
+        assert abs((next_review - expected).total_seconds()) < 3700
+
+    def test_review_card_missing_or_invalid(self, srs):
+        assert srs.review_card("0" * 32, 4) is False
+        assert srs.review_card("0" * 32, 6) is False
+        assert srs.review_card("not-a-card-id", 4) is False
+        assert srs.review_card(None, 4) is False
+
+    def test_review_card_accepts_float_quality(self, srs, db):
+        card_id = srs.create_card("u1", "c1", "front", "back")
+
+        assert srs.review_card(card_id, 3.0)
+        assert srs.review_card(card_id, 4.5)
+        card = _card(db, card_id)
+        assert card["repetitions"] == 2
+        assert card["easiness_factor"] == pytest.approx(2.5 - 0.14 + 0.1 - 0.5 * (0.08 + 0.5 * 0.02))
+        assert srs.review_card(card_id, "3") is False
+        assert srs.review_cards_bulk([(card_id, 5.0), (card_id, None)]) == 1
+
+    def test_review_cards_bulk_matches_single_reviews(self, srs, db):
+        bulk_ids = [srs.create_card("u1", "c1", f"q{i}", "a") for i in range(3)]
+        single_ids = [srs.create_card("u1", "c1", f"s{i}", "a") for i in range(3)]
+        qualities = [5, 3, 1]
+
+        updated = srs.review_cards_bulk(list(zip(bulk_ids, qualities)))
+        for card_id, quality in zip(single_ids, qualities):
+            srs.review_card(card_id, quality)
+
+        assert updated == 3
+        for bulk_id, single_id in zip(bulk_ids, single_ids):
+            bulk, single = _card(db, bulk_id), _card(db, single_id)
+            assert bulk["easiness_factor"] == pytest.approx(single["easiness_factor"])
+            assert bulk["interval"] == single["interval"]
+            assert bulk["repetitions"] == single["repetitions"]
+
+    def test_review_cards_bulk_chains_repeated_reviews(self, srs, db):
+        card_id = srs.create_card("u1", "c1", "front", "back")
+
+        assert srs.review_cards_bulk([(card_id, 4), (card_id, 4), ("missing", 4), (card_id, 9)]) == 1
+        card = _card(db, card_id)
+        assert card["repetitions"] == 2
+        assert card["interval"] == 6
+
+    def test_review_cards_bulk_empty(self, srs):
+        assert srs.review_cards_bulk([]) == 0
+
+
+class TestUserCards:
+    """Listing a user's cards."""
+
+    def test_get_user_cards_limit_and_filter(self, srs):
+        for i in range(3):
+            srs.create_card("u1", "c1", f"q{i}", "a")
+        srs.create_card("u1", "c2", "other", "a")
+
+        assert len(srs.get_user_cards("u1")) == 4
+        assert len(srs.get_user_cards("u1", limit=2)) == 2
+        assert len(srs.get_user_cards("u1", curriculum_id="c1")) == 3
+        assert len(srs.get_user_cards("u1", curriculum_id="c1", limit=1)) == 1
+
+    def test_iter_user_cards_matches_get_user_cards(self, srs, db):
+        for i in range(5):
+            srs.create_card("u1", "c1", f"q{i}", "a")
+
+        streamed = srs.iter_user_cards("u1")
+        assert not isinstance(streamed, list)
+        assert list(streamed) == srs.get_user_cards("u1")
+        assert len(list(db.iter_all("SELECT * FROM review_items", arraysize=2))) == 5
+        assert len(list(srs.iter_user_cards("u1", curriculum_id="c1", limit=3))) == 3
+
+    def test_iter_all_survives_another_database_on_the_thread(self, srs, db, tmp_path):
+        """Switching the thread-local connection mid-iteration loses no rows"""
+        from services.database_service import DatabaseService
+
+        for i in range(5):
+            srs.create_card("u1", "c1", f"q{i}", "a")
+
+        rows = db.iter_all("SELECT * FROM review_items", arraysize=2)
+        seen = [next(rows)]
+        other = DatabaseService(db_path=str(tmp_path / "other.db"))
+        seen.extend(rows)
+        other.close_connection()
+
+        assert len(seen) == 5
+
+
+class TestStatsCache:
+    """Short-TTL caching of per-user review stats."""
+
+    def test_stats_served_from_cache_until_invalidated(self, srs, db):
+        srs.create_card("u1", "c1", "front", "back")
+        assert srs.get_user_stats("u1")["total_cards"] == 1
+
+        # A write that bypasses the service is not seen while the entry is fresh
+        db.create_review_item("u1", "c1", "direct", "insert")
+        assert srs.get_user_stats("u1")["total_cards"] == 1
+        assert srs.get_due_count("u1") == 1
+
+        # Service writes invalidate the user's entry
+        card_id = srs.create_card("u1", "c1", "another", "card")
+        assert srs.get_user_stats("u1")["total_cards"] == 3
+
+        srs.delete_card(card_id)
+        assert srs.get_user_stats("u1")["total_cards"] == 2
+
+    def test_review_stats_aggregates(self, srs, db):
+        due = srs.create_card("u4", "c1", "due", "a")
+        later = srs.create_card("u4", "c1", "later", "a")
+        mastered = srs.create_card("u4", "c1", "mastered", "a")
+        db.execute("UPDATE review_items SET next_review = '9999-01-01' WHERE id IN (?, ?)",
+                   (later, mastered))
+        db.execute("UPDATE review_items SET easiness_factor = 2.8, interval = 30 WHERE id = ?",
+                   (mastered,))
+
+        assert db.get_review_stats("u4") == {"total_cards": 3, "due_today": 1, "mastered": 1}
+        assert db.get_review_stats("nobody") == {"total_cards": 0, "due_today": 0, "mastered": 0}
+
+    def test_due_count_without_cached_stats(self, srs, db):
+        srs.create_card("u3", "c1", "front", "back")
+        db.create_review_item("u3", "c1", "direct", "insert")
+
+        assert srs.get_due_count("u3") == 2
+        assert db.count_due("u3", now="1970-01-01T00:00:00") == 0
+
+    def test_injected_cache_is_used(self, db):
+        from services.srs_service import SRSService, _TTLCache
+
+        cache = _TTLCache()
+        service = SRSService(db, cache=cache)
+        service.get_user_stats("u2")
+
+        assert cache.get(service._stats_key("u2")) is not None
+
+
+def test_log_info_skips_formatting_when_disabled(monkeypatch):
+    from services import srs_service
+
+    class Exploding:
+        def __str__(self):
+            raise AssertionError("formatted while INFO disabled")
+
+    monkeypatch.setattr(srs_service, "_info_enabled", lambda level: False)
+    srs_service.log_info("value=%s", Exploding())
+
+
+def test_fetch_one_and_update_rolls_back_on_any_error(db, srs):
+    """A failing params builder releases the write lock and the transaction"""
+    card_id = srs.create_card("u1", "c1", "front", "back")
+
+    def broken(row):
+        raise TypeError("bad params")
+
+    with pytest.raises(TypeError):
+        db.fetch_one_and_update(
+            "SELECT * FROM review_items WHERE id = ?", (card_id,),
+            "UPDATE review_items SET interval = ? WHERE id = ?", broken,
+        )
+
+    with db.get_connection() as conn:
+        assert not conn.in_transaction
+    assert srs.review_card(card_id, 4)
+
+
+def test_executemany_rolls_back_on_any_error(db, srs):
+    """A bad parameter row does not leave the connection mid-transaction"""
+    card_id = srs.create_card("u1", "c1", "front", "back")
+
+    def rows():
+        yield (7, card_id)
+        raise TypeError("bad row")
+
+    with pytest.raises(TypeError):
+        db.executemany("UPDATE review_items SET interval = ? WHERE id = ?", rows())
+
+    with db.get_connection() as conn:
+        assert not conn.in_transaction
+    assert db.fetch_one("SELECT interval FROM review_items WHERE id = ?", (card_id,))["interval"] != 7
+
+
+def test_pragma_optimize_runs_once_per_database(db):
+    """Constructing the service again, as every rerun does, skips the optimize pass"""
+    from services.database_service import DatabaseService
+
+    statements = []
+    with db.get_connection() as conn:
+        conn.set_trace_callback(statements.append)
+    try:
+        DatabaseService(db_path=db.db_path)
+    finally:
+        conn.set_trace_callback(None)
+
+    assert any("CREATE TABLE IF NOT EXISTS" in sql for sql in statements)
+    assert not any("PRAGMA optimize" in sql for sql in statements)
@@ -0,0 +1,606 @@
+"""
+Tests for SupabaseService client sharing, payload shaping and GenerationLogger.
+
+No network access: the supabase client is replaced with a recording fake.
+"""
+
+import pytest
+
+
+class _FakeResult:
+    def __init__(self, data=None, count=None):
+        self.data = data
+        self.count = count
+
+
+class _FakeQuery:
+    """Chainable stand-in for a postgrest query builder."""
+
+    def __init__(self, client, table):
+        self.client = client
+        self.table = table
+        self.calls = []
+
+    def __getattr__(self, name):
+        def _record(*args, **kwargs):
+            self.calls.append((name, args, kwargs))
+            return self
+
+        return _record
+
+    def execute(self):
+        self.client.executed.append((self.table, self.calls))
+        return self.client.respond(self.table, self.calls)
+
+
+class _FakeClient:
+    def __init__(self):
+        self.executed = []
+        self.responses = {}
+
+    def table(self, name):
+        return _FakeQuery(self, name)
+
+    def rpc(self, name, params=None):
+        query = _FakeQuery(self, f"rpc:{name}")
+        query.calls.append(("rpc", (name,), {"params": params}))
+        return query
+
+    def respond(self, table, calls):
+        handler = self.responses.get(table)
+        if handler is not None:
+            return handler(calls)
+        return _FakeResult(data=[{"id": "row-1"}], count=0)
+
+
+@pytest.fixture
+def supabase_module(monkeypatch):
+    from services import supabase_service
+
+    supabase_service._pooled_client.cache_clear()
+    monkeypatch.setenv("SUPABASE_URL", "https://example.supabase.co")
+    monkeypatch.setenv("SUPABASE_KEY", "test-key")
+    yield supabase_service
+    supabase_service._pooled_client.cache_clear()
+
+
+@pytest.fixture
+def fake_client(supabase_module, monkeypatch):
+    client = _FakeClient()
+    created = []
+
+    def _create_client(url, key):
+        created.append((url, key))
+        return client
+
+    monkeypatch.setattr(supabase_module, "create_client", _create_client)
+    client.created = created
+    return client
+
+
+class TestClientSharing:
+    def test_services_share_one_client(self, supabase_module, fake_client):
+        first = supabase_module.SupabaseService()
+        second = supabase_module.SupabaseService()
+
+        assert first.client is fake_client
+        assert second.client is fake_client
+        assert len(fake_client.created) == 1
+
+    def test_missing_config_is_not_cached(self, supabase_module, fake_client, monkeypatch):
+        monkeypatch.delenv("SUPABASE_KEY")
+        assert supabase_module.get_supabase_client() is None
+
+        monkeypatch.setenv("SUPABASE_KEY", "test-key")
+        assert supabase_module.get_supabase_client() is fake_client
+
+    def test_clients_pooled_per_credentials(self, supabase_module, fake_client):
+        assert supabase_module.get_supabase_client("https://other.supabase.co", "k2") is fake_client
+        assert supabase_module.get_supabase_client("https://other.supabase.co", "k2") is fake_client
+        assert supabase_module.get_supabase_client() is fake_client
+
+        assert fake_client.created == [
+            ("https://other.supabase.co", "k2"),
+            ("https://example.supabase.co", "test-key"),
+        ]
+
+    def test_creation_failure_is_not_cached(self, supabase_module, monkeypatch):
+        attempts = []
+
+        def _flaky(url, key):
+            attempts.append(url)
+            if len(attempts) == 1:
+                raise RuntimeError("network down")
+            return "client"
+
+        monkeypatch.setattr(supabase_module, "create_client", _flaky)
+
+        assert supabase_module.get_supabase_client() is None
+        assert supabase_module.get_supabase_client() == "client"
+        assert supabase_module.get_supabase_client() == "client"
+        assert len(attempts) == 2
+
+
+class TestPayloadShaping:
+    def test_estimate_json_size_matches_compact_encoding(self, supabase_module, sample_curriculum, monkeypatch):
+        import json
+
+        monkeypatch.setattr(supabase_module, "ORJSON_AVAILABLE", False)
+        service = supabase_module.SupabaseService()
+        sample_curriculum["meta"]["title"] = "Café – naïve"
+
+        expected = len(json.dumps(sample_curriculum, separators=(",", ":")).encode("utf-8"))
+        assert service._estimate_json_size(sample_curriculum) == expected
+
+    def test_estimate_json_size_with_orjson(self, supabase_module, sample_curriculum):
+        import json
+
+        if not supabase_module.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+        service = supabase_module.SupabaseService()
+        sample_curriculum["meta"][1] = "int key"
+
+        expected = len(json.dumps(sample_curriculum, separators=(",", ":"), ensure_ascii=False).encode("utf-8"))
+        assert service._estimate_json_size(sample_curriculum) == expected
+        # Out-of-range ints fall back to the stdlib encoder
+        assert service._estimate_json_size({"n": 2 ** 70}) == len(f'{{"n":{2 ** 70}}}')
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_estimate_json_size_unserializable(self, supabase_module, monkeypatch, orjson_available):
+        if orjson_available and not supabase_module.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+        monkeypatch.setattr(supabase_module, "ORJSON_AVAILABLE", orjson_available)
+        assert supabase_module.SupabaseService()._estimate_json_size({"x": object()}) == 0
+
+    def test_save_stores_optimized_images(self, supabase_module, fake_client, monkeypatch):
+        import sys
+        import types
+
+        def _optimize(curriculum, preset="storage", in_place=False):
+            import copy
+
+            optimized = copy.deepcopy(curriculum)
+            optimized["units"][0]["image_base64"] = "small"
+            return optimized
+
+        monkeypatch.setitem(
+            sys.modules,
+            "services.image_optimization_service",
+            types.SimpleNamespace(optimize_curriculum_images=_optimize),
+        )
+        service = supabase_module.SupabaseService()
+        service._content_gz_available = False
+        service._units_table_available = False
+        curriculum = {"meta": {"title": "Big"}, "units": [{"image_base64": "A" * 1_100_000}]}
+
+        assert service.save_curriculum(curriculum) == "row-1"
+        saved = fake_client.executed[-1][1][0][1][0]["content"]
+        assert saved["units"][0]["image_base64"] == "small"
+
+
+class TestCompressedContent:
+    def _big_curriculum(self):
+        return {"meta": {"title": "Big"}, "units": [{"title": "U1", "image_base64": "A" * 1_100_000}]}
+
+    def test_large_content_round_trips_compressed(self, supabase_module, fake_client):
+        service = supabase_module.SupabaseService()
+        curriculum = self._big_curriculum()
+
+        assert service.save_curriculum(curriculum) == "row-1"
+        record = fake_client.executed[-1][1][0][1][0]
+        assert record["content"]["units"] == []
+        assert record["content"]["_content_gz"] is True
+        assert len(record["content_gz"]) < 100_000
+
+        fake_client.responses["curricula"] = lambda calls: _FakeResult(
+            data={"content": record["content"], "content_gz": record["content_gz"]}
+        )
+        loaded = service.get_curriculum("row-1")
+        assert loaded["units"][0]["image_base64"] == "A" * 1_100_000
+
+    def test_small_content_clears_compressed_copy(self, supabase_module, fake_client, sample_curriculum):
+        supabase_module.SupabaseService().update_curriculum_status("row-1", "complete", sample_curriculum)
+
+        update = fake_client.executed[-1][1][0][1][0]
+        assert update["content"] is sample_curriculum
+        assert update["content_gz"] is None
+
+    def test_falls_back_when_column_missing(self, supabase_module, fake_client):
+        def _no_column(calls):
+            if "content_gz" in calls[0][1][0]:
+                raise RuntimeError("Could not find the 'content_gz' column of 'curricula'")
+            return _FakeResult(data=[{"id": "row-1"}])
+
+        fake_client.responses["curricula"] = _no_column
+        service = supabase_module.SupabaseService()
+        service._units_table_available = False
+        service._optimize_curriculum_for_storage = service._strip_images_from_curriculum
+
+        assert service.save_curriculum(self._big_curriculum()) == "row-1"
+        assert service._content_gz_available is False
+        record = fake_client.executed[-1][1][0][1][0]
+        assert record["content"]["units"][0]["image_base64"] is None
+
+    def test_other_errors_keep_compression_enabled(self, supabase_module, fake_client):
+        def _down(calls):
+            raise RuntimeError("connection reset")
+
+        fake_client.responses["curricula"] = _down
+        service = supabase_module.SupabaseService()
+
+        assert service.save_curriculum(self._big_curriculum()) is None
+        assert service._content_gz_available is True
+
+
+class TestUnitsTable:
+    def test_oversized_curriculum_splits_units(self, supabase_module, fake_client, monkeypatch):
+        monkeypatch.setattr(supabase_module, "_MAX_STORED_SIZE", 100)
+        monkeypatch.setattr(supabase_module, "_COMPRESS_THRESHOLD", 10)
+        units = [{"title": f"U{i}", "content": "x" * 60} for i in range(3)]
+        service = supabase_module.SupabaseService()
+
+        assert service.save_curriculum({"meta": {"title": "T"}, "units": units}) == "row-1"
+
+        tables = [table for table, _ in fake_client.executed]
+        assert tables[0] == "curriculum_units"  # availability probe
+        assert tables[1] == "curricula"
+        record = fake_client.executed[1][1][0][1][0]
+        assert record["content"]["units"] == []
+        assert record["content"]["_units_table"] is True
+        assert record["content_gz"] is None
+
+        unit_writes = [calls for table, calls in fake_client.executed[2:]]
+        # New rows land before stale ones are removed
+        assert [calls[0][0] for calls in unit_writes] == ["upsert", "upsert", "upsert", "delete"]
+        inserted = [row for calls in unit_writes[:-1] for row in calls[0][1][0]]
+        assert [row["idx"] for row in inserted] == [0, 1, 2]
+        assert all(row["curriculum_id"] == "row-1" for row in inserted)
+        assert unit_writes[-1][1:] == [("eq", ("curriculum_id", "row-1"), {}), ("gte", ("idx", 3), {})]
+        # Batches stay under the payload limit: 60-char units, 100-byte limit
+        assert len(unit_writes) == 4
+
+    def test_failed_unit_write_keeps_existing_rows(self, supabase_module, fake_client):
+        def _down(calls):
+            raise RuntimeError("connection reset")
+
+        fake_client.responses["curriculum_units"] = _down
+        service = supabase_module.SupabaseService()
+
+        with pytest.raises(RuntimeError):
+            service._save_units("row-1", [{"title": "U0"}])
+        assert [calls[0][0] for table, calls in fake_client.executed] == ["upsert"]
+
+    def test_get_curriculum_reassembles_units(self, supabase_module, fake_client):
+        fake_client.responses["curricula"] = lambda calls: _FakeResult(
+            data={"content": {"meta": {"title": "T"}, "units": [], "_units_table": True}}
+        )
+        fake_client.responses["curriculum_units"] = lambda calls: _FakeResult(
+            data=[{"idx": 0, "unit": {"title": "U0"}}, {"idx": 1, "unit": {"title": "U1"}}]
+        )
+
+        loaded = supabase_module.SupabaseService().get_curriculum("row-1")
+
+        assert loaded == {"meta": {"title": "T"}, "units": [{"title": "U0"}, {"title": "U1"}]}
+
+
+class TestGetCurriculum:
+    def test_selects_only_content_columns(self, supabase_module, fake_client):
+        fake_client.responses["curricula"] = lambda calls: _FakeResult(data={"content": {"meta": {}, "units": []}})
+
+        assert supabase_module.SupabaseService().get_curriculum("row-1") == {"meta": {}, "units": []}
+        calls = fake_client.executed[-1][1]
+        assert calls[0] == ("select", ("content, content_gz",), {})
+        assert calls[-1][0] == "maybe_single"
+
+    def test_missing_row_returns_none(self, supabase_module, fake_client):
+        fake_client.responses["curricula"] = lambda calls: None
+
+        assert supabase_module.SupabaseService().get_curriculum("nope") is None
+
+    def test_without_content_gz_column(self, supabase_module, fake_client):
+        def _respond(calls):
+            if calls[0][1] == ("content, content_gz",):
+                raise RuntimeError("column curricula.content_gz does not exist")
+            return _FakeResult(data={"content": {"meta": {"title": "T"}}})
+
+        fake_client.responses["curricula"] = _respond
+        service = supabase_module.SupabaseService()
+
+        assert service.get_curriculum("row-1") == {"meta": {"title": "T"}}
+        assert service._content_gz_available is False
+
+
+class TestUnchangedSaves:
+    def test_unchanged_update_skips_network(self, supabase_module, fake_client, sample_curriculum):
+        service = supabase_module.SupabaseService()
+
+        assert service.update_curriculum_status("row-1", "generating", sample_curriculum)
+        assert service.update_curriculum_status("row-1", "generating", sample_curriculum)
+        assert len(fake_client.executed) == 1
+
+        # A new status or changed content is written
+        assert service.update_curriculum_status("row-1", "complete", sample_curriculum)
+        sample_curriculum["units"][0]["content"] += "!"
+        assert service.update_curriculum_status("row-1", "complete", sample_curriculum)
+        assert len(fake_client.executed) == 3
+
+    def test_status_only_update_invalidates_hash(self, supabase_module, fake_client, sample_curriculum):
+        service = supabase_module.SupabaseService()
+
+        service.update_curriculum_status("row-1", "generating", sample_curriculum)
+        service.update_curriculum_status("row-1", "failed")
+        service.update_curriculum_status("row-1", "generating", sample_curriculum)
+
+        assert len(fake_client.executed) == 3
+
+    def test_unchanged_save_of_existing_curriculum(self, supabase_module, fake_client, sample_curriculum):
+        service = supabase_module.SupabaseService()
+        sample_curriculum["meta"]["supabase_id"] = "row-1"
+
+        assert service.save_curriculum(sample_curriculum) == "row-1"
+        assert service.save_curriculum(sample_curriculum) == "row-1"
+        assert len(fake_client.executed) == 1
+
+    def test_failed_write_is_not_remembered(self, supabase_module, fake_client, sample_curriculum):
+        fake_client.responses["curricula"] = lambda calls: _FakeResult(data=[])
+        service = supabase_module.SupabaseService()
+
+        assert not service.update_curriculum_status("row-1", "generating", sample_curriculum)
+        assert not service.update_curriculum_status("row-1", "generating", sample_curriculum)
+        assert len(fake_client.executed) == 2
+
+
+class TestBackgroundSaves:
+    def test_async_updates_run_in_order_off_thread(self, supabase_module, fake_client):
+        import threading
+
+        threads = []
+        fake_client.responses["curricula"] = lambda calls: (
+            threads.append(threading.current_thread()) or _FakeResult(data=[{"id": "c1"}])
+        )
+        service = supabase_module.SupabaseService()
+        curriculum = {"meta": {"title": "T"}, "units": []}
+
+        futures = []
+        for status in ("generating", "generating", "complete"):
+            curriculum["units"].append({"title": f"U{len(curriculum['units'])}"})
+            futures.append(service.update_curriculum_status_async("c1", status, curriculum))
+
+        assert [future.result(timeout=5) for future in futures] == [True, True, True]
+        assert threading.current_thread() not in threads
+        updates = [calls[0][1][0] for table, calls in fake_client.executed]
+        assert [update["status"] for update in updates] == ["generating", "generating", "complete"]
+        # Each save saw the units as they were when it was queued
+        assert [update["unit_count"] for update in updates] == [1, 2, 3]
+
+    def test_async_update_snapshots_nested_content(self, supabase_module, fake_client):
+        import threading
+
+        release = threading.Event()
+        saved = []
+
+        def _blocked(calls):
+            release.wait(5)
+            saved.append(calls[0][1][0]["content"])
+            return _FakeResult(data=[{"id": "c1"}])
+
+        fake_client.responses["curricula"] = _blocked
+        service = supabase_module.SupabaseService()
+        curriculum = {"meta": {"title": "T"}, "units": [{"title": "U0"}]}
+
+        future = service.update_curriculum_status_async("c1", "generating", curriculum)
+        curriculum["meta"]["title"] = "Changed"
+        curriculum["units"][0]["title"] = "Edited"
+        release.set()
+
+        assert future.result(timeout=5) is True
+        assert saved[0] == {"meta": {"title": "T"}, "units": [{"title": "U0"}]}
+
+
+class TestStripImages:
+    def _curriculum(self):
+        big = "A" * 20000
+        return {
+            "meta": {"title": "Big"},
+            "units": [
+                {"title": "U1", "image_base64": big, "content": "text", "quiz": {"q": [1]}},
+                {"title": "U2", "diagram_b64": big, "selected_image_b64": "short"},
+                {"title": "U3", "image": "B" * 2000, "image_caption": "C" * 2000},
+                "not-a-dict",
+            ],
+        }
+
+    def test_strips_large_images_without_touching_original(self, supabase_module):
+        service = supabase_module.SupabaseService()
+        original = self._curriculum()
+
+        stripped = service._strip_images_from_curriculum(original)
+
+        assert stripped["units"][0]["image_base64"] is None
+        assert stripped["units"][0]["_image_stripped"] is True
+        assert stripped["units"][1]["diagram_b64"] is None
+        assert stripped["units"][1]["selected_image_b64"] == "short"
+        assert stripped["units"][2]["image"] is None
+        assert stripped["units"][2]["image_caption"] == "C" * 2000
+        assert stripped["units"][3] == "not-a-dict"
+        assert stripped["_images_stripped"] == 3
+
+        # Original curriculum is unchanged; untouched subtrees are shared
+        assert original["units"][0]["image_base64"] == "A" * 20000
+        assert "_image_stripped" not in original["units"][0]
+        assert "_images_stripped" not in original
+        assert stripped["units"][0]["quiz"] is original["units"][0]["quiz"]
+
+    def test_no_images_leaves_no_markers(self, supabase_module, sample_curriculum):
+        stripped = supabase_module.SupabaseService()._strip_images_from_curriculum(sample_curriculum)
+
+        assert stripped == sample_curriculum
+        assert stripped["meta"] is sample_curriculum["meta"]
+        assert "_images_stripped" not in stripped
+
+
+class TestStats:
+    def test_get_stats_uses_single_rpc(self, supabase_module, fake_client):
+        fake_client.responses["rpc:curricula_stats"] = lambda calls: _FakeResult(
+            data={"total": 5, "complete": 3, "generating": 1}
+        )
+
+        stats = supabase_module.SupabaseService().get_stats()
+
+        assert stats == {"available": True, "total_curricula": 5, "complete": 3, "generating": 1}
+        assert [table for table, _ in fake_client.executed] == ["rpc:curricula_stats"]
+
+    def test_get_stats_falls_back_when_rpc_missing(self, supabase_module, fake_client):
+        def _missing(calls):
+            raise RuntimeError("function curricula_stats() does not exist")
+
+        fake_client.responses["rpc:curricula_stats"] = _missing
+        fake_client.responses["curricula"] = lambda calls: _FakeResult(data=[], count=2)
+        service = supabase_module.SupabaseService()
+
+        assert service.get_stats()["total_curricula"] == 2
+        assert service.get_stats()["complete"] == 2
+        rpc_calls = [t for t, _ in fake_client.executed if t.startswith("rpc:")]
+        assert len(rpc_calls) == 1
+
+        count_calls = [calls for t, calls in fake_client.executed if t == "curricula"]
+        assert count_calls
+        for calls in count_calls:
+            assert calls[0] == ("select", ("id",), {"count": "exact", "head": True})
+
+
+class TestGenerationLogger:
+    def _logger(self, supabase_module, **kwargs):
+        kwargs.setdefault("flush_interval", 60)
+        return supabase_module.GenerationLogger(
+            curriculum_id="curr-1",
+            supabase_service=supabase_module.SupabaseService(),
+            **kwargs,
+        )
+
+    def test_events_are_batched_into_one_upsert(self, supabase_module, fake_client):
+        logger = self._logger(supabase_module)
+
+        logger.log_event("planning", "orchestrator", "started")
+        logger.log_event("planning", "orchestrator", "completed")
+        logger.log_event("outline", "outline", "started")
+        assert fake_client.executed == []
+
+        assert logger.flush() is True
+        assert len(fake_client.executed) == 1
+        table, calls = fake_client.executed[0]
+        assert table == "generation_logs"
+        assert calls[0][0] == "upsert"
+        rows = calls[0][1][0]
+        assert [row["status"] for row in rows] == ["completed", "started"]
+        assert all(row["curriculum_id"] == "curr-1" for row in rows)
+        assert rows[0]["agent"] == "orchestrator"
+        assert isinstance(rows[0]["duration_ms"], int)
+
+        assert logger.flush() is False
+        assert len(fake_client.executed) == 1
+
+    def test_completion_after_flush_upserts_full_row(self, supabase_module, fake_client):
+        logger = self._logger(supabase_module)
+
+        logger.log_event("content", "content", "started", prompt_preview="p" * 600)
+        logger.flush()
+        logger.log_event("content", "content", "failed")
+        logger.flush()
+
+        first = fake_client.executed[0][1][0][1][0][0]
+        second = fake_client.executed[1][1][0][1][0][0]
+        assert second["id"] == first["id"]
+        assert second["status"] == "failed"
+        assert len(second["prompt_preview"]) == 500
+
+    def test_finished_rows_are_released(self, supabase_module, fake_client):
+        logger = self._logger(supabase_module)
+
+        for i in range(50):
+            logger.log_event("topic", f"agent{i}", "started")
+            logger.log_event("topic", f"agent{i}", "completed")
+        logger.log_event("topic", "content", "started")
+        logger.log_event("topic", "content", "started")
+        logger.flush()
+
+        assert len(logger._rows) == 1
+        assert len(logger._log_ids) == 1
+        rows = fake_client.executed[0][1][0][1][0]
+        assert [row["status"] for row in rows].count("completed") == 50
+
+    def test_timer_flushes_in_background(self, supabase_module, fake_client):
+        import time
+
+        logger = self._logger(supabase_module, flush_interval=0.01)
+        logger.log_event("planning", "orchestrator", "started")
+
+        deadline = time.monotonic() + 2
+        while not fake_client.executed and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert len(fake_client.executed) == 1
+
+    def test_done_event_flushes(self, supabase_module, fake_client):
+        logger = self._logger(supabase_module)
+        callback = logger.create_progress_callback()
+
+        callback("refine_start", {})
+        callback("done", {})
+
+        assert len(fake_client.executed) == 1
+
+    def test_events_snapshot_and_incremental_poll(self, supabase_module):
+        logger = supabase_module.GenerationLogger()
+
+        assert logger.events == ()
+        logger.log_event("planning", "orchestrator", "started")
+        first = logger.events
+        assert logger.events is first
+        assert len(first) == 1
+
+        logger.log_event("planning", "orchestrator", "completed")
+        assert logger.events is not first
+        assert [e["status"] for e in logger.events_since(1)] == ["completed"]
+        assert logger.events_since(2) == []
+
+    def test_durations_use_monotonic_clock(self, supabase_module, fake_client, monkeypatch):
+        ticks = iter([1_000_000_000, 1_250_000_000])
+        monkeypatch.setattr(supabase_module.time, "monotonic_ns", lambda: next(ticks))
+        logger = self._logger(supabase_module)
+
+        logger.log_event("topic", "content", "started")
+        logger.log_event("topic", "content", "completed")
+        logger.flush()
+
+        assert logger.events[-1]["duration_ms"] == 250
+        assert fake_client.executed[0][1][0][1][0][0]["duration_ms"] == 250
+
+    def test_summary_and_window_survive_eviction(self, supabase_module):
+        logger = supabase_module.GenerationLogger(max_events=3)
+
+        for i in range(4):
+            logger.log_event("topic", f"agent{i % 2}", "started")
+            logger.log_event("topic", f"agent{i % 2}", "completed")
+
+        assert len(logger.events) == 3
+        summary = logger.get_summary()
+        assert summary["total_events"] == 8
+        assert summary["event_counts"]["started"] == 4
+        assert summary["event_counts"]["completed"] == 4
+        assert sorted(summary["agents_used"]) == ["agent0", "agent1"]
+
+        assert len(logger.events_since(0)) == 3
+        assert len(logger.events_since(6)) == 2
+        assert logger.events_since(8) == []
+
+    def test_progress_callback_maps_events_and_details(self, supabase_module):
+        logger = supabase_module.GenerationLogger()
+        callback = logger.create_progress_callback()
+
+        callback("topic_start", {"topic_title": "Fractions", "topic_index": 0, "total_topics": 3, "extra": 1})
+        callback("unknown_event", {"topic_title": "ignored"})
+
+        assert len(logger.events) == 1
+        event = logger.events[0]
+        assert (event["event_type"], event["agent"], event["status"]) == ("topic", "content_agent", "started")
+        assert event["details"] == {"topic": "Fractions", "index": 0, "total": 3}
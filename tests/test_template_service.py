@@ -0,0 +1,363 @@
+"""
+Tests for TemplateManager storage and lookup against a temporary directory.
+"""
+
+import pytest
+
+
+@pytest.fixture
+def manager(tmp_path):
+    from services.template_service import TemplateManager
+
+    return TemplateManager(templates_dir=str(tmp_path / "templates"))
+
+
+class TestSerialization:
+    """Dataclass <-> dict conversion."""
+
+    def test_to_dict_matches_asdict(self, manager):
+        from dataclasses import asdict
+
+        template = manager.get_template("elementary_science")
+
+        assert template["structure"].to_dict() == asdict(template["structure"])
+        # Derived lookup fields are not persisted
+        persisted = {k: v for k, v in asdict(template["metadata"]).items() if not k.startswith("_")}
+        assert template["metadata"].to_dict() == persisted
+
+    def test_to_dict_copies_mutable_fields(self, manager):
+        metadata = manager.get_template("elementary_science")["metadata"]
+
+        data = metadata.to_dict()
+        data["tags"].append("changed")
+
+        assert "changed" not in metadata.tags
+
+    def test_dataclasses_use_slots(self, manager):
+        import copy
+        import pickle
+
+        template = manager.get_template("elementary_science")
+        metadata = template["metadata"]
+
+        assert not hasattr(metadata, "__dict__")
+        assert not hasattr(template["structure"], "__dict__")
+        # Derived fields survive copying
+        assert pickle.loads(pickle.dumps(metadata))._search_blob == metadata._search_blob
+        assert copy.deepcopy(metadata) == metadata
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_round_trip_with_and_without_orjson(self, tmp_path, monkeypatch, orjson_available):
+        from services import template_service
+
+        if orjson_available and not template_service.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+        monkeypatch.setattr(template_service, "ORJSON_AVAILABLE", orjson_available)
+        manager = template_service.TemplateManager(templates_dir=str(tmp_path / "t"))
+
+        template = manager.get_template("elementary_science")
+        template["metadata"].name = "Café Science"
+        path = tmp_path / "t" / "system" / "elementary_science.json"
+        manager._save_template_file(path, template)
+
+        loaded = manager.get_template("elementary_science")
+        assert loaded["metadata"].name == "Café Science"
+        assert loaded["structure"].to_dict() == template["structure"].to_dict()
+
+    def test_invalid_json_is_rejected(self, manager, tmp_path, capsys):
+        bad = tmp_path / "templates" / "user" / "broken.json"
+        bad.write_text("{not json")
+
+        assert manager.get_template("broken") is None
+        assert "JSON decode error" in capsys.readouterr().out
+
+
+class TestTemplates:
+    """Creating, listing and applying templates."""
+
+    def test_builtins_are_created(self, manager):
+        ids = {t.id for t in manager.list_templates()}
+        assert {"elementary_science", "high_school_inquiry", "math_problem_solving"} <= ids
+
+    def test_builtins_written_with_one_index_update(self, tmp_path, monkeypatch):
+        from services.template_service import TemplateManager
+
+        writes = []
+        original = TemplateManager._write_index
+        monkeypatch.setattr(TemplateManager, "_write_index", lambda self: writes.append(1) or original(self))
+
+        TemplateManager(templates_dir=str(tmp_path / "t"))
+        # One write for the initial (empty) index, one for the batch
+        assert len(writes) == 2
+
+        writes.clear()
+        TemplateManager(templates_dir=str(tmp_path / "t"))
+        assert writes == []
+
+    def test_builtin_files_match_embedded_definitions(self, manager):
+        from services.template_service import _BUILTIN_TEMPLATES
+
+        for builtin in _BUILTIN_TEMPLATES:
+            template = manager.get_template(builtin["metadata"]["id"])
+            metadata = template["metadata"].to_dict()
+
+            assert metadata["created_at"] == metadata["updated_at"]
+            assert {k: metadata[k] for k in builtin["metadata"]} == builtin["metadata"]
+            assert template["structure"].to_dict() == builtin["structure"]
+
+    def test_marker_skips_builtin_check(self, manager, tmp_path, monkeypatch):
+        from services import template_service
+
+        assert (tmp_path / "templates" / f".builtins_v{template_service.BUILTIN_VERSION}").exists()
+        monkeypatch.setattr(template_service, "TemplateMetadata", lambda **kw: pytest.fail("built-ins rebuilt"))
+
+        template_service.TemplateManager(templates_dir=str(tmp_path / "templates"))
+
+    def test_version_bump_restores_missing_builtin(self, manager, tmp_path, monkeypatch):
+        from services import template_service
+
+        (tmp_path / "templates" / "system" / "math_problem_solving.json").unlink()
+        monkeypatch.setattr(template_service, "BUILTIN_VERSION", template_service.BUILTIN_VERSION + 1)
+
+        fresh = template_service.TemplateManager(templates_dir=str(tmp_path / "templates"))
+        assert fresh.get_template("math_problem_solving") is not None
+
+    def test_create_and_apply_template(self, manager, sample_curriculum):
+        template_id = manager.create_template("Mine", "desc", sample_curriculum, tags=["x"])
+
+        params = manager.apply_template(template_id, "Science", "5")
+
+        assert params["template_name"] == "Mine"
+        assert params["expected_topics"] == len(sample_curriculum["units"])
+        assert manager.get_template(template_id)["metadata"].usage_count == 1
+
+    def test_list_filters(self, manager):
+        science = manager.list_templates(subject_filter="Science")
+        assert {t.id for t in science} == {"elementary_science", "high_school_inquiry"}
+        assert [t.id for t in manager.list_templates(grade_filter="K")] == ["elementary_science"]
+
+    def test_search_matches_tags_case_insensitively(self, manager, sample_curriculum):
+        template_id = manager.create_template("Plain", "Nothing", sample_curriculum, tags=["Geology"])
+
+        assert [t.id for t in manager.search_templates("GEOLOGY")] == [template_id]
+
+    def test_search_and_delete(self, manager, sample_curriculum):
+        template_id = manager.create_template("Volcano Lab", "Eruptions", sample_curriculum)
+
+        assert [t.id for t in manager.search_templates("volcano")] == [template_id]
+        assert manager.delete_template(template_id)
+        assert manager.search_templates("volcano") == []
+        assert manager.get_template(template_id) is None
+
+
+    def test_template_stats(self, manager, sample_curriculum):
+        template_id = manager.create_template("Mine", "Custom", sample_curriculum)
+        manager.apply_template(template_id, "Science", "5")
+        stats = manager.get_template_stats()
+
+        assert stats["total_templates"] == 4
+        assert stats["user_templates"] == 1
+        assert stats["system_templates"] + stats["shared_templates"] == 3
+        assert stats["total_usage"] == 1
+        assert stats["popular_templates"][0].id == template_id
+        assert stats["recent_templates"][0].id == template_id
+        assert "Science" in stats["subjects"]
+
+
+    def test_saves_replace_files_atomically(self, manager, tmp_path, sample_curriculum, monkeypatch):
+        import services.template_service as template_service
+
+        template_id = manager.create_template("Mine", "desc", sample_curriculum)
+        template_file = tmp_path / "templates" / "user" / f"{template_id}.json"
+        original = template_file.read_bytes()
+        assert not list(template_file.parent.glob("*.tmp"))
+
+        def fail_replace(src, dst):
+            raise OSError("disk full")
+
+        monkeypatch.setattr(template_service.os, "replace", fail_replace)
+        assert manager.update_template(template_id, {"name": "Renamed"}) is False
+
+        assert template_file.read_bytes() == original
+
+
+    def test_system_templates_skip_validation(self, manager, tmp_path, sample_curriculum, monkeypatch):
+        template_id = manager.create_template("Mine", "desc", sample_curriculum)
+        monkeypatch.setattr(manager, "_cache", {})
+        validated = []
+        original = manager._validate_template_data
+        monkeypatch.setattr(manager, "_validate_template_data", lambda data: validated.append(data) or original(data))
+
+        assert manager.get_template("elementary_science") is not None
+        assert validated == []
+        assert manager.get_template(template_id) is not None
+        assert len(validated) == 1
+
+    def test_malformed_system_template_is_still_rejected(self, manager, tmp_path, capsys):
+        (tmp_path / "templates" / "system" / "broken.json").write_text('{"metadata": {"id": "broken"}, "structure": {}}')
+
+        assert manager.get_template("broken") is None
+        assert "dataclass creation failed" in capsys.readouterr().out
+
+
+class TestLoadCache:
+    """Parsed templates are reused while the file is unchanged."""
+
+    def test_unchanged_file_is_not_reparsed(self, manager, monkeypatch):
+        from services import template_service
+
+        manager.list_templates()
+        manager.get_template("elementary_science")
+        parses = []
+        loads = template_service._loads_template
+        monkeypatch.setattr(template_service, "_loads_template", lambda raw: parses.append(1) or loads(raw))
+
+        manager.list_templates()
+        manager.get_template("elementary_science")
+        assert parses == []
+
+    def test_cached_templates_are_copies(self, manager):
+        first = manager.get_template("elementary_science")
+        first["metadata"].tags.append("mutated")
+        first["metadata"].usage_count = 99
+
+        second = manager.get_template("elementary_science")
+        assert "mutated" not in second["metadata"].tags
+        assert second["metadata"].usage_count == 0
+
+    def test_external_edit_is_picked_up(self, manager, tmp_path):
+        import json
+        import os
+
+        path = tmp_path / "templates" / "system" / "elementary_science.json"
+        manager.get_template("elementary_science")
+
+        data = json.loads(path.read_text())
+        data["metadata"]["name"] = "Edited outside"
+        path.write_text(json.dumps(data))
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+        assert manager.get_template("elementary_science")["metadata"].name == "Edited outside"
+
+
+class TestLocation:
+    """Remembered template locations."""
+
+    def test_lookup_uses_remembered_location(self, manager, tmp_path, sample_curriculum, monkeypatch):
+        from pathlib import Path
+
+        template_id = manager.create_template("Mine", "desc", sample_curriculum)
+        user_file = tmp_path / "templates" / "user" / f"{template_id}.json"
+        user_file.rename(tmp_path / "templates" / "shared" / user_file.name)
+        manager.get_template(template_id)
+
+        probed = []
+        original_exists = Path.exists
+        monkeypatch.setattr(Path, "exists", lambda self: probed.append(self) or original_exists(self))
+        assert manager.get_template(template_id)["metadata"].name == "Mine"
+        assert manager.update_template(template_id, {"name": "Renamed"}, user_only=False)
+
+        assert probed and all(p.parent.name == "shared" for p in probed)
+
+    def test_moved_template_is_found_again(self, manager, tmp_path, sample_curriculum):
+        template_id = manager.create_template("Mine", "desc", sample_curriculum)
+        manager.get_template(template_id)
+
+        user_file = tmp_path / "templates" / "user" / f"{template_id}.json"
+        user_file.rename(tmp_path / "templates" / "shared" / user_file.name)
+
+        assert manager.get_template(template_id)["metadata"].name == "Mine"
+        assert manager.delete_template(template_id, user_only=False)
+        assert manager.get_template(template_id) is None
+
+
+class TestIndex:
+    """Metadata index used by list_templates."""
+
+    def test_listing_reads_only_the_index(self, manager, monkeypatch):
+        manager.list_templates()
+        monkeypatch.setattr(manager, "_load_template_file", lambda path: pytest.fail(f"opened {path}"))
+
+        assert len(manager.list_templates()) == 3
+
+    def test_index_persists_across_managers(self, manager, tmp_path, monkeypatch):
+        from services.template_service import TemplateManager
+
+        manager.list_templates()
+        assert (tmp_path / "templates" / "_index.json").exists()
+
+        fresh = TemplateManager(templates_dir=str(tmp_path / "templates"))
+        monkeypatch.setattr(fresh, "_load_template_file", lambda path: pytest.fail(f"opened {path}"))
+        assert len(fresh.list_templates()) == 3
+
+    def test_index_tracks_saves_and_deletes(self, manager, sample_curriculum):
+        template_id = manager.create_template("Mine", "desc", sample_curriculum)
+        manager.apply_template(template_id, "Science", "5")
+
+        listed = {t.id: t for t in manager.list_templates()}
+        assert listed[template_id].usage_count == 1
+
+        manager.delete_template(template_id)
+        assert template_id not in {t.id for t in manager.list_templates()}
+
+    def test_files_added_outside_are_indexed(self, manager, tmp_path):
+        import shutil
+
+        manager.list_templates()
+        system = tmp_path / "templates" / "system"
+        copied = system.parent / "shared" / "copied.json"
+        shutil.copy(system / "math_problem_solving.json", copied)
+
+        assert len(manager.list_templates()) == 4
+
+    def test_rebuild_skips_non_json_and_directories(self, manager, tmp_path):
+        shared = tmp_path / "templates" / "shared"
+        (shared / "notes.txt").write_text("not a template")
+        (shared / "folder.json").mkdir()
+
+        index = manager._rebuild_index(manager._dir_mtimes())
+
+        assert sorted(index["templates"]) == [
+            "system/elementary_science",
+            "system/high_school_inquiry",
+            "system/math_problem_solving",
+        ]
+
+    def test_corrupt_index_is_rebuilt(self, manager, tmp_path):
+        from services.template_service import TemplateManager
+
+        (tmp_path / "templates" / "_index.json").write_text("garbage")
+
+        fresh = TemplateManager(templates_dir=str(tmp_path / "templates"))
+        assert len(fresh.list_templates()) == 3
+
+
+class TestSearchCache:
+    """Memoized search results."""
+
+    def test_repeated_query_skips_scan(self, manager, monkeypatch):
+        first = manager.search_templates("Science")
+        monkeypatch.setattr(manager, "_list_entries", lambda *a, **k: pytest.fail("rescanned"))
+
+        again = manager.search_templates("science")
+        assert [t.id for t in again] == [t.id for t in first]
+        assert again[0] is not first[0]
+
+    def test_changes_invalidate_cached_results(self, manager, sample_curriculum):
+        assert manager.search_templates("volcano") == []
+
+        template_id = manager.create_template("Volcano Lab", "Eruptions", sample_curriculum)
+        assert [t.id for t in manager.search_templates("volcano")] == [template_id]
+
+        manager.update_template(template_id, {"name": "Glacier Lab", "description": "Ice"})
+        assert manager.search_templates("volcano") == []
+
+    def test_cache_is_bounded(self, manager):
+        from services.template_service import _SEARCH_CACHE_SIZE
+
+        for i in range(_SEARCH_CACHE_SIZE + 10):
+            manager.search_templates(f"query {i}")
+
+        assert len(manager._search_cache) == _SEARCH_CACHE_SIZE
+        assert "query 0" not in manager._search_cache
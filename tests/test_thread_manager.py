@@ -0,0 +1,119 @@
+"""
+Tests for ThreadManager registration, cancellation and status.
+"""
+
+import gc
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def manager():
+    from services.thread_manager import ThreadManager
+
+    manager = ThreadManager()
+    yield manager
+    manager.shutdown(timeout=2)
+
+
+def _wait_for_cancel(cancellation_event=None):
+    cancellation_event.wait(5)
+
+
+class TestManagedThread:
+    def test_target_receives_cancellation_event(self, manager):
+        thread = manager.start_thread("worker", _wait_for_cancel)
+
+        assert manager.cancel_thread("worker") is True
+        assert manager.wait_for_thread("worker", timeout=2) is True
+        status = manager.get_thread_status("worker")
+        assert status["cancelled"] is True
+        assert status["completed"] is True
+        assert thread.get_exception() is None
+
+    def test_accepts_cancellation_checks_parameters_only(self):
+        from services.thread_manager import ManagedThread
+
+        def uses_local():
+            cancellation_event = None
+            return cancellation_event
+
+        def keyword_only(*, cancellation_event=None):
+            pass
+
+        assert ManagedThread(_wait_for_cancel)._accepts_cancellation is True
+        assert ManagedThread(keyword_only)._accepts_cancellation is True
+        assert ManagedThread(uses_local)._accepts_cancellation is False
+        assert ManagedThread(print)._accepts_cancellation is False
+
+    def test_join_with_timeout(self, manager):
+        finished = manager.start_thread("quick", lambda: None)
+        blocked = manager.start_thread("blocked", _wait_for_cancel)
+
+        assert finished.join_with_timeout(2) is True
+        assert blocked.join_with_timeout(0.05) is False
+        blocked.cancel()
+        assert blocked.join_with_timeout(2) is True
+
+    def test_exception_is_recorded(self, manager):
+        def boom():
+            raise ValueError("bad")
+
+        original_hook = threading.excepthook
+        threading.excepthook = lambda args: None
+        try:
+            thread = manager.start_thread("boom", boom)
+            thread.join(2)
+        finally:
+            threading.excepthook = original_hook
+
+        status = manager.get_thread_status("boom")
+        assert status["completed"] is True
+        assert isinstance(status["exception"], ValueError)
+
+
+class TestThreadManager:
+    def test_registered_thread_status(self, manager):
+        release = threading.Event()
+        thread = manager.start_thread("worker", release.wait, 5)
+
+        assert manager.get_thread_status("worker")["alive"] is True
+        assert manager.cancel_thread("worker") is True
+        assert manager.get_thread_status("worker")["cancelled"] is True
+
+        release.set()
+        assert manager.wait_for_thread("worker", timeout=2) is True
+        assert manager.get_thread_status("worker")["alive"] is False
+        assert thread.get_exception() is None
+
+    def test_unknown_thread(self, manager):
+        assert manager.cancel_thread("missing") is False
+        assert manager.wait_for_thread("missing") is True
+        assert manager.get_thread_status("missing") is None
+
+    def test_collected_threads_drop_out(self, manager):
+        thread = manager.start_thread("short", lambda: None)
+        thread.join(2)
+        assert manager.get_thread_status("short") is not None
+
+        del thread
+        gc.collect()
+        assert manager.get_thread_status("short") is None
+        assert "short" not in manager._threads
+
+    def test_wait_does_not_block_other_calls(self, manager):
+        release = threading.Event()
+        manager.start_thread("slow", release.wait, 5)
+        waiter = threading.Thread(target=manager.wait_for_thread, args=("slow", 5))
+        waiter.start()
+
+        try:
+            # Status, cancel and registration all proceed while a wait is pending
+            assert manager.get_thread_status("slow")["alive"] is True
+            assert manager.cancel_thread("slow") is True
+            manager.create_thread("other", lambda: None)
+        finally:
+            release.set()
+            waiter.join(2)
+        assert not waiter.is_alive()
@@ -0,0 +1,553 @@
+"""
+Tests for UserService PIN hashing and authentication against a temporary database.
+"""
+
+import hashlib
+
+import pytest
+
+
+@pytest.fixture
+def service(tmp_path):
+    from services.user_service import UserService
+
+    UserService._failed_attempts.clear()
+    UserService._lockouts.clear()
+    UserService._user_cache.clear()
+    service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "users.db"))
+    yield service
+    service.db.close_connection()
+
+
+class TestPinHashing:
+    """PBKDF2 and legacy SHA-256 PIN hashes."""
+
+    def test_hash_matches_standard_pbkdf2(self, service):
+        from services.user_service import PBKDF2_ITERATIONS
+
+        service._ph = None
+        salt_hex, key_hex = service._hash_pin("Alice", "1234").split(":")
+        expected = hashlib.pbkdf2_hmac("sha256", b"alice:1234", bytes.fromhex(salt_hex), PBKDF2_ITERATIONS)
+        assert bytes.fromhex(key_hex) == expected
+
+    def test_verify_new_format(self, service):
+        user = {"id": "x", "username": "Alice", "pin_hash": service._hash_pin("alice", "1234")}
+
+        assert service._verify_and_maybe_upgrade_pin(user, "1234") is True
+        assert service._verify_and_maybe_upgrade_pin(user, "4321") is False
+        assert service._verify_and_maybe_upgrade_pin({**user, "pin_hash": "zz:zz"}, "1234") is False
+
+    def test_verify_builds_the_pin_buffer_once(self, service, monkeypatch):
+        from services import user_service
+
+        built = []
+        original = user_service._pin_secret
+        monkeypatch.setattr(user_service, "_pin_secret", lambda u, p: built.append(u) or original(u, p))
+        user, _ = service.create_user("rex")
+        service.db.update_user(user["id"], pin_hash=hashlib.sha256(b"rex:1234").hexdigest())
+        built.clear()
+
+        assert service.authenticate("rex", "1234")[1] == "success"
+        assert built == ["rex"]
+
+    def test_legacy_hash_is_upgraded(self, service):
+        user, _ = service.create_user("bob")
+        legacy = hashlib.sha256(b"bob:1234").hexdigest()
+        service.db.update_user(user["id"], pin_hash=legacy)
+
+        assert service.authenticate("bob", "1234")[1] == "success"
+        stored = service.db.get_user(user["id"])["pin_hash"]
+        assert stored != legacy
+        assert service.authenticate("bob", "1234")[1] == "success"
+
+    def test_legacy_check_is_constant_time_and_length_gated(self, service, monkeypatch):
+        from services import user_service
+
+        compared = []
+        monkeypatch.setattr(user_service.secrets, "compare_digest", lambda a, b: compared.append((a, b)) or a == b)
+        legacy = hashlib.sha256(b"quin:1234").hexdigest()
+
+        assert service._verify_and_maybe_upgrade_pin({"username": "quin", "pin_hash": legacy[:-1]}, "1234") is False
+        assert compared == []
+        assert service._verify_and_maybe_upgrade_pin({"username": "quin", "pin_hash": "g" * 64}, "1234") is False
+        assert compared == []
+        assert service._verify_and_maybe_upgrade_pin({"username": "quin", "pin_hash": legacy}, "0000") is False
+        assert len(compared) == 1
+        assert all(isinstance(side, bytes) and len(side) == 32 for side in compared[0])
+
+
+class _FakeMismatch(Exception):
+    pass
+
+
+class _FakeHasher:
+    """Stand-in for argon2.PasswordHasher with a recognisable PHC prefix."""
+
+    needs_rehash = False
+
+    def hash(self, secret):
+        if isinstance(secret, str):
+            secret = secret.encode()
+        return "$argon2id$fake$" + hashlib.sha256(secret).hexdigest()
+
+    def verify(self, stored, secret):
+        if stored != self.hash(secret):
+            raise _FakeMismatch()
+        return True
+
+    def check_needs_rehash(self, stored):
+        return self.needs_rehash
+
+
+class TestArgon2:
+    """Argon2id hashing and upgrades from older formats."""
+
+    @pytest.fixture
+    def argon_service(self, service, monkeypatch):
+        from services import user_service
+
+        monkeypatch.setattr(user_service, "VerificationError", _FakeMismatch, raising=False)
+        monkeypatch.setattr(user_service, "InvalidHashError", ValueError, raising=False)
+        service._ph = _FakeHasher()
+        return service
+
+    def test_new_pins_use_argon2(self, argon_service):
+        argon_service.create_user("erin", "1234")
+
+        stored = argon_service.db.get_user_by_username("erin")["pin_hash"]
+        assert stored.startswith("$argon2id$")
+        assert argon_service.authenticate("erin", "1234")[1] == "success"
+        assert argon_service.authenticate("erin", "9999")[1] == "invalid_pin"
+
+    def test_pbkdf2_hash_is_upgraded(self, argon_service):
+        hasher = argon_service._ph
+        argon_service._ph = None
+        argon_service.create_user("finn", "1234")
+        argon_service._ph = hasher
+
+        assert ":" in argon_service.db.get_user_by_username("finn")["pin_hash"]
+        assert argon_service.authenticate("finn", "1234")[1] == "success"
+        assert argon_service.db.get_user_by_username("finn")["pin_hash"].startswith("$argon2id$")
+
+    def test_stub_password_hasher_without_argon2(self, tmp_path, monkeypatch):
+        """Every Argon2 branch runs against a stub PasswordHasher class"""
+        from services import user_service
+
+        built = []
+
+        class StubPasswordHasher(_FakeHasher):
+            def __init__(self, **params):
+                built.append(params)
+
+        monkeypatch.setattr(user_service, "ARGON2_AVAILABLE", True)
+        monkeypatch.setattr(user_service, "PasswordHasher", StubPasswordHasher, raising=False)
+        monkeypatch.setattr(user_service, "VerificationError", _FakeMismatch, raising=False)
+        monkeypatch.setattr(user_service, "InvalidHashError", ValueError, raising=False)
+
+        service = user_service.UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "stub.db"))
+        try:
+            assert built == [{
+                "time_cost": user_service.ARGON2_TIME_COST,
+                "memory_cost": user_service.ARGON2_MEMORY_COST,
+                "parallelism": user_service.ARGON2_PARALLELISM,
+            }]
+            salt = bytes(32)
+            key = user_service._derive_pin_key(b"ivy:1234", salt)
+            user = {"id": "x", "username": "ivy", "pin_hash": f"{salt.hex()}:{key.hex()}"}
+            upgraded = []
+            monkeypatch.setattr(service, "_upgrade_pin_hash", lambda u, combined: upgraded.append(combined))
+
+            # PBKDF2 -> Argon2 upgrade
+            assert service._verify_and_maybe_upgrade_pin(user, "1234") is True
+            assert upgraded == [b"ivy:1234"]
+
+            # Argon2 verify, mismatch and rehash
+            user["pin_hash"] = service._hash_pin("ivy", "1234")
+            assert user["pin_hash"].startswith("$argon2id$")
+            upgraded.clear()
+            assert service._verify_and_maybe_upgrade_pin(user, "1234") is True
+            assert service._verify_and_maybe_upgrade_pin(user, "9999") is False
+            assert upgraded == []
+            service._ph.needs_rehash = True
+            assert service._verify_and_maybe_upgrade_pin(user, "1234") is True
+            assert upgraded == [b"ivy:1234"]
+        finally:
+            service.db.close_connection()
+
+    def test_argon2_hash_without_library_is_rejected(self, argon_service, monkeypatch):
+        from services import user_service
+
+        warnings = []
+        monkeypatch.setattr(user_service, "_log_warning", warnings.append)
+        argon_service.create_user("gus", "1234")
+        argon_service._ph = None
+
+        assert argon_service.authenticate("gus", "1234")[1] == "invalid_pin"
+        assert warnings == ["Argon2 PIN hash found but argon2-cffi is not installed"]
+
+    def test_real_argon2_round_trip(self, tmp_path):
+        pytest.importorskip("argon2")
+        from services.user_service import UserService
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "real.db"))
+        user = {"id": "x", "username": "Hal", "pin_hash": service._hash_pin("hal", "1234")}
+
+        assert user["pin_hash"].startswith("$argon2id$")
+        assert service._verify_and_maybe_upgrade_pin(user, "1234") is True
+        assert service._verify_and_maybe_upgrade_pin(user, "4321") is False
+
+
+class TestConnectionSettings:
+    def test_connections_use_wal_with_relaxed_sync(self, service):
+        with service.db.get_connection() as conn:
+            assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+            assert conn.execute("PRAGMA synchronous").fetchone()[0] == 1  # NORMAL
+            assert conn.execute("PRAGMA temp_store").fetchone()[0] == 2  # MEMORY
+
+
+class TestBadges:
+    """Badges column parsing and the preferences-to-columns migration."""
+
+    def test_badges_are_parsed_once_and_memoized(self, service):
+        user = {"badges": '["star", "moon"]'}
+
+        badges = service._badges(user)
+        assert badges == ["star", "moon"]
+        user["badges"] = "[]"
+        assert service._badges(user) is badges
+
+    @pytest.mark.parametrize("raw", [None, "", "not json", '{"a": 1}', b"[bad"])
+    def test_missing_or_malformed_badges(self, service, raw):
+        assert service._badges({"badges": raw}) == []
+
+    @pytest.mark.parametrize("orjson_available", [True, False])
+    def test_json_helpers_round_trip(self, monkeypatch, orjson_available):
+        from services import user_service
+
+        if orjson_available and not user_service.ORJSON_AVAILABLE:
+            pytest.skip("orjson not installed")
+        monkeypatch.setattr(user_service, "ORJSON_AVAILABLE", orjson_available)
+
+        text = user_service._json_dumps(["star", "ünïcode"])
+        assert isinstance(text, str) and " " not in text
+        assert user_service._json_loads(text) == ["star", "ünïcode"]
+
+    def test_response_badges_are_copies(self, service):
+        service.create_user("pia")
+        user = service.db.get_user_by_username("pia")
+        service.db.update_user(user["id"], badges=["gold"])
+
+        service.get_user("pia")["badges"].append("silver")
+        assert service.get_user("pia")["badges"] == ["gold"]
+
+    def test_old_databases_gain_columns_from_preferences(self, tmp_path):
+        import json
+        import sqlite3
+
+        from services.user_service import UserService
+
+        db_path = tmp_path / "old.db"
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE users (
+                id TEXT PRIMARY KEY, username TEXT UNIQUE NOT NULL, pin_hash TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, last_login TIMESTAMP,
+                total_xp INTEGER DEFAULT 0, preferences TEXT)
+        """)
+        conn.executemany("INSERT INTO users (id, username, preferences) VALUES (?, ?, ?)", [
+            ("1", "ann", json.dumps({"badges": ["star"], "has_pin": True, "created_at": "2023-05-01T00:00:00"})),
+            ("2", "ben", "{}"),
+            ("3", "cat", "not json"),
+        ])
+        conn.commit()
+        conn.close()
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(db_path))
+
+        ann = service.get_user("ann")
+        assert (ann["badges"], ann["has_pin"], ann["created_at"]) == (["star"], True, "2023-05-01T00:00:00")
+        ben = service.get_user("ben")
+        assert (ben["badges"], ben["has_pin"]) == ([], False) and ben["created_at"]
+        assert service.get_user("cat")["badges"] == []
+
+
+class TestAccounts:
+    """Account lifecycle through the public API."""
+
+    def test_create_authenticate_and_change_pin(self, service):
+        user, msg = service.create_user("Carol", "1234")
+        assert msg == "created"
+        assert user["has_pin"] is True
+        assert service.create_user("Carol")[1] == "user_exists"
+
+        assert service.authenticate("Carol")[1] == "pin_required"
+        assert service.authenticate("Carol", "0000")[1] == "invalid_pin"
+        authed, msg = service.authenticate("Carol", "1234")
+        assert msg == "success" and authed["last_login"]
+
+        assert service.set_pin("Carol", "1234", "5678") == (True, "pin_updated")
+        assert service.authenticate("Carol", "5678")[1] == "success"
+        assert service.remove_pin("Carol", "5678") == (True, "pin_removed")
+        assert service.user_has_pin("Carol") is False
+        assert service.get_user("Carol")["has_pin"] is False
+
+    def test_pin_validation(self, service):
+        service.create_user("dave")
+
+        assert service.set_pin("dave", None, "12") == (False, "invalid_new_pin")
+        assert service.set_pin("dave", None, "1234567") == (False, "invalid_new_pin")
+        assert service.set_pin("dave", None, "12a4") == (False, "pin_must_be_digits")
+        # Non-ASCII digits pass str.isdigit() but are not valid PINs
+        assert service.set_pin("dave", None, "١٢٣٤") == (False, "pin_must_be_digits")
+        assert service.set_pin("dave", None, "1234\n") == (False, "pin_must_be_digits")
+        assert service.set_pin("dave", None, "1234") == (True, "pin_updated")
+        assert service.set_pin("dave", None, "5678") == (False, "old_pin_required")
+
+    def test_responses_are_built_without_reloading(self, service, monkeypatch):
+        reloads = []
+        original = service.db.get_user
+        monkeypatch.setattr(service.db, "get_user", lambda uid: reloads.append(uid) or original(uid))
+
+        created, _ = service.create_user("ola", "1234")
+        assert created["created_at"] and created["badges"] == [] and created["has_pin"] is True
+        # Only DatabaseService.create_user's own read-back
+        assert len(reloads) == 1
+
+        authed, _ = service.authenticate("ola", "1234")
+        assert len(reloads) == 1
+        stored = service.db.get_user_by_username("ola")
+        assert authed["last_login"] == stored["last_login"]
+        assert stored["has_pin"] == 1
+
+    def test_pin_changes_write_once(self, service, monkeypatch):
+        writes = []
+        original = service.db.update_user
+        monkeypatch.setattr(service.db, "update_user", lambda uid, **kw: writes.append(kw) or original(uid, **kw))
+
+        service.create_user("nat")
+        assert writes == []
+        service.set_pin("nat", None, "1234")
+        service.remove_pin("nat", "1234")
+
+        assert [sorted(kw) for kw in writes] == [["has_pin", "pin_hash"]] * 2
+        stored = service.db.get_user_by_username("nat")
+        assert stored["pin_hash"] is None and stored["has_pin"] == 0
+
+    def test_listing(self, service):
+        for name in ("zoe", "Adam", "mia"):
+            service.create_user(name)
+        service.set_pin("mia", None, "1234")
+
+        assert service.list_usernames() == ["Adam", "mia", "zoe"]
+        users = service.list_users()
+        assert [u["username"] for u in users] == ["Adam", "mia", "zoe"]
+        assert [u["has_pin"] for u in users] == [False, True, False]
+        assert service.user_exists("zoe") and not service.user_exists("nobody")
+
+    def test_listings_are_sorted_by_the_query(self, service, monkeypatch):
+        service.create_user("beth")
+        service.create_user("Al")
+        monkeypatch.setattr(service.db, "list_users", lambda: pytest.fail("full rows loaded"))
+
+        assert [u["username"] for u in service.list_users()] == ["Al", "beth"]
+        assert service.list_usernames() == ["Al", "beth"]
+        plan = service.db.fetch_all(
+            "EXPLAIN QUERY PLAN SELECT username FROM users ORDER BY username COLLATE NOCASE"
+        )
+        assert "idx_users_username_nocase" in str(plan)
+
+
+class TestUserCache:
+    """Cached user-row lookups."""
+
+    def _count_lookups(self, service, monkeypatch):
+        calls = []
+        original = service.db.get_user_by_username
+        monkeypatch.setattr(service.db, "get_user_by_username", lambda name: calls.append(name) or original(name))
+        return calls
+
+    def test_repeated_lookups_hit_the_database_once(self, service, monkeypatch):
+        service.create_user("ivy", "1234")
+        calls = self._count_lookups(service, monkeypatch)
+
+        assert service.user_exists("ivy")
+        assert service.user_has_pin("ivy")
+        assert service.get_user("ivy")["username"] == "ivy"
+        assert calls == ["ivy"]
+
+    def test_misses_are_not_cached(self, service, monkeypatch):
+        calls = self._count_lookups(service, monkeypatch)
+
+        assert service.get_user("jay") is None
+        service.create_user("jay")
+        assert service.get_user("jay") is not None
+        assert calls.count("jay") == 3
+
+    def test_existence_checks_use_thin_queries(self, service, monkeypatch):
+        service.create_user("jon", "1234")
+        service.create_user("joy")
+        calls = self._count_lookups(service, monkeypatch)
+
+        assert service.user_exists("jon") and not service.user_exists("nobody")
+        assert service.user_has_pin("jon") and not service.user_has_pin("joy")
+        assert not service.user_has_pin("nobody")
+        assert calls == []
+
+    def test_writes_invalidate_across_instances(self, service, tmp_path):
+        from services.user_service import UserService
+
+        other = UserService(users_dir=str(tmp_path / "users"), db_path=service.db.db_path)
+        service.create_user("kim")
+        assert other.user_has_pin("kim") is False
+
+        service.set_pin("kim", None, "1234")
+        assert other.user_has_pin("kim") is True
+        service.remove_pin("kim", "1234")
+        assert other.user_has_pin("kim") is False
+        assert other.authenticate("kim")[1] == "success"
+
+    def test_entries_expire(self, service, monkeypatch):
+        from services import user_service
+
+        service.create_user("lou")
+        service.get_user("lou")
+        calls = self._count_lookups(service, monkeypatch)
+
+        now = user_service.time.monotonic()
+        monkeypatch.setattr(user_service.time, "monotonic", lambda: now + user_service.USER_CACHE_TTL + 1)
+        assert service.get_user("lou") is not None
+        assert calls == ["lou"]
+
+    def test_concurrent_lookups_and_evictions(self, service, monkeypatch):
+        """Session threads sharing the cache can evict while others read"""
+        import threading
+
+        from services import user_service
+
+        monkeypatch.setattr(user_service, "USER_CACHE_SIZE", 4)
+        monkeypatch.setattr(service.db, "get_user_by_username", lambda name: {"username": name})
+        errors = []
+
+        def worker(n):
+            try:
+                for i in range(300):
+                    name = f"u{(n * 7 + i) % 16}"
+                    assert service._get_user_cached(name)["username"] == name
+                    service._invalidate_user(name)
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert errors == []
+        assert len(user_service.UserService._user_cache) <= 4
+
+
+class TestMigration:
+    """One-time import of legacy JSON user files."""
+
+    def _write_users(self, users_dir, users):
+        import json
+
+        users_dir.mkdir(parents=True, exist_ok=True)
+        for i, data in enumerate(users):
+            (users_dir / f"user{i}.json").write_text(json.dumps(data))
+
+    def test_users_are_imported_in_one_batch(self, tmp_path, monkeypatch, capsys):
+        from services.database_service import DatabaseService
+        from services.user_service import UserService
+
+        legacy = hashlib.sha256(b"sam:1234").hexdigest()
+        self._write_users(tmp_path / "users", [
+            {"username": "sam", "pin_hash": legacy, "total_xp": 40, "badges": ["star"],
+             "has_pin": True, "created_at": "2024-01-01T00:00:00", "last_login": "2024-02-01T00:00:00"},
+            {"username": "tia"},
+            {"username": "sam"},
+            {"no_username": True},
+        ])
+        (tmp_path / "users" / "broken.json").write_text("{")
+        batches = []
+        original = DatabaseService.executemany_rowcount
+        monkeypatch.setattr(
+            DatabaseService, "executemany_rowcount",
+            lambda self, sql, rows: batches.append(len(rows)) or original(self, sql, rows),
+        )
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "m.db"))
+        assert service._wait_for_migration(timeout=5)
+
+        assert batches == [3]
+        assert "Migration complete: 2/5 users migrated" in capsys.readouterr().out
+        sam = service.get_user("sam")
+        assert (sam["total_xp"], sam["badges"], sam["created_at"]) == (40, ["star"], "2024-01-01T00:00:00")
+        assert service.authenticate("sam", "1234")[1] == "success"
+
+    def test_migration_runs_only_into_an_empty_database(self, tmp_path, capsys):
+        from services.user_service import UserService
+
+        self._write_users(tmp_path / "users", [{"username": "uma"}])
+        UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "m.db"))._wait_for_migration(timeout=5)
+        (tmp_path / "users" / "user0.json").write_text('{"username": "vic"}')
+        capsys.readouterr()
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "m.db"))
+        assert service._migration_thread is None
+        assert "Migrating" not in capsys.readouterr().out
+        assert service.list_usernames() == ["uma"]
+
+    def test_import_runs_in_the_background(self, tmp_path, monkeypatch):
+        import threading
+
+        from services.user_service import UserService
+
+        self._write_users(tmp_path / "users", [{"username": "val"}])
+        release = threading.Event()
+        original = UserService._import_user_files
+        monkeypatch.setattr(UserService, "_import_user_files", lambda self, files: release.wait(5) and original(self, files))
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "m.db"))
+        # The constructor returned while the import is still blocked
+        assert service._migration_thread.is_alive()
+
+        created = []
+        creator = threading.Thread(target=lambda: created.append(service.create_user("wyn")[1]))
+        creator.start()
+        creator.join(0.2)
+        # create_user waits for the import instead of racing it
+        assert creator.is_alive() and created == []
+
+        release.set()
+        creator.join(5)
+        assert created == ["created"]
+        assert service.list_usernames() == ["val", "wyn"]
+
+    def test_legacy_users_are_visible_while_importing(self, tmp_path, monkeypatch):
+        """A legacy profile can't be re-created (and its PIN lost) mid-import"""
+        import threading
+
+        from services.user_service import UserService
+
+        legacy = hashlib.sha256(b"val:1234").hexdigest()
+        self._write_users(tmp_path / "users", [{"username": "val", "pin_hash": legacy, "total_xp": 70}])
+        started = threading.Event()
+        original = UserService._import_user_files
+
+        def slow_import(self, files):
+            started.set()
+            threading.Event().wait(0.2)
+            original(self, files)
+
+        monkeypatch.setattr(UserService, "_import_user_files", slow_import)
+
+        service = UserService(users_dir=str(tmp_path / "users"), db_path=str(tmp_path / "m.db"))
+        assert started.wait(5)
+
+        assert service.user_exists("val") is True
+        assert service.user_has_pin("val") is True
+        assert service.create_user("val") == ({}, "user_exists")
+        assert service.authenticate("val")[1] == "pin_required"
+        assert service.get_user("val")["total_xp"] == 70